@@ -297,7 +297,7 @@ while True:
       ):
       non_match_count=0
       continue
-    opponent_matches = device_action.deduplicate_boxes(tt_matches.get("tt_select_opponent") + tt_matches.get("tt_select_opponent_2"), min_dist=10)
+    opponent_matches, _ = device_action.deduplicate_boxes(tt_matches.get("tt_select_opponent") + tt_matches.get("tt_select_opponent_2"), min_dist=10)
     opponent_matches.sort(key=lambda x: x[1])
     info(f"Matched buttons: {opponent_matches}")
     if len(opponent_matches) == 3:
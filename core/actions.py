@@ -5,7 +5,7 @@
 import utils.constants as constants
 import core.config as config
 import re
-from utils.tools import sleep, get_secs
+from utils.tools import sleep, settle, get_secs
 import utils.device_action_wrapper as device_action
 from utils.log import error, info, warning, debug
 from utils.screenshot import are_screenshots_same
@@ -58,8 +58,8 @@ def do_training(options):
   if not device_action.locate_and_click("assets/buttons/training_btn.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX, min_search_time=get_secs(2)):
     error(f"Couldn't find training button.")
     return False
-  sleep(0.75)
-  device_action.click(target=mouse_pos, clicks=2, interval=0.15)
+  settle(0.75, constants.SCREEN_BOTTOM_BBOX)
+  device_action.click(target=mouse_pos, clicks=2, interval=0.15, settle_region=constants.SCREEN_BOTTOM_BBOX)
   return True
 
 def do_infirmary(options=None):
@@ -270,9 +270,9 @@ def enter_race(race_name="any", race_image_path="", options=None):
 def start_race():
   if config.POSITION_SELECTION_ENABLED:
     select_position()
-    sleep(0.5)
+    settle(0.5)
   device_action.locate_and_click("assets/buttons/view_results.png", min_search_time=get_secs(10), region_ltrb=constants.SCREEN_BOTTOM_BBOX)
-  sleep(0.5)
+  settle(0.5, constants.SCREEN_BOTTOM_BBOX)
 
   close_btn = device_action.locate("assets/buttons/close_btn.png", min_search_time=get_secs(1))
   if not close_btn:
@@ -289,10 +289,11 @@ def start_race():
     device_action.click(target=constants.SAFE_SPACE_MOUSE_POS)
     if device_action.locate_and_click("assets/buttons/next2_btn.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX):
       return True
-    sleep(0.25)
+    settle(0.25, constants.SCREEN_BOTTOM_BBOX)
 
   if device_action.locate_and_click("assets/buttons/race_btn.png", min_search_time=get_secs(10), region_ltrb=constants.SCREEN_BOTTOM_BBOX):
     debug(f"Went into the race, sleep for {get_secs(10)} seconds to allow loading.")
+    # not a settle, the loading screen holds still long before the race is ready
     sleep(10)
     debug("Looking for \"Race!\" button...")
     for i in range(5):
@@ -307,7 +308,7 @@ def start_race():
         break
       elif i == 4:
         warning(f"Could not find \"Race!\" button after {i+1} attempts. Probably can't move onto the race. Please report this.")
-    sleep(0.5)
+    settle(0.5)
 
     skip_btn, skip_btn_big = find_skip_buttons(get_secs(2))
     if not skip_btn and not skip_btn_big:
@@ -315,15 +316,15 @@ def start_race():
       skip_btn, skip_btn_big = find_skip_buttons(get_secs(10))
 
     click_any_button(skip_btn, skip_btn_big)
-    sleep(0.5)
+    settle(0.5)
     click_any_button(skip_btn, skip_btn_big)
-    sleep(2)
+    settle(2)
     click_any_button(skip_btn, skip_btn_big)
-    sleep(0.5)
+    settle(0.5)
     click_any_button(skip_btn, skip_btn_big)
     skip_btn, _ = find_skip_buttons(get_secs(2))
     device_action.click(target=skip_btn)
-    sleep(2)
+    settle(2)
 
     while True:
       sleep(1)
@@ -1,5 +1,6 @@
 
 is_bot_running = False
 use_adb = False
+use_replay = False
 hotkey = "f1"
 PREFERRED_POSITION_SET=False
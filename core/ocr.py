@@ -1,31 +1,76 @@
-import easyocr
 from PIL import Image
 import numpy as np
+import cv2
 import re
-from utils.log import debug
+import threading
+import time
+from collections import defaultdict
+from utils.log import debug, info
+import utils.result_cache as result_cache
+import utils.profiler as profiler
 
-reader = easyocr.Reader(["en"], gpu=False)
+# easyocr pulls in torch, so the reader is only built when something needs it
+_reader = None
+_reader_has_detector = False
+_reader_lock = threading.Lock()
 
+DEFAULT_ALLOWLIST = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-!.,'#? "
+
+def get_reader(detector=True):
+  """Returns the shared reader, recognize() only needs the recognizer so callers can skip the detector."""
+  global _reader, _reader_has_detector
+  if _reader is not None and (_reader_has_detector or not detector):
+    return _reader
+  with _reader_lock:
+    start = time.perf_counter()
+    if _reader is None:
+      import easyocr
+      _reader = easyocr.Reader(["en"], gpu=False, detector=detector)
+      _reader_has_detector = detector
+      debug(f"EasyOCR reader loaded in {time.perf_counter() - start:.2f}s (detector: {detector}).")
+    elif detector and not _reader_has_detector:
+      _reader.detector = _reader.initDetector(_reader.getDetectorPath("craft"))
+      _reader_has_detector = True
+      debug(f"EasyOCR detector loaded in {time.perf_counter() - start:.2f}s.")
+  return _reader
+
+def _warm_up():
+  try:
+    get_reader(detector=False)
+    get_reader(detector=True)
+  except Exception as e:
+    info(f"OCR warm up failed, it will be retried on first use: {e}")
+
+def warm_up_reader():
+  """Loads the models on a background thread so the first turn doesn't wait on them."""
+  if _reader is not None and _reader_has_detector:
+    return
+  threading.Thread(target=_warm_up, name="ocr-warm-up", daemon=True).start()
+
+@profiler.timed("ocr")
+@result_cache.memoize()
 def extract_text(pil_img: Image.Image, use_recognize=False, allowlist=None, threshold=None) -> str:
   img_np = np.array(pil_img)
   if allowlist is None:
-    allowlist = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-!.,'#? "
+    allowlist = DEFAULT_ALLOWLIST
   if use_recognize:
     if threshold is not None:
-      result = reader.recognize(img_np, allowlist=allowlist, text_threshold=threshold)
+      result = get_reader(detector=False).recognize(img_np, allowlist=allowlist, text_threshold=threshold)
     else:
-      result = reader.recognize(img_np, allowlist=allowlist)
+      result = get_reader(detector=False).recognize(img_np, allowlist=allowlist)
   else:
     if threshold is not None:
-      result = reader.readtext(img_np, allowlist=allowlist, text_threshold=threshold)
+      result = get_reader().readtext(img_np, allowlist=allowlist, text_threshold=threshold)
     else:
-      result = reader.readtext(img_np, allowlist=allowlist)
+      result = get_reader().readtext(img_np, allowlist=allowlist)
   texts = sort_ocr_result(result)
   return texts
 
+@profiler.timed("ocr")
+@result_cache.memoize()
 def extract_number(pil_img: Image.Image, allowlist="0123456789", threshold=0.8) -> int:
   img_np = np.array(pil_img)
-  result = reader.readtext(img_np, allowlist=allowlist, text_threshold=threshold)
+  result = get_reader().readtext(img_np, allowlist=allowlist, text_threshold=threshold)
   texts = [item[1] for item in sorted(result, key=lambda x: x[0][0][0])]
   joined_text = "".join(texts)
 
@@ -35,12 +80,86 @@ def extract_number(pil_img: Image.Image, allowlist="0123456789", threshold=0.8)
     return int(digits)
   return -1
 
+@profiler.timed("ocr")
+@result_cache.memoize()
 def extract_allowed_text(pil_img: Image.Image, allowlist="0123456789") -> int:
   img_np = np.array(pil_img)
-  result = reader.readtext(img_np, allowlist=allowlist)
+  result = get_reader().readtext(img_np, allowlist=allowlist)
   texts = [item[1] for item in sorted(result, key=lambda x: x[0][0][0])]
   return " ".join(texts)
 
+# blank rows between crops on the batch canvas, the boxes never include them
+BATCH_PADDING = 8
+BATCH_SIZE = 16
+# recognize() always returns a guess, anything below this is treated as unread so callers fall back to readtext
+BATCH_MIN_CONFIDENCE = 0.4
+
+def _to_grey(img):
+  img = np.asarray(img)
+  if img.ndim == 2:
+    return img
+  # easyocr reads 3 channel arrays as BGR, do the same so batched and single results agree
+  if img.shape[2] == 4:
+    return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+  return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def recognize_batch(images, allowlists):
+  """Recognition only OCR for fixed regions. Crops sharing an allowlist are stacked on one canvas
+  and read in a single recognizer call. Returns (text, confidence) per image in input order."""
+  results = [("", 0.0)] * len(images)
+  groups = defaultdict(list)
+  for i, allowlist in enumerate(allowlists):
+    image = np.asarray(images[i])
+    if image.size == 0:
+      continue
+    groups[allowlist].append(i)
+  if not groups:
+    return results
+
+  reader = get_reader(detector=False)
+  for allowlist, indices in groups.items():
+    greys = [_to_grey(images[i]) for i in indices]
+    width = max(grey.shape[1] for grey in greys)
+    height = sum(grey.shape[0] for grey in greys) + BATCH_PADDING * (len(greys) + 1)
+    canvas = np.zeros((height, width), dtype=np.uint8)
+    boxes = []
+    index_by_top = {}
+    y = BATCH_PADDING
+    for i, grey in zip(indices, greys):
+      h, w = grey.shape[:2]
+      canvas[y:y+h, 0:w] = grey
+      # easyocr boxes are x_min, x_max, y_min, y_max
+      boxes.append([0, w, y, y + h])
+      index_by_top[y] = i
+      y += h + BATCH_PADDING
+    ocr_results = reader.recognize(canvas, horizontal_list=boxes, free_list=[], allowlist=allowlist, batch_size=BATCH_SIZE, detail=1)
+    # easyocr sorts the crops by their top edge, map back through it instead of trusting the order
+    for box, text, confidence in ocr_results:
+      i = index_by_top.get(int(box[0][1]))
+      if i is not None:
+        results[i] = (text, float(confidence))
+  return results
+
+@profiler.timed("ocr")
+def extract_text_batch(images, allowlist=None, min_confidence=BATCH_MIN_CONFIDENCE) -> list[str]:
+  """Like extract_text for a list of crops. allowlist can be one string or one per crop, unread crops come back as ""."""
+  if allowlist is None:
+    allowlist = DEFAULT_ALLOWLIST
+  allowlists = [allowlist] * len(images) if isinstance(allowlist, str) else allowlist
+  texts = []
+  for text, confidence in recognize_batch(images, allowlists):
+    texts.append(text.strip() if confidence >= min_confidence else "")
+  debug(f"OCR batch of {len(images)}: {texts}")
+  return texts
+
+@profiler.timed("ocr")
+def extract_number_batch(images, allowlist="0123456789", min_confidence=BATCH_MIN_CONFIDENCE) -> list[int]:
+  numbers = []
+  for text in extract_text_batch(images, allowlist=allowlist, min_confidence=min_confidence):
+    digits = re.sub(r"[^\d]", "", text)
+    numbers.append(int(digits) if digits else -1)
+  return numbers
+
 def sort_ocr_result(results):
   sorted_results = sorted(results, key=lambda x: x[0][0][1])
   if len(sorted_results) == 0:
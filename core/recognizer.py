@@ -4,6 +4,8 @@ from PIL import ImageGrab, ImageStat, Image
 
 from utils.log import info, warning, error, debug
 import utils.device_action_wrapper as device_action
+from utils.device_action_wrapper import deduplicate_boxes
+import utils.template_registry as template_registry
 from utils.log import debug_window
 
 '''def match_template(template_path, region=None, threshold=0.85):
@@ -49,15 +51,6 @@ def multi_match_templates(templates, screen=None, threshold=0.85):
     results[name] = boxes
   return results
 '''
-def deduplicate_boxes(boxes, min_dist=5):
-  filtered = []
-  for x, y, w, h in boxes:
-    cx, cy = x + w // 2, y + h // 2
-    if all(abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
-        for fx, fy, fw, fh in filtered):
-      filtered.append((x, y, w, h))
-  return filtered
-
 def is_btn_active(region, treshold = 150):
   screenshot = device_action.screenshot(region_xywh=region)
   grayscale = screenshot.convert("L")
@@ -108,7 +101,7 @@ def closest_color(color_dict, target_color):
   return closest_name
 
 def compare_brightness(template_path: str, other: np.ndarray, brightness_diff_threshold=0.025):
-  reference_img = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+  reference_img = template_registry.get_template(template_path, grayscale=True)
   reference_brightness = np.mean(reference_img)
   other_gray = cv2.cvtColor(other, cv2.COLOR_BGR2GRAY)
   region_brightness = np.mean(other_gray)
@@ -0,0 +1,128 @@
+# recognizes screens the lobby loop has seen before from a tiny signature of the frame
+# a screen is learned the first time a full template scan identifies it, after that the templates ahead of
+# the one it was identified by are scanned and that one is only matched around the spot it was found
+import time
+
+import cv2
+import numpy as np
+
+import utils.device_action_wrapper as device_action
+from utils.log import debug
+
+# gradient signature of a SIGNATURE_SIZE grayscale thumbnail, one bit per horizontally adjacent pair
+SIGNATURE_SIZE = (33, 32)
+SIGNATURE_BITS = (SIGNATURE_SIZE[0] - 1) * SIGNATURE_SIZE[1]
+# nearest known screen has to be within this many differing bits, animations move a few dozen
+MAX_DISTANCE = 48
+# learned screens per template group, the oldest is forgotten first
+MAX_ENTRIES = 256
+# pixels around the learned match that the verifying match searches
+LOCALIZE_MARGIN = 24
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+# group -> {"signatures": uint8 array, "labels": [...], "boxes": [...]}
+_tables = {}
+
+def _empty_stats():
+  return {"known": 0, "unknown": 0, "rejected": 0, "classify_ms": 0.0, "scan_ms": 0.0}
+
+turn_stats = _empty_stats()
+total_stats = _empty_stats()
+
+def signature(image):
+  """Packed bits of whether each thumbnail pixel is brighter than its right neighbour."""
+  gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+  thumbnail = cv2.resize(gray, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+  return np.packbits(thumbnail[:, 1:] > thumbnail[:, :-1])
+
+def _table(group):
+  table = _tables.get(group)
+  if table is None:
+    table = _tables[group] = {"signatures": np.empty((0, SIGNATURE_BITS // 8), dtype=np.uint8), "labels": [], "boxes": []}
+  return table
+
+def nearest(group, image_signature):
+  """Returns (index, distance) of the closest learned screen, or (None, None) for an empty table."""
+  table = _table(group)
+  if not table["labels"]:
+    return None, None
+  distances = _POPCOUNT[np.bitwise_xor(table["signatures"], image_signature)].sum(axis=1)
+  index = int(distances.argmin())
+  return index, int(distances[index])
+
+def learn(group, image_signature, label, box):
+  table = _table(group)
+  table["signatures"] = np.vstack([table["signatures"], image_signature])[-MAX_ENTRIES:]
+  table["labels"] = (table["labels"] + [label])[-MAX_ENTRIES:]
+  table["boxes"] = (table["boxes"] + [box])[-MAX_ENTRIES:]
+
+def forget(group, index):
+  table = _table(group)
+  table["signatures"] = np.delete(table["signatures"], index, axis=0)
+  del table["labels"][index]
+  del table["boxes"][index]
+
+def _localized_region(box, region_ltrb):
+  x, y, w, h = box
+  return (max(region_ltrb[0], x - LOCALIZE_MARGIN), max(region_ltrb[1], y - LOCALIZE_MARGIN),
+          min(region_ltrb[2], x + w + LOCALIZE_MARGIN), min(region_ltrb[3], y + h + LOCALIZE_MARGIN))
+
+def _count(key, ms_key=None, ms=0.0):
+  for stats in (turn_stats, total_stats):
+    stats[key] += 1
+    if ms_key:
+      stats[ms_key] += ms
+
+def classify(templates, region_ltrb, threshold=0.85, group="lobby", template_scaling=1.0):
+  """Same result as match_cached_templates with stop_after_first_match, for screens seen before
+  at the cost of a downsample, a table lookup, the templates ahead of the learned one and one small match."""
+  start = time.perf_counter()
+  image_signature = signature(device_action.screenshot(region_ltrb=region_ltrb))
+  index, distance = nearest(group, image_signature)
+  if index is not None and distance <= MAX_DISTANCE:
+    table = _table(group)
+    label = table["labels"][index]
+    # a small overlay (next, inspiration, ...) barely moves the signature, the templates first in line still get their full scan
+    names = list(templates)
+    ahead = {name: templates[name] for name in names[:names.index(label)]}
+    matches = {}
+    if ahead:
+      matches = device_action.match_cached_templates(ahead, region_ltrb=region_ltrb, threshold=threshold,
+                                                    template_scaling=template_scaling, stop_after_first_match=True)
+      for name, boxes in matches.items():
+        if boxes:
+          debug(f"Screen classifier: {group} looked like {label} but {name} is in front of it.")
+          learn(group, image_signature, name, boxes[0])
+          _count("unknown", "scan_ms", (time.perf_counter() - start) * 1000)
+          return matches
+    matches.update(device_action.match_cached_templates({label: templates[label]}, region_ltrb=_localized_region(table["boxes"][index], region_ltrb),
+                                                        threshold=threshold, template_scaling=template_scaling))
+    if matches[label]:
+      _count("known", "classify_ms", (time.perf_counter() - start) * 1000)
+      return matches
+    # signature looked familiar but the button isn't there, it was a bad example to keep
+    debug(f"Screen classifier: {group} looked like {label} at distance {distance} but it didn't match.")
+    forget(group, index)
+    _count("rejected")
+
+  matches = device_action.match_cached_templates(templates, region_ltrb=region_ltrb, threshold=threshold,
+                                                template_scaling=template_scaling, stop_after_first_match=True)
+  for label, boxes in matches.items():
+    if boxes:
+      learn(group, image_signature, label, boxes[0])
+      break
+  _count("unknown", "scan_ms", (time.perf_counter() - start) * 1000)
+  return matches
+
+def log_stats():
+  global turn_stats
+  stats, turn_stats = turn_stats, _empty_stats()
+  known = stats["known"]
+  unknown = stats["unknown"]
+  if known + unknown == 0:
+    return stats
+  learned = ", ".join(f"{group}={len(table['labels'])}" for group, table in _tables.items())
+  debug(f"Screen classifier: {known} known screens ({stats['classify_ms'] / max(known, 1):.1f} ms each), "
+        f"{unknown} full scans ({stats['scan_ms'] / max(unknown, 1):.1f} ms each), {stats['rejected']} rejected. Learned {learned}.")
+  return stats
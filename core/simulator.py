@@ -0,0 +1,513 @@
+# headless careers for comparing training_strategy configs offline
+# a Career stands in for the screen: it hands the real Strategy and training functions the TurnState
+# collect_main_state/collect_training_state would have read, then plays out the action they picked.
+# the game model is rough on purpose, it's there to rank configs against each other, not to predict a career.
+# a career runs at about 10 per second per core, not thousands: every turn goes through the real Strategy and training
+# functions, which are what is under test and stay per career. only the dice and the gains are numpy arrays.
+# tens of thousands of careers are a few minutes on a laptop's cores.
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import core.config as config
+import utils.constants as constants
+from core.actions import Action
+from core.state import filter_race_list, filter_race_schedule
+from core.strategies import Strategy
+from utils.shared import TurnState, TrainingResult
+
+TRAININGS = ("spd", "sta", "pwr", "guts", "wit")
+STATS = TRAININGS + ("sp",)
+DEFAULT_DECK = ("spd", "spd", "sta", "pwr", "wit", "friend")
+DEFAULT_APTITUDES = {
+  "surface_turf": "a", "surface_dirt": "g",
+  "distance_sprint": "c", "distance_mile": "a", "distance_medium": "a", "distance_long": "b",
+  "style_front": "c", "style_pace": "a", "style_late": "a", "style_end": "c",
+}
+
+# the date reads "Pre-Debut" for this many turns, the finale is a training turn before each of its races
+PRE_DEBUT_TURNS = 11
+FINALE_RACES = 3
+START_STATS = {"spd": 90, "sta": 90, "pwr": 90, "guts": 90, "wit": 90, "sp": 120}
+MAX_ENERGY = 100
+
+# gains of a level 1 training without supports, rows in TRAININGS order, columns in STATS order
+BASE_GAINS = np.array([
+  [15, 0, 6, 0, 0, 3],
+  [0, 14, 0, 6, 0, 3],
+  [0, 6, 13, 0, 0, 3],
+  [5, 0, 5, 12, 0, 3],
+  [3, 0, 0, 0, 13, 5],
+], dtype=np.float64)
+# every level adds one to each stat a training raises, sp aside
+LEVEL_GAINS = (BASE_GAINS > 0) & (np.arange(len(STATS)) < len(TRAININGS))
+USES_PER_LEVEL = 4
+MAX_TRAINING_LEVEL = 5
+TRAINING_ENERGY = np.array([-21, -19, -20, -22, 5])
+SUPPORT_MULTIPLIER = 0.15
+# per rainbow friend on its own training
+RAINBOW_MULTIPLIER = 1.25
+MOOD_MULTIPLIERS = {"AWFUL": 0.8, "BAD": 0.9, "NORMAL": 1.0, "GOOD": 1.1, "GREAT": 1.2}
+MOODS = ("AWFUL", "BAD", "NORMAL", "GOOD", "GREAT")
+
+# failure starts below this much energy and climbs FAILURE_SLOPE per point missing
+FAILURE_ENERGY = np.array([50, 50, 50, 50, 30])
+FAILURE_SLOPE = 1.8
+FAILED_TRAINING_STAT_LOSS = 5
+PRACTICE_POOR_FAILURE = 10
+
+# bond a card needs for each bar color, yellow and max count as rainbows
+FRIENDSHIP_THRESHOLDS = (20, 60, 80, 100)
+FRIENDSHIP_COLORS = ("gray", "blue", "green", "yellow", "max")
+BOND_PER_TRAINING = 7
+BOND_PER_HINT = 5
+# where a card shows up: its own training is this much likelier than another, sitting out is ABSENT_WEIGHT
+SPECIALTY_WEIGHT = 3.0
+ABSENT_WEIGHT = 1.5
+HINT_CHANCE = 0.1
+
+REST_ENERGY = (30, 50, 70)
+REST_ENERGY_CHANCES = (0.25, 0.5, 0.25)
+DATE_EVENT_CHANCE = 0.15
+DATE_ENERGY = 10
+INFIRMARY_ENERGY = 0
+
+# random events at the end of every turn
+MOOD_UP_CHANCE = 0.05
+MOOD_DOWN_CHANCE = 0.04
+STATUS_EFFECT_CHANCE = 0.02
+# chance per uncured status effect of costing a mood level
+STATUS_MOOD_CHANCE = 0.1
+# the ones the infirmary can cure
+STATUS_EFFECT_NAMES = [name for name, effect in constants.BAD_STATUS_EFFECTS.items() if effect["Severity"] > 0]
+
+# unity cup: cards flagged for a unity training, how many of those are unfilled gauges, spirit explosions per training
+UNITY_TRAINING_CHANCE = 0.3
+UNITY_GAUGE_CHANCE = 0.5
+SPIRIT_EXPLOSION_CHANCE = 0.05
+GAUGE_FILL_GAINS = 2
+SPIRIT_EXPLOSION_GAINS = 8
+SPIRIT_EXPLOSION_ENERGY = 5
+
+# a race is a coin flip at par total stats (sp aside), RACE_SPREAD points either side moves the odds by e
+RACE_PAR = {"Junior": 600, "Classic": 1300, "Senior": 2200, "Finale": 2800}
+GRADE_PAR = {"G1": 200, "G2": 100, "G3": 0}
+RACE_SPREAD = 150
+RACE_ENERGY = -15
+# (stat, sp) for a win, paid to one random stat
+RACE_REWARDS = {"G1": (10, 45), "G2": (8, 40), "G3": (8, 35)}
+# share of the win's fans and rewards for winning, placing, and neither
+PLACE_REWARDS = (1.0, 0.4, 0.1)
+PLACE_CHANCE = 0.6
+CONSECUTIVE_RACE_LIMIT = 3
+CONSECUTIVE_RACE_MOOD_CHANCE = 0.25
+FINALE_RACE = {"name": "URA Finale", "grade": "G1", "fans": {"gained": 10000}}
+
+# fans needed by the end of these dates, the goal shows as "Achieved" once met
+FAN_GOALS = {
+  "Junior Year Late Dec": 3500,
+  "Classic Year Late Jun": 10000,
+  "Classic Year Late Dec": 20000,
+  "Senior Year Late Dec": 45000,
+}
+
+def career_dates():
+  timeline = constants.TIMELINE
+  return [timeline[0]] * PRE_DEBUT_TURNS + timeline[1:-1] + [timeline[-1]] * (2 * FINALE_RACES)
+
+class Career:
+  """
+  One simulated career, the state provider of a SimulatedStrategy.
+  All the dice of the career are rolled up front as arrays, turn t only reads row t.
+  """
+  def __init__(self, seed, deck=DEFAULT_DECK, aptitudes=None, scenario=""):
+    self.seed = seed
+    self.deck = tuple(deck)
+    self.aptitudes = dict(aptitudes or DEFAULT_APTITUDES)
+    self.scenario = scenario
+    self.dates = career_dates()
+    self.turn_index = 0
+
+    self.stats = np.array([START_STATS[stat] for stat in STATS], dtype=np.float64)
+    self.energy = MAX_ENERGY
+    self.mood = MOODS.index("NORMAL")
+    self.bonds = np.zeros(len(self.deck))
+    self.training_uses = np.zeros(len(TRAININGS), dtype=np.int64)
+    self.status_effects = []
+    self.fans = 0
+    self.consecutive_races = 0
+    self.counts = dict.fromkeys(("trainings", "failed_trainings", "rests", "recreations", "infirmary", "races", "races_won",
+                                 "skipped_turns", "goals_missed"), 0)
+    self._roll(np.random.default_rng(seed))
+
+  def _roll(self, rng):
+    turns, cards = len(self.dates), len(self.deck)
+    # column len(TRAININGS) is sitting the turn out
+    weights = np.ones((cards, len(TRAININGS) + 1))
+    weights[:, -1] = ABSENT_WEIGHT
+    for i, card_type in enumerate(self.deck):
+      if card_type in TRAININGS:
+        weights[i, TRAININGS.index(card_type)] = SPECIALTY_WEIGHT
+    cumulative = np.cumsum(weights / weights.sum(axis=1, keepdims=True), axis=1)
+    self.placements = (rng.random((turns, cards))[:, :, None] > cumulative[None, :, :-1]).sum(axis=2)
+    self.hints = rng.random((turns, cards)) < HINT_CHANCE
+    self.unity_cards = rng.random((turns, cards)) < UNITY_TRAINING_CHANCE
+    self.unity_gauges = rng.random((turns, cards)) < UNITY_GAUGE_CHANCE
+    self.spirit_explosions = rng.random((turns, len(TRAININGS))) < SPIRIT_EXPLOSION_CHANCE
+    self.failure_rolls = rng.random(turns) * 100
+    self.rest_energy = rng.choice(REST_ENERGY, size=turns, p=REST_ENERGY_CHANCES)
+    self.date_events = rng.random(turns) < DATE_EVENT_CHANCE
+    self.mood_rolls = rng.random(turns)
+    self.status_rolls = rng.random((turns, 2))
+    self.race_rolls = rng.random(turns)
+    self.race_stats = rng.integers(len(TRAININGS), size=turns)
+    self.event_rolls = rng.random((turns, 4))
+
+  @property
+  def finished(self):
+    return self.turn_index >= len(self.dates)
+
+  @property
+  def date(self):
+    return self.dates[self.turn_index]
+
+  def _turn_text(self):
+    """What get_turn reads: "Race Day" on finale races, otherwise the turns left to the next goal."""
+    finale_start = len(self.dates) - 2 * FINALE_RACES
+    if self.turn_index >= finale_start:
+      if (self.turn_index - finale_start) % 2:
+        return "Race Day"
+      return 1
+    for i in range(self.turn_index, len(self.dates)):
+      if self.dates[i] in FAN_GOALS:
+        return i - self.turn_index + 1
+    return finale_start - self.turn_index
+
+  def _criteria(self):
+    for i in range(self.turn_index, len(self.dates)):
+      goal = FAN_GOALS.get(self.dates[i])
+      if goal is not None:
+        return "Achieved" if self.fans >= goal else f"Gain {goal} fans"
+    return "Win the URA Finale"
+
+  def start(self):
+    """Races and the race schedule get filtered on the career's aptitudes like after the first full stats read."""
+    constants.SCENARIO_NAME = self.scenario
+    state = TurnState(aptitudes=self.aptitudes)
+    filter_race_list(state)
+    filter_race_schedule(state)
+
+  def main_state(self):
+    mood = MOODS[self.mood]
+    mood_index = constants.MOOD_LIST.index(mood)
+    return TurnState(
+      current_mood=mood,
+      mood_difference=mood_index - constants.MOOD_LIST.index(config.MINIMUM_MOOD),
+      mood_difference_junior_year=mood_index - constants.MOOD_LIST.index(config.MINIMUM_MOOD_JUNIOR_YEAR),
+      turn=self._turn_text(),
+      year=self.date,
+      criteria=self._criteria(),
+      current_stats={stat: int(value) for stat, value in zip(STATS, self.stats)},
+      energy_level=self.energy,
+      max_energy=MAX_ENERGY,
+      date_event_available=bool(self.date_events[self.turn_index]),
+      aptitudes=self.aptitudes,
+    )
+
+  def _failure(self):
+    failure = np.clip(np.round((FAILURE_ENERGY - self.energy) * FAILURE_SLOPE), 0, 100)
+    if "Practice Poor" in self.status_effects:
+      failure = np.minimum(failure + PRACTICE_POOR_FAILURE, 100)
+    return failure.astype(np.int64)
+
+  def _friendship_levels(self):
+    return np.digitize(self.bonds, FRIENDSHIP_THRESHOLDS)
+
+  def _gains(self):
+    """Stat gains of every training this turn, rows in TRAININGS order."""
+    t = self.turn_index
+    placed = self.placements[t]
+    present = placed < len(TRAININGS)
+    supports = np.bincount(placed[present], minlength=len(TRAININGS))
+    rainbow = present & (self._friendship_levels() >= FRIENDSHIP_COLORS.index("yellow"))
+    own_rainbows = np.zeros(len(TRAININGS))
+    for i, card_type in enumerate(self.deck):
+      if rainbow[i] and card_type == TRAININGS[placed[i]]:
+        own_rainbows[placed[i]] += 1
+    levels = np.minimum(self.training_uses // USES_PER_LEVEL + 1, MAX_TRAINING_LEVEL)
+    multiplier = (1 + SUPPORT_MULTIPLIER * supports) * RAINBOW_MULTIPLIER ** own_rainbows * MOOD_MULTIPLIERS[MOODS[self.mood]]
+    return np.floor((BASE_GAINS + (levels - 1)[:, None] * LEVEL_GAINS) * multiplier[:, None])
+
+  def training_state(self, state, training_function_name):
+    """collect_training_state: a TrainingResult per training, stat gains only for the strategies that read them."""
+    t = self.turn_index
+    check_stat_gains = training_function_name in ("meta_training", "most_stat_gain")
+    failure = self._failure()
+    gains = self._gains()
+    levels = self._friendship_levels()
+    training_results = {}
+    for i, name in enumerate(TRAININGS):
+      training = TrainingResult(failure=int(failure[i]))
+      if check_stat_gains:
+        training.stat_gains = {stat: int(gain) for stat, gain in zip(STATS, gains[i]) if gain > 0}
+      for card in np.flatnonzero(self.placements[t] == i):
+        friend_level = FRIENDSHIP_COLORS[levels[card]]
+        support_counts = training.add_support(self.deck[card])
+        support_counts.supports += 1
+        training.total_supports += 1
+        support_counts.friendship_levels[friend_level] += 1
+        training.total_friendship_levels[friend_level] += 1
+        if self.hints[t, card]:
+          support_counts.hints += 1
+          training.total_hints += 1
+          training.hints_per_friend_level[friend_level] += 1
+        if self.scenario == "unity" and self.unity_cards[t, card]:
+          training.unity_trainings += 1
+          if self.unity_gauges[t, card]:
+            training.unity_gauge_fills += 1
+      if self.scenario == "unity" and self.spirit_explosions[t, i]:
+        training.unity_spirit_explosions += 1
+      training_results[name] = training
+    state.training_results = training_results
+    return state
+
+  def _add_energy(self, amount):
+    self.energy = int(min(MAX_ENERGY, max(0, self.energy + amount)))
+
+  def _add_mood(self, amount):
+    if amount > 0 and "Migraine" in self.status_effects:
+      return
+    self.mood = min(len(MOODS) - 1, max(0, self.mood + amount))
+
+  def run(self, action):
+    """Action.run for the model: plays out action.func, False where the game would have failed it too."""
+    func = getattr(self, f"_{action.func}", None)
+    if func is None:
+      return False
+    return func(action.options)
+
+  def _do_training(self, options):
+    i = TRAININGS.index(options["training_name"])
+    t = self.turn_index
+    self.counts["trainings"] += 1
+    if self.failure_rolls[t] < self._failure()[i]:
+      self.counts["failed_trainings"] += 1
+      self.stats[i] = max(0, self.stats[i] - FAILED_TRAINING_STAT_LOSS)
+      self._add_mood(-1)
+      if self.event_rolls[t, 0] < 0.3 and "Practice Poor" not in self.status_effects:
+        self.status_effects.append("Practice Poor")
+      return True
+    self.stats += self._gains()[i]
+    self._add_energy(TRAINING_ENERGY[i])
+    on_training = self.placements[t] == i
+    self.bonds = np.minimum(100, self.bonds + on_training * (BOND_PER_TRAINING + self.hints[t] * BOND_PER_HINT))
+    self.training_uses[i] += 1
+    if self.scenario == "unity":
+      self.stats[i] += GAUGE_FILL_GAINS * np.count_nonzero(on_training & self.unity_cards[t] & self.unity_gauges[t])
+      if self.spirit_explosions[t, i]:
+        self.stats[i] += SPIRIT_EXPLOSION_GAINS
+        self._add_energy(SPIRIT_EXPLOSION_ENERGY)
+    return True
+
+  def _do_rest(self, options):
+    self.counts["rests"] += 1
+    self._add_energy(self.rest_energy[self.turn_index])
+    return True
+
+  def _do_recreation(self, options):
+    self.counts["recreations"] += 1
+    self._add_mood(1)
+    if self.date_events[self.turn_index]:
+      self._add_energy(DATE_ENERGY)
+      friends = np.array([card_type == "friend" for card_type in self.deck])
+      self.bonds = np.minimum(100, self.bonds + friends * BOND_PER_TRAINING)
+    return True
+
+  def _do_infirmary(self, options):
+    if not self.status_effects:
+      return False
+    self.counts["infirmary"] += 1
+    self.status_effects = []
+    self._add_energy(INFIRMARY_ENERGY)
+    return True
+
+  def _do_race(self, options):
+    if options.get("is_race_day"):
+      race = FINALE_RACE
+    else:
+      races = constants.RACES.get(self.date, [])
+      race_name = options.get("race_name", "any")
+      race = next((race for race in races if race["name"] == race_name), None)
+      if race is None and races and race_name == "any":
+        race = max(races, key=lambda race: race["fans"]["gained"])
+      if race is None:
+        return False
+    t = self.turn_index
+    self.counts["races"] += 1
+    par = RACE_PAR[self.date.split()[0]] + GRADE_PAR[race["grade"]]
+    win_chance = 1 / (1 + math.exp((par - self.stats[:len(TRAININGS)].sum()) / RACE_SPREAD))
+    if self.race_rolls[t] < win_chance:
+      place = 0
+      self.counts["races_won"] += 1
+    elif self.event_rolls[t, 1] < PLACE_CHANCE:
+      place = 1
+    else:
+      place = 2
+    stat_reward, sp_reward = RACE_REWARDS[race["grade"]]
+    self.stats[self.race_stats[t]] += round(stat_reward * PLACE_REWARDS[place])
+    self.stats[-1] += round(sp_reward * PLACE_REWARDS[place])
+    self.fans += round(race["fans"]["gained"] * PLACE_REWARDS[place])
+    self._add_energy(RACE_ENERGY)
+    self.consecutive_races += 1
+    if self.consecutive_races > CONSECUTIVE_RACE_LIMIT and self.event_rolls[t, 2] < CONSECUTIVE_RACE_MOOD_CHANCE:
+      self._add_mood(-1)
+    return True
+
+  def end_turn(self, action):
+    t = self.turn_index
+    if action.func != "do_race":
+      self.consecutive_races = 0
+    goal = FAN_GOALS.get(self.date)
+    if goal is not None and self.fans < goal:
+      self.counts["goals_missed"] += 1
+    if self.mood_rolls[t] < MOOD_UP_CHANCE:
+      self._add_mood(1)
+    elif self.mood_rolls[t] > 1 - MOOD_DOWN_CHANCE:
+      self._add_mood(-1)
+    for _ in self.status_effects:
+      if self.event_rolls[t, 3] < STATUS_MOOD_CHANCE:
+        self._add_mood(-1)
+        break
+    if self.status_rolls[t, 0] < STATUS_EFFECT_CHANCE:
+      name = STATUS_EFFECT_NAMES[int(self.status_rolls[t, 1] * len(STATUS_EFFECT_NAMES))]
+      if name not in self.status_effects:
+        self.status_effects.append(name)
+    self.turn_index += 1
+
+  def result(self):
+    stats = {stat: int(value) for stat, value in zip(STATS, self.stats)}
+    return {
+      "seed": self.seed,
+      **stats,
+      "total_stats": sum(stats[stat] for stat in TRAININGS),
+      "fans": self.fans,
+      **self.counts,
+    }
+
+class SimulatedStrategy(Strategy):
+  """The real Strategy, with the two screen reads of check_infirmary answered by a Career."""
+  def __init__(self, career):
+    super().__init__()
+    self.career = career
+
+  def infirmary_available(self):
+    return bool(self.career.status_effects)
+
+  def read_status_effects(self):
+    names = list(self.career.status_effects)
+    return names, sum(constants.BAD_STATUS_EFFECTS[name]["Severity"] for name in names)
+
+def play_turn(career, strategy):
+  """One pass of career_lobby's decision path, from the race day check to the action fallbacks."""
+  state = career.main_state()
+  action = Action()
+  if state["turn"] == "Race Day":
+    action.func = "do_race"
+    action["is_race_day"] = True
+    action["year"] = state["year"]
+    career.run(action)
+    return action
+
+  # mission races aren't part of the model
+  action = strategy.check_scheduled_races(state, action)
+  if "race_name" in action.options:
+    action.func = "do_race"
+    if career.run(action):
+      return action
+    action.func = None
+    action.options.pop("race_name", None)
+
+  if "Achieved" not in state["criteria"]:
+    action = strategy.decide_race_for_goal(state, action)
+    if action.func == "do_race":
+      if career.run(action):
+        return action
+      action.func = None
+
+  training_function_name = strategy.get_training_template(state)["training_function"]
+  state = career.training_state(state, training_function_name)
+  action = strategy.decide(state, action)
+  if action.func in ("no_action", "skip_turn"):
+    # the bot would read the turn again, the model has nothing new to show it
+    career.counts["skipped_turns"] += 1
+  elif not career.run(action):
+    if action.available_actions:
+      action.available_actions.pop(0)
+    for function_name in action.available_actions:
+      action.func = function_name
+      if career.run(action):
+        break
+    else:
+      career.counts["skipped_turns"] += 1
+  return action
+
+def play_career(seed, **career_options):
+  career = Career(seed, **career_options)
+  career.start()
+  strategy = SimulatedStrategy(career)
+  while not career.finished:
+    action = play_turn(career, strategy)
+    career.end_turn(action)
+  return career.result()
+
+_config_path = None
+
+def load_simulation_config(path):
+  """Points core.config at another config file, workers keep the last one loaded."""
+  global _config_path
+  if path == _config_path:
+    return
+  def load_config():
+    with open(path, "r", encoding="utf-8") as file:
+      return json.load(file)
+  config.load_config = load_config
+  config.reload_config()
+  _config_path = path
+
+def run_careers(config_path, seeds, career_options=None):
+  load_simulation_config(config_path)
+  return [play_career(seed, **(career_options or {})) for seed in seeds]
+
+def simulate(config_paths, careers, seed=0, workers=None, chunk_size=25, career_options=None):
+  """
+  Plays the same seeds under every config, so configs are compared on the same dice.
+  Returns config path -> list of career results, and the careers per second it ran at.
+  """
+  seeds = range(seed, seed + careers)
+  chunks = [seeds[i:i + chunk_size] for i in range(0, careers, chunk_size)]
+  results = {path: [] for path in config_paths}
+  start = time.perf_counter()
+  if workers == 1:
+    for path in config_paths:
+      for chunk in chunks:
+        results[path].extend(run_careers(path, chunk, career_options))
+  else:
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+      futures = [(path, pool.submit(run_careers, path, chunk, career_options)) for path in config_paths for chunk in chunks]
+      for path, future in futures:
+        results[path].extend(future.result())
+  elapsed = time.perf_counter() - start
+  return results, careers * len(config_paths) / elapsed
+
+SUMMARY_METRICS = ("total_stats",) + STATS + ("fans", "races", "races_won", "trainings", "failed_trainings", "rests",
+                                              "recreations", "infirmary", "skipped_turns", "goals_missed")
+
+def summarize(career_results):
+  """metric -> (mean, std, 10th, 50th, 90th percentile) over the careers."""
+  table = np.array([[result[metric] for metric in SUMMARY_METRICS] for result in career_results], dtype=np.float64)
+  percentiles = np.percentile(table, (10, 50, 90), axis=0)
+  return {metric: (table[:, i].mean(), table[:, i].std(), *percentiles[:, i]) for i, metric in enumerate(SUMMARY_METRICS)}
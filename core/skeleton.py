@@ -21,18 +21,22 @@ import core.bot as bot
 from utils.log import info, warning, error, debug, log_encoded, args, record_turn, user_info_block, VERSION
 from utils.device_action_wrapper import BotStopException
 import utils.device_action_wrapper as device_action
+import utils.template_registry as template_registry
+import utils.replay_actions as replay_actions
+import utils.result_cache as result_cache
+import core.screen_classifier as screen_classifier
+import utils.profiler as profiler
+import utils.flight_recorder as flight_recorder
 
 from core.strategies import Strategy
 from utils.adb_actions import init_adb
 
 def cache_templates(templates):
   cache={}
-  image_read_color = cv2.IMREAD_COLOR
   for name, path in templates.items():
-    img = cv2.imread(path, image_read_color)
-    img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    img = template_registry.get_template(path)
     if img is None:
-      warning(f"Image doesn't exist: {img}")
+      warning(f"Image doesn't exist: {path}")
       continue
     cache[name] = img
   return cache
@@ -53,9 +57,10 @@ templates = {
 
 cached_templates = cache_templates(templates)
 
+# in the order the lobby acts on them, the classifier stops at the first match
 unity_templates = {
-  "close_btn": "assets/buttons/close_btn.png",
   "unity_cup_btn": "assets/unity/unity_cup_btn.png",
+  "close_btn": "assets/buttons/close_btn.png",
   "unity_banner_mid_screen": "assets/unity/unity_banner_mid_screen.png"
 }
 
@@ -97,11 +102,15 @@ def career_lobby(dry_run_turn=False):
   strategy = Strategy()
   init_adb()
   init_skill_py()
+  template_registry.preload_templates(constants.SUPPORT_ICONS)
+  template_registry.preload_templates(constants.MOOD_IMAGES)
+  template_registry.preload_templates(constants.APTITUDE_IMAGES)
+  profiler.start_career()
   try:
     while bot.is_bot_running:
       sleep(1)
-      device_action.flush_screenshot_cache()
-      screenshot = device_action.screenshot()
+      # always start the loop from a fresh frame, state collection below reuses it until an input happens
+      screenshot = device_action.screenshot(max_age_ms=0)
 
       if non_match_count > 20:
         info("Career lobby stuck, quitting.")
@@ -118,7 +127,8 @@ def career_lobby(dry_run_turn=False):
           unity_cup_function()
           continue
 
-      matches = device_action.match_cached_templates(cached_templates, region_ltrb=constants.GAME_WINDOW_BBOX, threshold=0.9, stop_after_first_match=True)
+      # screens seen before only get their own template matched, new ones get the full scan
+      matches = screen_classifier.classify(cached_templates, region_ltrb=constants.GAME_WINDOW_BBOX, threshold=0.9, group="lobby")
       def click_match(matches):
         if matches and len(matches) > 0:
           x, y, w, h = matches[0]
@@ -183,7 +193,7 @@ def career_lobby(dry_run_turn=False):
         continue
 
       if constants.SCENARIO_NAME == "unity":
-        unity_matches = device_action.match_cached_templates(cached_unity_templates, region_ltrb=constants.GAME_WINDOW_BBOX)
+        unity_matches = screen_classifier.classify(cached_unity_templates, region_ltrb=constants.GAME_WINDOW_BBOX, group="unity")
         if click_match(unity_matches.get("unity_cup_btn")):
           debug("Pressed unity cup.")
           unity_cup_function()
@@ -210,7 +220,6 @@ def career_lobby(dry_run_turn=False):
           info(f"Scenario detected: {scenario_name}, if this is not correct, please report this.")
           constants.SCENARIO_NAME = scenario_name
         non_match_count = 0
-      device_action.flush_screenshot_cache()
       debug(f"Bot version: {VERSION}")
 
       action = Action()
@@ -352,11 +361,24 @@ def career_lobby(dry_run_turn=False):
   except BotStopException as e:
     info(f"{e}")
     return
+  except Exception:
+    flight_recorder.dump_safely("exception")
+    raise
+  finally:
+    profiler.career_summary()
 
 def record_and_finalize_turn(state_obj, action):
   global last_state, action_count
   user_info_block(state_obj, last_state, action)
   record_turn(state_obj, last_state, action)
+  template_registry.log_template_stats()
+  device_action.log_capture_stats()
+  device_action.log_wait_stats()
+  result_cache.log_stats()
+  screen_classifier.log_stats()
+  profiler.end_turn(year=state_obj["year"], action=action.func)
+  if bot.use_replay:
+    replay_actions.mark_turn()
   last_state = state_obj
 
   action_count += 1
@@ -6,16 +6,17 @@ import time
 
 from utils.log import info, warning, error, debug, debug_window, args
 
-from utils.screenshot import enhanced_screenshot, enhance_image_for_ocr, binarize_between_colors, crop_after_plus_component, clean_noise, custom_grabcut
-from core.ocr import extract_text, extract_number, extract_allowed_text
+from utils.screenshot import enhanced_screenshot, enhance_image_for_ocr, binarize_between_colors, crop_after_plus_component, clean_noise, custom_grabcut, segment_between_colors, SEGMENT_MIN_COMPONENT_AREA
+from core.ocr import extract_text, extract_number, extract_allowed_text, extract_text_batch, extract_number_batch
 from core.recognizer import count_pixels_of_color, find_color_of_pixel, closest_color
-from utils.tools import click, sleep, get_secs, check_race_suitability, get_aptitude_index
+from utils.tools import click, sleep, settle, get_secs, check_race_suitability, get_aptitude_index
 import utils.device_action_wrapper as device_action
 
-from utils.shared import CleanDefaultDict
+from utils.shared import TurnState, TrainingResult
 import core.config as config
 import utils.constants as constants
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from math import floor
 
 aptitudes_cache = {}
@@ -23,39 +24,92 @@ def clear_aptitudes_cache():
   global aptitudes_cache
   aptitudes_cache = {}
 
+# recognizers are mostly opencv/torch work that releases the GIL
+STATE_WORKERS = 4
+_state_pool = None
+
+def get_state_pool():
+  global _state_pool
+  if _state_pool is None:
+    _state_pool = ThreadPoolExecutor(max_workers=STATE_WORKERS, thread_name_prefix="state")
+  return _state_pool
+
+def run_recognizers(tasks, frame):
+  """Runs read-only recognizers in parallel against one pinned frame. Returns results and per task ms."""
+  def timed(func):
+    def run():
+      with device_action.frame_scope(frame):
+        start = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - start) * 1000
+    return run
+
+  pool = get_state_pool()
+  futures = {name: pool.submit(timed(func)) for name, func in tasks.items()}
+  results, timings = {}, {}
+  for name, future in futures.items():
+    # exceptions, BotStopException included, surface here on the bot thread
+    results[name], timings[name] = future.result()
+  return results, timings
+
 def collect_main_state():
   global aptitudes_cache
   debug("Start state collection. Collecting stats.")
   #??? minimum_mood_junior_year = constants.MOOD_LIST.index(config.MINIMUM_MOOD_JUNIOR_YEAR)
+  start = time.perf_counter()
+
+  # everything here only reads the screen, anything that clicks runs after
+  tasks = {
+    "mood": get_mood,
+    "turn": lambda: get_turn(check_unity_banner=False),
+    "year": read_current_year,
+    "criteria": get_criteria,
+    "current_stats": lambda: get_current_stats("Race Day" if is_race_day() else None),
+    "energy": get_energy_level,
+    "date_event": lambda: device_action.locate("assets/ui/recreation_with.png"),
+  }
+  if config.DO_MISSION_RACES_IF_POSSIBLE:
+    tasks["race_mission"] = lambda: device_action.locate("assets/icons/race_mission_icon.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX)
+  if constants.SCENARIO_NAME == "unity":
+    tasks["unity_banner"] = unity_banner_pending
+  results, timings = run_recognizers(tasks, device_action.capture_frame())
+  if results.get("unity_banner"):
+    # the banner covers the screen we just read, wait for it and read everything again
+    debug(f"Waiting for 3 seconds to allow unity cup banner to pass.")
+    sleep(3)
+    device_action.flush_screenshot_cache()
+    del tasks["unity_banner"]
+    results, timings = run_recognizers(tasks, device_action.capture_frame())
+  debug("Main state timings: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in sorted(timings.items(), key=lambda item: -item[1])) + f", total {(time.perf_counter() - start) * 1000:.0f}ms")
 
-  state_object = CleanDefaultDict()
-  state_object["current_mood"] = get_mood()
+  state_object = TurnState()
+  state_object["current_mood"] = results["mood"]
   debug("Mood collection done.")
   mood_index = constants.MOOD_LIST.index(state_object["current_mood"])
   minimum_mood_index = constants.MOOD_LIST.index(config.MINIMUM_MOOD)
   minimum_mood_junior_year_index = constants.MOOD_LIST.index(config.MINIMUM_MOOD_JUNIOR_YEAR)
   state_object["mood_difference"] = mood_index - minimum_mood_index
   state_object["mood_difference_junior_year"] = mood_index - minimum_mood_junior_year_index
-  debug("Before turn collection.")
-  state_object["turn"] = get_turn()
-  debug("Before year collection.")
-  state_object["year"] = get_current_year()
-  debug("Before criteria collection.")
-  state_object["criteria"] = get_criteria()
-  debug("Before current stats collection.")
-  state_object["current_stats"] = get_current_stats(state_object["turn"])
-  energy_level, max_energy = get_energy_level()
+  state_object["turn"] = results["turn"]
+  year = results["year"]
+  if year is None:
+    # this one clicks through to the race screen, so it can't run in the pool
+    year = get_current_year_from_race_screen()
+  state_object["year"] = year
+  state_object["criteria"] = results["criteria"]
+  state_object["current_stats"] = results["current_stats"]
+  energy_level, max_energy = results["energy"]
   state_object["energy_level"] = energy_level
   state_object["max_energy"] = max_energy
 
   #find a better way to do this
-  if device_action.locate("assets/ui/recreation_with.png"):
+  if results["date_event"]:
     state_object["date_event_available"] = True
   else:
     state_object["date_event_available"] = False
 
   if config.DO_MISSION_RACES_IF_POSSIBLE:
-    if device_action.locate("assets/icons/race_mission_icon.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX):
+    if results["race_mission"]:
       state_object["race_mission_available"] = True
   # first init or inspiration.
   if aptitudes_cache and "Early Apr" not in state_object["year"]:
@@ -72,6 +126,39 @@ def collect_main_state():
   debug(f"Main state collection done.")
   return state_object
 
+def inspect_training(frame, year, check_stat_gains):
+  with device_action.frame_scope(frame, strict=True):
+    return get_training_data(year=year, check_stat_gains=check_stat_gains), get_support_card_data()
+
+def training_result(training_data, support_card_data):
+  support_card_data.update(training_data)
+  return support_card_data
+
+def inspect_trainings(training_results, year, check_stat_gains):
+  """Swipes and captures on this thread while the pool reads the trainings already captured."""
+  start = time.perf_counter()
+  pool = get_state_pool()
+  futures = {}
+  for name, mouse_pos in constants.TRAINING_BUTTON_POSITIONS.items():
+    # swipe up to avoid clicking on the training button again.
+    device_action.swipe(mouse_pos, (mouse_pos[0], mouse_pos[1] + 150), duration=0.1)
+    sleep(0.15)
+    futures[name] = pool.submit(inspect_training, device_action.capture_frame(max_age_ms=0), year, check_stat_gains)
+  sweep_ms = (time.perf_counter() - start) * 1000
+
+  results = {name: future.result() for name, future in futures.items()}
+  for name, mouse_pos in constants.TRAINING_BUTTON_POSITIONS.items():
+    training_data, support_card_data = results[name]
+    if training_data.get("failure") == -1:
+      # the captured frame was mid animation, go back and read this one live like before
+      debug(f"Failure chance unreadable for {name} in the pipeline, inspecting it again.")
+      device_action.swipe(mouse_pos, (mouse_pos[0], mouse_pos[1] + 150), duration=0.1)
+      sleep(0.15)
+      training_data = get_training_data(year=year, check_stat_gains=check_stat_gains)
+      support_card_data = get_support_card_data()
+    training_results[name] = training_result(training_data, support_card_data)
+  debug(f"Training sweep: {sweep_ms:.0f}ms swiping, {(time.perf_counter() - start) * 1000:.0f}ms total.")
+
 def collect_training_state(state_object, training_function_name):
   check_stat_gains = False
   if training_function_name == "meta_training" or training_function_name == "most_stat_gain":
@@ -80,13 +167,13 @@ def collect_training_state(state_object, training_function_name):
   if device_action.locate_and_click("assets/buttons/training_btn.png", min_search_time=get_secs(5), region_ltrb=constants.SCREEN_BOTTOM_BBOX):
     if not device_action.locate("assets/buttons/back_btn.png", min_search_time=get_secs(2), region_ltrb=constants.SCREEN_BOTTOM_BBOX):
       return state_object
-    training_results = CleanDefaultDict()
-    sleep(0.25)
-    for name, mouse_pos in constants.TRAINING_BUTTON_POSITIONS.items():
-      # swipe up to avoid clicking on the training button again.
-      device_action.swipe(mouse_pos, (mouse_pos[0], mouse_pos[1] + 150), duration=0.1)
-      sleep(0.15)
-      if args.debug is not None and args.debug > 11:
+    training_results = {}
+    settle(0.25, constants.SCREEN_BOTTOM_BBOX)
+    if args.debug is not None and args.debug > 11:
+      for name, mouse_pos in constants.TRAINING_BUTTON_POSITIONS.items():
+        # swipe up to avoid clicking on the training button again.
+        device_action.swipe(mouse_pos, (mouse_pos[0], mouse_pos[1] + 150), duration=0.1)
+        sleep(0.15)
         from utils.debug_tools import compare_training_samples
         test_results = []
         for i in range(10):
@@ -97,8 +184,9 @@ def collect_training_state(state_object, training_function_name):
         if not equal:
           debug("Training samples diverged")
           debug(info)
-      training_results[name].update(get_training_data(year=state_object["year"], check_stat_gains=check_stat_gains))
-      training_results[name].update(get_support_card_data())
+        training_results[name] = training_result(get_training_data(year=state_object["year"], check_stat_gains=check_stat_gains), get_support_card_data())
+    else:
+      inspect_trainings(training_results, state_object["year"], check_stat_gains)
 
     debug(f"Training results: {training_results}")
     
@@ -127,42 +215,12 @@ def filter_training_lock(training_results):
   return training_results
 
 def training_fingerprint(training):
-  fp = []
-
-  # totals (sorted for determinism)
-  if "total_supports" in training:
-    fp.append(("total_supports", training["total_supports"]))
-
-  if "total_friendship_levels" in training:
-    tfl = training["total_friendship_levels"]
-    fp.append((
-      "total_friendship_levels",
-      tuple(sorted(tfl.items()))
-    ))
-
-  # per-stat entries
-  for stat, data in training.items():
-    if stat not in ("spd", "pwr", "sta", "guts", "wit"):
-      continue
-    if not isinstance(data, dict):
-      continue
-
-    entry = []
-
-    if "supports" in data:
-      entry.append(("supports", data["supports"]))
-
-    if "friendship_levels" in data:
-      entry.append((
-        "friendship_levels",
-        tuple(sorted(data["friendship_levels"].items()))
-      ))
-
-    if entry:
-      fp.append((stat, tuple(entry)))
-
-  # final canonical form
-  return tuple(sorted(fp))
+  # totals, then the per-stat card counts, in a fixed order
+  fp = [training.total_supports, tuple(training.total_friendship_levels.items())]
+  for stat in ("spd", "pwr", "sta", "guts", "wit"):
+    counts = training.support_counts(stat)
+    fp.append((stat, counts.supports, tuple(counts.friendship_levels.items())))
+  return tuple(fp)
 
 valid_training_dict={
   'spd': {'stat_gains': {'spd': 1, 'pwr': 1, 'sp': 1}},
@@ -176,12 +234,12 @@ def is_valid_training(name, training):
     return False
 
   valid_keys = set(valid_training_dict[name]["stat_gains"].keys())
-  training_keys = set(training["stat_gains"].keys())
+  training_keys = set(training.stat_gains.keys())
 
   return training_keys == valid_keys
 
 def get_support_card_data(threshold=0.8):
-  count_result = CleanDefaultDict()
+  count_result = TrainingResult()
   if constants.SCENARIO_NAME == "unity":
     region_xywh = constants.UNITY_SUPPORT_CARD_ICON_REGION
   else:
@@ -194,16 +252,16 @@ def get_support_card_data(threshold=0.8):
     unity_spirit_exp_matches = device_action.match_template("assets/unity/unity_spirit_explosion.png", screenshot, threshold)
 
     for training_match in unity_training_matches:
-      count_result["unity_trainings"] += 1
+      count_result.unity_trainings += 1
       for gauge_match in unity_gauge_matches:
         dist = gauge_match[1] - training_match[1]
         if dist < 100 and dist > 0:
-          count_result["unity_gauge_fills"] += 1
+          count_result.unity_gauge_fills += 1
           # each unity training can only be matched to one gauge fill, so break
           break
 
     for spirit_exp_match in unity_spirit_exp_matches:
-      count_result["unity_spirit_explosions"] += 1
+      count_result.unity_spirit_explosions += 1
 
   hint_matches = device_action.match_template("assets/icons/support_hint.png", screenshot, threshold)
 
@@ -211,10 +269,10 @@ def get_support_card_data(threshold=0.8):
     matches = device_action.match_template(icon_path, screenshot, threshold)
 
     for match in matches:
-      # auto-created entries if not yet present
       debug(f"{key} match: {match}")
-      count_result[key]["supports"] += 1
-      count_result["total_supports"] += 1
+      support_counts = count_result.add_support(key)
+      support_counts.supports += 1
+      count_result.total_supports += 1
 
       # get friend level
       x, y, w, h = match
@@ -226,14 +284,14 @@ def get_support_card_data(threshold=0.8):
       friendship_level_color = find_color_of_pixel(wanted_pixel)
       friend_level = closest_color(constants.SUPPORT_FRIEND_LEVELS, friendship_level_color)
 
-      count_result[key]["friendship_levels"][friend_level] += 1
-      count_result["total_friendship_levels"][friend_level] += 1
+      support_counts.friendship_levels[friend_level] += 1
+      count_result.total_friendship_levels[friend_level] += 1
 
       for hint_match in hint_matches:
         if abs(hint_match[1] - match[1]) < 45:
-          count_result[key]["hints"] += 1
-          count_result["total_hints"] += 1
-          count_result["hints_per_friend_level"][friend_level] += 1
+          support_counts.hints += 1
+          count_result.total_hints += 1
+          count_result.hints_per_friend_level[friend_level] += 1
 
   return count_result
 
@@ -243,8 +301,11 @@ def get_training_data(year=None, check_stat_gains = False):
   if constants.SCENARIO_NAME == "unity":
     results["failure"] = get_failure_chance(region_xywh=constants.UNITY_FAILURE_REGION)
     if check_stat_gains:
-      stat_gains = get_stat_gains(year=year, region_xywh=constants.UNITY_STAT_GAINS_REGION, scale_factor=1.5)
-      stat_gains2 = get_stat_gains(year=year, region_xywh=constants.UNITY_STAT_GAINS_2_REGION, scale_factor=1.5, secondary_stat_gains=True)
+      # both rows go through one OCR batch
+      stat_gains, stat_gains2 = get_stat_gains_for_regions([
+        {"region_xywh": constants.UNITY_STAT_GAINS_REGION, "scale_factor": 1.5},
+        {"region_xywh": constants.UNITY_STAT_GAINS_2_REGION, "scale_factor": 1.5, "secondary_stat_gains": True},
+      ], year=year)
       for key, value in stat_gains.items():
         if key in stat_gains2:
           stat_gains[key] += stat_gains2[key]
@@ -256,34 +317,41 @@ def get_training_data(year=None, check_stat_gains = False):
 
   return results
 
-def get_stat_gains(year=1, attempts=0, enable_debug=True, show_screenshot=False, region_xywh=None, scale_factor=1, secondary_stat_gains=False):
-  if region_xywh is None:
-    raise ValueError("region_xywh is required")
-  
-  stat_gains={}
-  #[220, 100, 60], [255, 245, 170]
+# stat gain text colors, the secondary (unity) row is a darker orange
+STAT_GAIN_COLORS = {
+  False: ([220, 100, 60], [255, 245, 170]),
+  True: ([220, 100, 45], [255, 245, 170]),
+}
+
+def segment_stat_gains(stat_screenshot, secondary_stat_gains=False, scale_factor=1, enable_debug=True, method="auto"):
+  """Text mask of the stat gain region. "auto" tries color segmentation and falls back to grabcut
+  when that doesn't look like text, "color" returns None instead of falling back."""
+  lower_yellow, upper_yellow = STAT_GAIN_COLORS[secondary_stat_gains]
+  mask_area = 1 if secondary_stat_gains else 2
+  if method != "grabcut":
+    scaled = stat_screenshot
+    if scale_factor != 1:
+      scaled = cv2.resize(stat_screenshot, (int(stat_screenshot.shape[1] * scale_factor), int(stat_screenshot.shape[0] * scale_factor)))
+    mask = segment_between_colors(scaled, lower_yellow, upper_yellow, mask_area=int(round(mask_area * scale_factor)),
+                                  min_area=int(SEGMENT_MIN_COMPONENT_AREA * scale_factor * scale_factor))
+    if mask is not None or method == "color":
+      return mask
+    debug("Stat gain color segmentation doesn't look like text, falling back to grabcut.")
+  stat_screenshot = custom_grabcut(stat_screenshot, mask_area=mask_area)
+  if enable_debug:
+    debug_window(stat_screenshot, save_name="grabcut")
+  if scale_factor != 1:
+    stat_screenshot = cv2.resize(stat_screenshot, (int(stat_screenshot.shape[1] * scale_factor), int(stat_screenshot.shape[0] * scale_factor)))
+  return np.invert(binarize_between_colors(stat_screenshot, lower_yellow, upper_yellow))
 
-  if secondary_stat_gains:
-    upper_yellow = [255, 245, 170]
-    lower_yellow = [220, 100, 45]
-  else:
-    upper_yellow = [255, 245, 170]
-    lower_yellow = [220, 100, 60]
+def prepare_stat_gain_crops(year=1, enable_debug=True, show_screenshot=False, region_xywh=None, scale_factor=1, secondary_stat_gains=False):
+  """Cuts the stat gain region into cleaned per-stat crops, ready for OCR."""
   stat_screenshots = []
   for i in range(1):
     if i > 0:
       device_action.flush_screenshot_cache()
     stat_screenshot = device_action.screenshot(region_xywh=region_xywh)
-    if secondary_stat_gains:
-      mask_area=1
-    else:
-      mask_area=2
-    stat_screenshot = custom_grabcut(stat_screenshot, mask_area=mask_area)
-    if enable_debug:
-      debug_window(stat_screenshot, save_name="grabcut")
-    if scale_factor != 1:
-      stat_screenshot = cv2.resize(stat_screenshot, (int(stat_screenshot.shape[1] * scale_factor), int(stat_screenshot.shape[0] * scale_factor)))
-    stat_screenshot = np.invert(binarize_between_colors(stat_screenshot, lower_yellow, upper_yellow))
+    stat_screenshot = segment_stat_gains(stat_screenshot, secondary_stat_gains, scale_factor, enable_debug)
     if enable_debug:
       debug_window(stat_screenshot, save_name="binarized")
     # if screenshot is 95% black or white
@@ -302,22 +370,28 @@ def get_stat_gains(year=1, attempts=0, enable_debug=True, show_screenshot=False,
     diff = diff & stat_screenshots[i]
   if enable_debug:
     debug_window(diff, save_name="stat_gains_diff")
-
-  stat_screenshot = diff
-  boxes = {
-    "spd":  (0.000, 0.00, 0.166, 1),
-    "sta":  (0.167, 0.00, 0.166, 1),
-    "pwr":  (0.334, 0.00, 0.166, 1),
-    "guts": (0.500, 0.00, 0.166, 1),
-    "wit":  (0.667, 0.00, 0.166, 1),
-    "sp":   (0.834, 0.00, 0.166, 1),
-  }
-
+  return cut_stat_gain_crops(diff, secondary_stat_gains, year, enable_debug, show_screenshot)
+
+# x, y, w, h of every stat's gain as fractions of the stat gain region
+STAT_GAIN_BOXES = {
+  "spd":  (0.000, 0.00, 0.166, 1),
+  "sta":  (0.167, 0.00, 0.166, 1),
+  "pwr":  (0.334, 0.00, 0.166, 1),
+  "guts": (0.500, 0.00, 0.166, 1),
+  "wit":  (0.667, 0.00, 0.166, 1),
+  "sp":   (0.834, 0.00, 0.166, 1),
+}
+
+def stat_gain_boxes(stat_screenshot):
   h, w = stat_screenshot.shape
-  stat_gains={}
-  for key, (xr, yr, wr, hr) in boxes.items():
+  for key, (xr, yr, wr, hr) in STAT_GAIN_BOXES.items():
     x, y, ww, hh = int(xr*w), int(yr*h), int(wr*w), int(hr*h)
-    cropped_image = np.array(stat_screenshot[y:y+hh, x:x+ww])
+    yield key, np.array(stat_screenshot[y:y+hh, x:x+ww])
+
+def cut_stat_gain_crops(stat_screenshot, secondary_stat_gains=False, year=1, enable_debug=True, show_screenshot=False):
+  """Splits a stat gain text mask into per-stat crops of the number after the plus sign."""
+  crops = {}
+  for key, cropped_image in stat_gain_boxes(stat_screenshot):
     if enable_debug:
       debug_window(cropped_image, save_name=f"stat_{key}", show_on_screen=show_screenshot)
     if secondary_stat_gains:
@@ -331,23 +405,50 @@ def get_stat_gains(year=1, attempts=0, enable_debug=True, show_screenshot=False,
     cropped_image = clean_noise(cropped_image)
     if enable_debug:
       debug_window(cropped_image, save_name=f"stat_{key}_cleaned_{year}", show_on_screen=show_screenshot)
-    text = extract_number(cropped_image)
-
+    crops[key] = cropped_image
+  return crops
+
+def read_stat_gain_crops(crop_sets, year=1, enable_debug=True, show_screenshot=False):
+  """Reads every crop of every set in one OCR batch, returns one gains dict per set."""
+  flat_crops = [(set_index, key, image) for set_index, crops in enumerate(crop_sets) for key, image in crops.items()]
+  numbers = extract_number_batch([image for _, _, image in flat_crops])
+  results = [{} for _ in crop_sets]
+  for (set_index, key, cropped_image), text in zip(flat_crops, numbers):
+    if text == -1:
+      # recognizer wasn't sure, let the detector have a go at this one
+      text = extract_number(cropped_image)
     if text != -1:
       if enable_debug:
         debug_window(cropped_image, save_name=f"{text}_stat_{key}_gain_screenshot_{year}", show_on_screen=show_screenshot)
-      stat_gains[key] = text
+      results[set_index][key] = text
+  return results
 
-  if attempts >= 10:
-    if enable_debug:
-      debug(f"[STAT_GAINS] {year} Extraction failed. Gains: {stat_gains}")
-    return stat_gains
-  elif any(value > 100 for value in stat_gains.values()):
-    if enable_debug:
-      debug(f"[STAT_GAINS] {year} Too high, retrying. Gains: {stat_gains}")
-    return get_stat_gains(year=year, attempts=attempts + 1, enable_debug=enable_debug, show_screenshot=show_screenshot, region_xywh=region_xywh)
-  debug(f"[STAT_GAINS] {year} Gains: {stat_gains}")
-  return stat_gains
+def get_stat_gains_for_regions(regions, year=1, attempts=0, enable_debug=True, show_screenshot=False):
+  """regions is a list of get_stat_gains keyword dicts (region_xywh, scale_factor, secondary_stat_gains)."""
+  for region in regions:
+    if region.get("region_xywh") is None:
+      raise ValueError("region_xywh is required")
+
+  crop_sets = [prepare_stat_gain_crops(year=year, enable_debug=enable_debug, show_screenshot=show_screenshot, **region) for region in regions]
+  all_stat_gains = read_stat_gain_crops(crop_sets, year=year, enable_debug=enable_debug, show_screenshot=show_screenshot)
+
+  results = []
+  for region, stat_gains in zip(regions, all_stat_gains):
+    if attempts >= 10:
+      if enable_debug:
+        debug(f"[STAT_GAINS] {year} Extraction failed. Gains: {stat_gains}")
+    elif any(value > 100 for value in stat_gains.values()):
+      if enable_debug:
+        debug(f"[STAT_GAINS] {year} Too high, retrying. Gains: {stat_gains}")
+      stat_gains = get_stat_gains(year=year, attempts=attempts + 1, enable_debug=enable_debug, show_screenshot=show_screenshot, **region)
+    else:
+      debug(f"[STAT_GAINS] {year} Gains: {stat_gains}")
+    results.append(stat_gains)
+  return results
+
+def get_stat_gains(year=1, attempts=0, enable_debug=True, show_screenshot=False, region_xywh=None, scale_factor=1, secondary_stat_gains=False):
+  region = {"region_xywh": region_xywh, "scale_factor": scale_factor, "secondary_stat_gains": secondary_stat_gains}
+  return get_stat_gains_for_regions([region], year=year, attempts=attempts, enable_debug=enable_debug, show_screenshot=show_screenshot)[0]
 
 
 def get_failure_chance(region_xywh=None):
@@ -396,10 +497,28 @@ def get_mood(attempts=0):
   return get_mood(attempts + 1)
 
 # Check turn
-def get_turn():
+def is_race_day():
   if device_action.locate("assets/buttons/race_day_btn.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX):
-    return "Race Day"
+    return True
   elif device_action.locate("assets/ura/ura_race_btn.png", region_ltrb=constants.SCREEN_BOTTOM_BBOX):
+    return True
+  return False
+
+def unity_banner_pending():
+  race_turns = device_action.screenshot(region_xywh=constants.UNITY_RACE_TURNS_REGION)
+  race_turns = enhance_image_for_ocr(race_turns, resize_factor=4, binarize_threshold=None)
+  race_turns_text = extract_allowed_text(race_turns, allowlist="0123456789")
+  digits_only = re.sub(r"[^\d]", "", race_turns_text)
+  if digits_only:
+    digits_only = int(digits_only)
+    debug(f"Unity cup race turns text: {race_turns_text}")
+    if digits_only in [5, 10]:
+      debug(f"Race turns left until unity cup: {digits_only}.")
+      return True
+  return False
+
+def get_turn(check_unity_banner=True):
+  if is_race_day():
     return "Race Day"
   if constants.SCENARIO_NAME == "unity":
     region_xywh = constants.UNITY_TURN_REGION
@@ -410,17 +529,10 @@ def get_turn():
   turn_text = extract_allowed_text(turn, allowlist="0123456789")
   debug(f"Turn text: {turn_text}")
 
-  if constants.SCENARIO_NAME == "unity":
-    race_turns = device_action.screenshot(region_xywh=constants.UNITY_RACE_TURNS_REGION)
-    race_turns = enhance_image_for_ocr(race_turns, resize_factor=4, binarize_threshold=None)
-    race_turns_text = extract_allowed_text(race_turns, allowlist="0123456789")
-    digits_only = re.sub(r"[^\d]", "", race_turns_text)
-    if digits_only:
-      digits_only = int(digits_only)
-      debug(f"Unity cup race turns text: {race_turns_text}")
-      if digits_only in [5, 10]:
-        debug(f"Race turns left until unity cup: {digits_only}, waiting for 3 seconds to allow banner to pass.")
-        sleep(3)
+  if check_unity_banner and constants.SCENARIO_NAME == "unity":
+    if unity_banner_pending():
+      debug(f"Waiting for 3 seconds to allow banner to pass.")
+      sleep(3)
 
   digits_only = re.sub(r"[^\d]", "", turn_text)
 
@@ -431,6 +543,13 @@ def get_turn():
 
 # Check year
 def get_current_year():
+  text = read_current_year()
+  if text is not None:
+    return text
+  return get_current_year_from_race_screen()
+
+def read_current_year():
+  """Year from the main screen only, None if it didn't read as a timeline entry."""
   if constants.SCENARIO_NAME == "unity":
     region_xywh = constants.UNITY_YEAR_REGION
   else:
@@ -444,7 +563,10 @@ def get_current_year():
       return text
     else:
       device_action.flush_screenshot_cache()
+  return None
 
+def get_current_year_from_race_screen():
+  text = ""
   if device_action.locate_and_click("assets/buttons/races_btn.png", min_search_time=get_secs(10), region_ltrb=constants.SCREEN_BOTTOM_BBOX):
     info(f"Couldn't match year text in main screen, checking alternative on the race screen.")
     device_action.locate("assets/buttons/back_btn.png", min_search_time=get_secs(2), region_ltrb=constants.SCREEN_BOTTOM_BBOX)
@@ -490,15 +612,21 @@ def get_current_stats(turn, enable_debug=True):
   }
 
   h, w = image.shape[:2]
-  current_stats={}
+  crops = {}
   for key, (xr, yr, wr, hr) in boxes.items():
     x, y, ww, hh = int(xr*w), int(yr*h), int(wr*w), int(hr*h)
     cropped_image = np.array(image[y:y+hh, x:x+ww])
-    final_stat_value = -1
     if enable_debug:
       debug_window(cropped_image, save_name=f"stat_{key}_cropped")
-    final_stat_value = extract_text(cropped_image, allowlist="0123456789MAX")
+    crops[key] = cropped_image
+
+  # all six in one recognizer pass, only the ones it can't read go through the slow path
+  stat_values = extract_text_batch(list(crops.values()), allowlist="0123456789MAX")
+  current_stats={}
+  for (key, cropped_image), final_stat_value in zip(crops.items(), stat_values):
     debug(f"Initial stat value: {final_stat_value}")
+    if final_stat_value == "":
+      final_stat_value = extract_text(cropped_image, allowlist="0123456789MAX")
     if final_stat_value == "":
       cropped_image = enhance_image_for_ocr(cropped_image, binarize_threshold=None)
       final_stat_value = extract_text(cropped_image, allowlist="0123456789MAX")
@@ -7,6 +7,7 @@ from core.recognizer import compare_brightness
 from utils.log import error, warning, info, debug
 from utils.tools import remove_if_exists, sleep, get_secs, click
 import utils.device_action_wrapper as device_action
+import utils.profiler as profiler
 
 class Strategy:
 
@@ -24,6 +25,7 @@ class Strategy:
     self.erroneous_action = { "name": "error", "option": "no_action" }
     first_filter_done = False 
 
+  @profiler.timed("decision")
   def decide(self, state, action):
     #TODO: add support for last 3 turns not being wasted by resting
     debug(f"Starting decision for turn {state.get('turn', 'unknown')} in {state['year']}")
@@ -177,15 +179,8 @@ class Strategy:
     return action
 
   def check_infirmary(self, state, action):
-    screenshot = device_action.screenshot(region_ltrb=constants.SCREEN_BOTTOM_BBOX)
-    infirmary_matches = device_action.match_template("assets/buttons/infirmary_btn.png", screenshot, threshold=0.85)
-    if len(infirmary_matches) == 0:
-      debug("No infirmary button found.")
-      return action
-    # add screen bottom bbox x, y to match x, y so that we can take the image of it below
-    infirmary_screen_image = device_action.screenshot_match(match=infirmary_matches[0], region=constants.SCREEN_BOTTOM_BBOX)
-    if compare_brightness(template_path="assets/buttons/infirmary_btn.png", other=infirmary_screen_image):
-      status_effect_names, total_severity = check_status_effects()
+    if self.infirmary_available():
+      status_effect_names, total_severity = self.read_status_effects()
       state["status_effect_names"] = status_effect_names
       missing_energy = state["max_energy"] - state["energy_level"]
       if total_severity >= config.MINIMUM_CONDITION_SEVERITY:
@@ -201,6 +196,20 @@ class Strategy:
 
     return action
 
+  # the two screen reads of check_infirmary, core/simulator.py answers them from its model instead
+  def infirmary_available(self):
+    screenshot = device_action.screenshot(region_ltrb=constants.SCREEN_BOTTOM_BBOX)
+    infirmary_matches = device_action.match_template("assets/buttons/infirmary_btn.png", screenshot, threshold=0.85)
+    if len(infirmary_matches) == 0:
+      debug("No infirmary button found.")
+      return False
+    # add screen bottom bbox x, y to match x, y so that we can take the image of it below
+    infirmary_screen_image = device_action.screenshot_match(match=infirmary_matches[0], region=constants.SCREEN_BOTTOM_BBOX)
+    return compare_brightness(template_path="assets/buttons/infirmary_btn.png", other=infirmary_screen_image)
+
+  def read_status_effects(self):
+    return check_status_effects()
+
   def check_recreation(self, state, action):
     action["can_mood_increase"] = False
     if "Junior Year" in state["year"]:
@@ -2,7 +2,7 @@
 from utils.log import error, info, warning, debug
 from core.actions import Action
 import core.config as config
-from utils.shared import CleanDefaultDict
+from utils.shared import CleanDefaultDict, TrainingResult, SupportCounts, FriendshipLevels
 import utils.constants as constants
 
 # Training function names:
@@ -14,28 +14,28 @@ def create_training_score_entry(training_name, training_data, score_tuple):
 
   Args:
     training_name: Name of the training
-    training_data: Training data dictionary
+    training_data: TrainingResult of the training
     score_tuple: Calculated score tuple
 
   Returns:
     Dictionary with standardized training score data
   """
-  total_rainbow_friends = training_data[training_name]["friendship_levels"]["yellow"] + training_data[training_name]["friendship_levels"]["max"]
-  total_friendship_increases = training_data["total_friendship_levels"]["gray"] + training_data["total_friendship_levels"]["blue"] + training_data["total_friendship_levels"]["green"]
+  friendship_levels = training_data.support_counts(training_name).friendship_levels
+  total_rainbow_friends = friendship_levels.yellow + friendship_levels.max
 
   entry = {
     "score_tuple": score_tuple,
-    "failure": training_data["failure"],
-    "total_supports": training_data["total_supports"],
-    "stat_gains": training_data["stat_gains"],
-    "friendship_levels": training_data["total_friendship_levels"],
+    "failure": training_data.failure,
+    "total_supports": training_data.total_supports,
+    "stat_gains": training_data.stat_gains,
+    "friendship_levels": training_data.total_friendship_levels,
     "total_rainbow_friends": total_rainbow_friends,
-    "total_friendship_increases": total_friendship_increases
+    "total_friendship_increases": training_data.total_friendship_increases
   }
   if constants.SCENARIO_NAME == "unity":
-    entry["unity_gauge_fills"] = training_data["unity_gauge_fills"]
-    entry["unity_trainings"] = training_data["unity_trainings"] - training_data["unity_gauge_fills"]
-    entry["unity_spirit_explosions"] = training_data["unity_spirit_explosions"]
+    entry["unity_gauge_fills"] = training_data.unity_gauge_fills
+    entry["unity_trainings"] = training_data.unity_trainings - training_data.unity_gauge_fills
+    entry["unity_spirit_explosions"] = training_data.unity_spirit_explosions
 
   return entry
 
@@ -86,10 +86,10 @@ def rainbow_training(state, training_template, action):
 
   minimum_acceptable_data = (
     'training_name',
-    CleanDefaultDict({
-      'training_name': {'supports': 1, 'friendship_levels': {'max': 1}},
-      'unity_spirit_explosions': 1,
-    })
+    TrainingResult(
+      supports={'training_name': SupportCounts(supports=1, friendship_levels=FriendshipLevels(max=1))},
+      unity_spirit_explosions=1,
+    )
   )
 
   minimum_score = _calculate_score(minimum_acceptable_data)
@@ -139,10 +139,10 @@ def max_out_friendships(state, training_template, action):
 
   minimum_acceptable_data = (
     "training_name",
-    CleanDefaultDict({
-      "total_friendship_levels":{"green": 2},
-      "unity_gauge_fills": 1
-    })
+    TrainingResult(
+      total_friendship_levels=FriendshipLevels(green=2),
+      unity_gauge_fills=1
+    )
   )
   minimum_score = _calculate_score(minimum_acceptable_data)
   if not action.options.get("min_scores"):
@@ -192,11 +192,11 @@ def most_support_cards(state, training_template, action):
   debug(f"most_support_card scores: {training_scores}")
   minimum_acceptable_data = (
     'minimum',
-    CleanDefaultDict({
-      'total_supports': 1,
-      'total_friendship_levels': {'green': 1},
-      'unity_gauge_fills': 1
-    })
+    TrainingResult(
+      total_supports=1,
+      total_friendship_levels=FriendshipLevels(green=1),
+      unity_gauge_fills=1
+    )
   )
   minimum_score = _calculate_score(minimum_acceptable_data)
   if not action.options.get("min_scores"):
@@ -281,13 +281,13 @@ def find_min_and_max_score(score_dict, score_name):
   return min_score, max_score
 
 def calculate_risk_increase(training_name, training_data, risk_taking_set):
-  total_friendship_levels = training_data[training_name]['friendship_levels']
+  total_friendship_levels = training_data.support_counts(training_name).friendship_levels
 
   # Count rainbow friends (yellow + max levels)
-  rainbow_count = total_friendship_levels['yellow'] + total_friendship_levels['max']
+  rainbow_count = total_friendship_levels.yellow + total_friendship_levels.max
 
   # Count total supports
-  total_supports = training_data['total_supports']
+  total_supports = training_data.total_supports
 
   # First support doesn't count at all
   if total_supports <= 1:
@@ -311,7 +311,7 @@ def filter_safe_trainings(state, training_template, use_risk_taking=False, check
   training_results = state['training_results']
   current_stats = state['current_stats']
   risk_taking_set = training_template['risk_taking_set']
-  filtered_results = CleanDefaultDict()
+  filtered_results = {}
 
   for training_name, training_data in training_results.items():
     # Check if primary stat is at cap
@@ -321,7 +321,7 @@ def filter_safe_trainings(state, training_template, use_risk_taking=False, check
 
     # Handle stat cap filtering
     if check_stat_caps and is_capped:
-      training_data["is_capped"] = f"{current_stat}/{stat_cap}"
+      training_data.is_capped = f"{current_stat}/{stat_cap}"
       debug(f"Skipping {training_name.upper()} training: stat at cap ({current_stat}/{stat_cap})")
       continue
 
@@ -332,27 +332,27 @@ def filter_safe_trainings(state, training_template, use_risk_taking=False, check
       max_allowed_failure += risk_increase
 
       # Check failure rate with dynamic threshold
-      failure_rate = int(training_data["failure"])
+      failure_rate = int(training_data.failure)
       if failure_rate > max_allowed_failure:
-        training_data["fail_rate_too_high"] = max_allowed_failure
+        training_data.fail_rate_too_high = max_allowed_failure
         debug(f"Skipping {training_name.upper()}: {failure_rate}% > {max_allowed_failure}% (base: {config.MAX_FAILURE}, bonus: +{risk_increase})")
         continue
       else:
         debug(f"Fail rate of {training_name.upper()}: {failure_rate}% < {max_allowed_failure}% (base: {config.MAX_FAILURE}, bonus: +{risk_increase})")
-        training_data["fail_rate_too_high"] = False
+        training_data.fail_rate_too_high = False
     else:
       # No risk taking - use base failure rate only
-      failure_rate = int(training_data["failure"])
+      failure_rate = int(training_data.failure)
       if failure_rate > config.MAX_FAILURE:
-        training_data["fail_rate_too_high"] = config.MAX_FAILURE
+        training_data.fail_rate_too_high = config.MAX_FAILURE
         debug(f"Skipping {training_name.upper()}: {failure_rate}% > {config.MAX_FAILURE}% (no risk tolerance)")
         continue
       else:
         debug(f"Fail rate of training {training_name.upper()}: {failure_rate}% < {config.MAX_FAILURE}% (no risk tolerance)")
-        training_data["fail_rate_too_high"] = False
+        training_data.fail_rate_too_high = False
 
-    training_data["is_capped"] = is_capped
-    training_data["max_allowed_failure"] = max_allowed_failure
+    training_data.is_capped = is_capped
+    training_data.max_allowed_failure = max_allowed_failure
 
     filtered_results[training_name] = training_data
 
@@ -376,8 +376,8 @@ def get_priority_index(x):
 def most_support_score(x):
   global PRIORITY_WEIGHTS_LIST
   priority_weight = PRIORITY_WEIGHTS_LIST[config.PRIORITY_WEIGHT]
-  base = x[1]["total_supports"]
-  if x[1]["total_hints"] > 0:
+  base = x[1].total_supports
+  if x[1].total_hints > 0:
       base += 0.5
 
   priority_index = get_priority_index(x)
@@ -396,7 +396,7 @@ def most_support_score(x):
 
 def most_stat_score(x, state, training_template):
   training_name, training_data = x
-  stat_gains = training_data['stat_gains']
+  stat_gains = training_data.stat_gains
   total_value = 0
 
   # Sum up weighted stat gains, excluding capped stats
@@ -434,20 +434,20 @@ def max_out_friendships_score(x):
   # Gray friends (0-14): most valuable (1.02x multiplier)
   # Blue friends (15-39): valuable (1.01x multiplier)
   # Green friends (40-79): base value (1.0x multiplier)
-  friendship_levels = training_data['total_friendship_levels']
+  friendship_levels = training_data.total_friendship_levels
   possible_friendship = (
-    friendship_levels['green'] +
-    friendship_levels['blue'] * 1.05 +
-    friendship_levels['gray'] * 1.1 +
-    friendship_levels['max'] * 0.2 +
-    friendship_levels['yellow'] * 0.2
+    friendship_levels.green +
+    friendship_levels.blue * 1.05 +
+    friendship_levels.gray * 1.1 +
+    friendship_levels.max * 0.2 +
+    friendship_levels.yellow * 0.2
   )
   
   hint_bonus = 0
   # Hints provide additional progression potential
-  if training_data['total_hints'] > 0:
+  if training_data.total_hints > 0:
     hint_values = {"gray": 0.612, "blue": 0.606, "green": 0.6, "max": 0.1, "yellow": 0.1}
-    hints_per_level = training_data['hints_per_friend_level']
+    hints_per_level = training_data.hints_per_friend_level
     for level, bonus in hint_values.items():
       if hints_per_level[level] > 0:
         possible_friendship += bonus
@@ -459,7 +459,7 @@ def max_out_friendships_score(x):
   # adjust by priority index, 5 stats, higher priority = lower index = more value to the training
   possible_friendship = possible_friendship * (1 + (5 - priority_index) * 0.025)
 
-  debug(f"Max out friendships score: {training_name} -> {possible_friendship:.3f} -> {friendship_levels['gray']} + {friendship_levels['blue']} + {friendship_levels['green']} + {friendship_levels['max']} + {friendship_levels['yellow']} + {hint_bonus}")
+  debug(f"Max out friendships score: {training_name} -> {possible_friendship:.3f} -> {friendship_levels.gray} + {friendship_levels.blue} + {friendship_levels.green} + {friendship_levels.max} + {friendship_levels.yellow} + {hint_bonus}")
 
   return (possible_friendship, tiebreaker)
 
@@ -478,21 +478,22 @@ def rainbow_training_score(x):
   priority_adjustment = priority_effect * priority_weight
 
   debug(f"Total supports: {training_data}")
-  total_rainbow_friends = training_data[training_name]["friendship_levels"]["yellow"] + training_data[training_name]["friendship_levels"]["max"]
+  friendship_levels = training_data.support_counts(training_name).friendship_levels
+  total_rainbow_friends = friendship_levels.yellow + friendship_levels.max
   debug(f"Total rainbow friends: {total_rainbow_friends}")
   total_rainbow_friends = rainbow_increase_formula(total_rainbow_friends, 0.15)
   debug(f"Total rainbow friends after formula: {total_rainbow_friends}")
   #adding total rainbow friends on top of total supports for two times value nudging the formula towards more rainbows
-  rainbow_points = total_rainbow_friends * config.RAINBOW_SUPPORT_WEIGHT_ADDITION + training_data["total_supports"] * 0.20
+  rainbow_points = total_rainbow_friends * config.RAINBOW_SUPPORT_WEIGHT_ADDITION + training_data.total_supports * 0.20
   debug(f"Rainbow points after unity training score: {rainbow_points}")
   if total_rainbow_friends > 0:
     rainbow_points = rainbow_points + 0.5
-  if training_data['total_hints'] > 0:
+  if training_data.total_hints > 0:
     rainbow_points += 0.5
   if config.HINT_HUNTING_ENABLED:
     hint_hunting_weights = sorted(config.HINT_HUNTING_WEIGHTS.items(), key=lambda x: x[1], reverse=True)
     for support_type, weight in hint_hunting_weights:
-      if training_data[support_type]["hints"] > 0:
+      if training_data.support_counts(support_type).hints > 0:
         rainbow_points += weight
         break
 
@@ -501,8 +502,8 @@ def rainbow_training_score(x):
     rainbow_points = rainbow_points * (1 + priority_adjustment)
   else:
     rainbow_points = rainbow_points / (1 + abs(priority_adjustment))
-  training_data["rainbow_points"] = rainbow_points
-  training_data["total_rainbow_friends"] = total_rainbow_friends
+  training_data.rainbow_points = rainbow_points
+  training_data.total_rainbow_friends = total_rainbow_friends
   debug(f"Rainbow training score: {training_name} -> {rainbow_points} -> {total_rainbow_friends}")
   return (rainbow_points, -priority_index)
 
@@ -536,14 +537,14 @@ def unity_training_score(x, year):
   score = 0
   # unity gauges fills are more important during earlier years and spirit explosions are more important later years.
   if year == "Finale":
-    score += (training_data["unity_trainings"] * 0.2 + training_data["unity_gauge_fills"]) * 0.05
+    score += (training_data.unity_trainings * 0.2 + training_data.unity_gauge_fills) * 0.05
   else:
-    score += training_data["unity_gauge_fills"] * (1 - year_adjustment)
-    score += training_data["unity_trainings"] * 0.1
+    score += training_data.unity_gauge_fills * (1 - year_adjustment)
+    score += training_data.unity_trainings * 0.1
   if priority_adjustment >= 0:
-    score += training_data["unity_spirit_explosions"] * (1 + year_adjustment) * (1 + priority_adjustment)
+    score += training_data.unity_spirit_explosions * (1 + year_adjustment) * (1 + priority_adjustment)
   else:
-    score += training_data["unity_spirit_explosions"] * (1 + year_adjustment) / (1 + abs(priority_adjustment))
+    score += training_data.unity_spirit_explosions * (1 + year_adjustment) / (1 + abs(priority_adjustment))
 
   debug(f"Unity training score: {training_name} -> {score}")
   return score
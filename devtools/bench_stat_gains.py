@@ -0,0 +1,105 @@
+# time per region and agreement of the color segmentation stat gain path against grabcut
+# source is a session recorded with --record-session or a directory of full screenshots (training screens)
+# usage: python devtools/bench_stat_gains.py <source> [--layout adb|steam|window] [--scenario ura|unity]
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.constants as constants
+import utils.session_recorder as session_recorder
+from core.state import segment_stat_gains, cut_stat_gain_crops
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+def load_frames(source):
+  if os.path.isfile(os.path.join(source, session_recorder.INDEX_NAME)):
+    index, frames = session_recorder.load_session(source)
+    for i, frame in enumerate(frames):
+      yield f"frame {i}", frame
+    return
+  for name in sorted(os.listdir(source)):
+    if not name.lower().endswith(IMAGE_EXTENSIONS):
+      continue
+    image = cv2.imread(os.path.join(source, name), cv2.IMREAD_COLOR)
+    if image is not None:
+      yield name, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+def apply_layout(layout):
+  # regions have to match the layout the frames were captured in
+  if layout == "adb":
+    constants.adjust_constants_x_coords(offset=-155)
+  elif layout == "window":
+    constants.adjust_constants_x_coords()
+
+def scenario_regions(scenario):
+  if scenario == "unity":
+    return [
+      ("unity", {"region_xywh": constants.UNITY_STAT_GAINS_REGION, "scale_factor": 1.5}),
+      ("unity_2", {"region_xywh": constants.UNITY_STAT_GAINS_2_REGION, "scale_factor": 1.5, "secondary_stat_gains": True}),
+    ]
+  return [("ura", {"region_xywh": constants.URA_STAT_GAINS_REGION})]
+
+def timed(func, *args, **kwargs):
+  start = time.perf_counter()
+  value = func(*args, **kwargs)
+  return value, (time.perf_counter() - start) * 1000
+
+def same_crops(a, b):
+  return a.keys() == b.keys() and all(a[key].shape == b[key].shape and np.array_equal(a[key], b[key]) for key in a)
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("source")
+  parser.add_argument("--layout", choices=["adb", "steam", "window"], default="steam")
+  parser.add_argument("--scenario", choices=["ura", "unity"], default="ura")
+  options = parser.parse_args()
+
+  apply_layout(options.layout)
+
+  for label, region in scenario_regions(options.scenario):
+    x, y, w, h = region["region_xywh"]
+    scale_factor = region.get("scale_factor", 1)
+    secondary = region.get("secondary_stat_gains", False)
+    grabcut_ms, auto_ms, ious = [], [], []
+    fallbacks = compared = agreed = 0
+    disagreements = []
+    for name, frame in load_frames(options.source):
+      crop = np.ascontiguousarray(frame[y:y+h, x:x+w])
+      reference, ms = timed(segment_stat_gains, crop, secondary, scale_factor, False, "grabcut")
+      grabcut_ms.append(ms)
+      mask, ms = timed(segment_stat_gains, crop, secondary, scale_factor, False, "auto")
+      auto_ms.append(ms)
+      if segment_stat_gains(crop, secondary, scale_factor, False, "color") is None:
+        fallbacks += 1
+
+      reference_crops = cut_stat_gain_crops(reference, secondary, enable_debug=False)
+      crops = cut_stat_gain_crops(mask, secondary, enable_debug=False)
+      if not reference_crops and not crops:
+        # no stat gains on this screen
+        continue
+      compared += 1
+      union = np.count_nonzero(reference | mask)
+      ious.append(np.count_nonzero(reference & mask) / union if union else 1.0)
+      if same_crops(reference_crops, crops):
+        agreed += 1
+      else:
+        disagreements.append((name, sorted(reference_crops), sorted(crops)))
+
+    if not grabcut_ms:
+      print("no frames found")
+      return 1
+    print(f"{label}: {len(grabcut_ms)} regions, grabcut {np.mean(grabcut_ms):.2f} ms mean / {np.percentile(grabcut_ms, 95):.2f} ms p95, "
+          f"color {np.mean(auto_ms):.2f} ms mean / {np.percentile(auto_ms, 95):.2f} ms p95, {fallbacks} fell back to grabcut")
+    if compared:
+      print(f"  {compared} regions with gains: {agreed} identical per-stat crops, mask IoU mean {np.mean(ious):.3f} min {np.min(ious):.3f}")
+    for name, reference_keys, keys in disagreements[:20]:
+      print(f"  differs: {name} grabcut {reference_keys} color {keys}")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,300 @@
+# time and allocations of building and scoring training results as TrainingResult records against the CleanDefaultDict version
+# the reference_ functions are the dict based scoring as it was, the records go through core/trainings.py itself
+# usage: python devtools/bench_training_records.py [--turns 2000] [--scenario ura|unity]
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import core.config as config
+import core.trainings as trainings
+import utils.constants as constants
+from core.trainings import PRIORITY_WEIGHTS_LIST, get_priority_index, rainbow_increase_formula
+from utils.log import debug, warning
+from utils.shared import CleanDefaultDict, TrainingResult
+
+TRAININGS = ("spd", "sta", "pwr", "guts", "wit")
+YEARS = ("Junior Year Early Jun", "Classic Year Late Aug", "Senior Year Early Jan", "Finale Underway")
+
+def load_config():
+  # config.json is the user's, the template makes this run on a fresh checkout too
+  if not os.path.isfile("config.json"):
+    config.load_config = lambda: json.load(open("config.template.json", encoding="utf-8"))
+  config.reload_config()
+  strategy = config.load_config()["training_strategy"]
+  return {
+    "risk_taking_set": strategy["risk_taking_sets"]["set_1"],
+    "stat_weight_set": strategy["stat_weight_sets"]["set_1"],
+  }
+
+def synthetic_readings(turns, seed=0):
+  """What get_training_data and get_support_card_data would have read, per turn and training."""
+  rng = np.random.default_rng(seed)
+  support_types = list(constants.SUPPORT_ICONS)
+  levels = list(constants.SUPPORT_FRIEND_LEVELS)
+  for _ in range(turns):
+    turn = {}
+    for name in TRAININGS:
+      cards = [(support_types[rng.integers(len(support_types))], levels[rng.integers(len(levels))], rng.random() < 0.15)
+               for _ in range(int(rng.integers(0, 6)))]
+      gains = {stat: int(rng.integers(1, 30)) for stat in trainings_stats(name)}
+      turn[name] = {"failure": int(rng.integers(0, 40)), "stat_gains": gains, "cards": cards,
+                    "unity": [int(rng.integers(0, 3)), int(rng.integers(0, 2)), int(rng.integers(0, 2))]}
+    yield YEARS[int(rng.integers(len(YEARS)))], turn
+
+def trainings_stats(name):
+  return {"spd": ("spd", "pwr", "sp"), "sta": ("sta", "guts", "sp"), "pwr": ("sta", "pwr", "sp"),
+          "guts": ("spd", "pwr", "guts", "sp"), "wit": ("spd", "wit", "sp")}[name]
+
+def build_dict(reading):
+  count_result = CleanDefaultDict()
+  for _ in range(reading["unity"][0]):
+    count_result["unity_trainings"] += 1
+  for _ in range(reading["unity"][1]):
+    count_result["unity_gauge_fills"] += 1
+  for _ in range(reading["unity"][2]):
+    count_result["unity_spirit_explosions"] += 1
+  for key, friend_level, hint in reading["cards"]:
+    count_result[key]["supports"] += 1
+    count_result["total_supports"] += 1
+    count_result[key]["friendship_levels"][friend_level] += 1
+    count_result["total_friendship_levels"][friend_level] += 1
+    if hint:
+      count_result[key]["hints"] += 1
+      count_result["total_hints"] += 1
+      count_result["hints_per_friend_level"][friend_level] += 1
+  training = CleanDefaultDict()
+  training.update({"failure": reading["failure"], "stat_gains": dict(reading["stat_gains"])})
+  training.update(count_result)
+  return training
+
+def build_record(reading):
+  count_result = TrainingResult()
+  count_result.unity_trainings += reading["unity"][0]
+  count_result.unity_gauge_fills += reading["unity"][1]
+  count_result.unity_spirit_explosions += reading["unity"][2]
+  for key, friend_level, hint in reading["cards"]:
+    support_counts = count_result.add_support(key)
+    support_counts.supports += 1
+    count_result.total_supports += 1
+    support_counts.friendship_levels[friend_level] += 1
+    count_result.total_friendship_levels[friend_level] += 1
+    if hint:
+      support_counts.hints += 1
+      count_result.total_hints += 1
+      count_result.hints_per_friend_level[friend_level] += 1
+  count_result.update({"failure": reading["failure"], "stat_gains": dict(reading["stat_gains"])})
+  return count_result
+
+def reference_calculate_risk_increase(training_name, training_data, risk_taking_set):
+  total_friendship_levels = training_data[training_name]['friendship_levels']
+  rainbow_count = total_friendship_levels['yellow'] + total_friendship_levels['max']
+  total_supports = training_data['total_supports']
+  if total_supports <= 1:
+    return 0
+  additional_supports = max(0, total_supports - 1)
+  additional_rainbows = max(0, rainbow_count - 1)
+  additional_normal = max(0, additional_supports - additional_rainbows)
+  risk_increase = (additional_rainbows * risk_taking_set['rainbow_increase']) + \
+                  (additional_normal * risk_taking_set['normal_increase'])
+  return risk_increase
+
+def reference_most_support_score(x):
+  priority_weight = PRIORITY_WEIGHTS_LIST[config.PRIORITY_WEIGHT]
+  base = x[1]["total_supports"]
+  if x[1]["total_hints"] > 0:
+      base += 0.5
+  priority_index = get_priority_index(x)
+  priority_effect = config.PRIORITY_EFFECTS_LIST[priority_index]
+  priority_adjustment = priority_effect * priority_weight
+  if priority_adjustment >= 0:
+    total = base * (1 + priority_adjustment)
+  else:
+    total = base / (1 + abs(priority_adjustment))
+  debug(f"{x[0]} -> base={base}, priority={priority_effect}, adjustment={priority_adjustment}, total={total}")
+  return (total, -priority_index)
+
+def reference_max_out_friendships_score(x):
+  training_name, training_data = x
+  friendship_levels = training_data['total_friendship_levels']
+  possible_friendship = (
+    friendship_levels['green'] +
+    friendship_levels['blue'] * 1.05 +
+    friendship_levels['gray'] * 1.1 +
+    friendship_levels['max'] * 0.2 +
+    friendship_levels['yellow'] * 0.2
+  )
+  hint_bonus = 0
+  if training_data['total_hints'] > 0:
+    hint_values = {"gray": 0.612, "blue": 0.606, "green": 0.6, "max": 0.1, "yellow": 0.1}
+    hints_per_level = training_data['hints_per_friend_level']
+    for level, bonus in hint_values.items():
+      if hints_per_level[level] > 0:
+        possible_friendship += bonus
+        hint_bonus = bonus
+        break  # Only apply bonus for the lowest level with hints
+  priority_index = get_priority_index(x)
+  tiebreaker = -priority_index
+  possible_friendship = possible_friendship * (1 + (5 - priority_index) * 0.025)
+  debug(f"Max out friendships score: {training_name} -> {possible_friendship:.3f} -> {friendship_levels['gray']} + {friendship_levels['blue']} + {friendship_levels['green']} + {friendship_levels['max']} + {friendship_levels['yellow']} + {hint_bonus}")
+  return (possible_friendship, tiebreaker)
+
+def reference_rainbow_training_score(x):
+  priority_weight = PRIORITY_WEIGHTS_LIST[config.PRIORITY_WEIGHT]
+  training_name, training_data = x
+  priority_index = get_priority_index(x)
+  priority_effect = config.PRIORITY_EFFECTS_LIST[priority_index]
+  priority_adjustment = priority_effect * priority_weight
+  debug(f"Total supports: {training_data}")
+  total_rainbow_friends = training_data[training_name]["friendship_levels"]["yellow"] + training_data[training_name]["friendship_levels"]["max"]
+  debug(f"Total rainbow friends: {total_rainbow_friends}")
+  total_rainbow_friends = rainbow_increase_formula(total_rainbow_friends, 0.15)
+  debug(f"Total rainbow friends after formula: {total_rainbow_friends}")
+  rainbow_points = total_rainbow_friends * config.RAINBOW_SUPPORT_WEIGHT_ADDITION + training_data["total_supports"] * 0.20
+  debug(f"Rainbow points after unity training score: {rainbow_points}")
+  if total_rainbow_friends > 0:
+    rainbow_points = rainbow_points + 0.5
+  if training_data['total_hints'] > 0:
+    rainbow_points += 0.5
+  if config.HINT_HUNTING_ENABLED:
+    hint_hunting_weights = sorted(config.HINT_HUNTING_WEIGHTS.items(), key=lambda x: x[1], reverse=True)
+    for support_type, weight in hint_hunting_weights:
+      if training_data[support_type]["hints"] > 0:
+        rainbow_points += weight
+        break
+  debug(f"Rainbow points before priority adjustment: {rainbow_points}")
+  if priority_adjustment >= 0:
+    rainbow_points = rainbow_points * (1 + priority_adjustment)
+  else:
+    rainbow_points = rainbow_points / (1 + abs(priority_adjustment))
+  training_data["rainbow_points"] = rainbow_points
+  training_data["total_rainbow_friends"] = total_rainbow_friends
+  debug(f"Rainbow training score: {training_name} -> {rainbow_points} -> {total_rainbow_friends}")
+  return (rainbow_points, -priority_index)
+
+def reference_unity_training_score(x, year):
+  training_name, training_data = x
+  priority_index = get_priority_index(x)
+  priority_effect = config.PRIORITY_EFFECTS_LIST[priority_index]
+  priority_weight = PRIORITY_WEIGHTS_LIST[config.PRIORITY_WEIGHT]
+  priority_adjustment = priority_effect * priority_weight
+  if year == "Junior":
+    year_adjustment = -0.35
+  elif year == "Classic":
+    year_adjustment = 0
+  elif year == "Senior" or year == "Finale":
+    year_adjustment = 0.35
+  else:
+    warning("Didn't get year value, this should not happen.")
+    year_adjustment = 0
+  score = 0
+  if year == "Finale":
+    score += (training_data["unity_trainings"] * 0.2 + training_data["unity_gauge_fills"]) * 0.05
+  else:
+    score += training_data["unity_gauge_fills"] * (1 - year_adjustment)
+    score += training_data["unity_trainings"] * 0.1
+  if priority_adjustment >= 0:
+    score += training_data["unity_spirit_explosions"] * (1 + year_adjustment) * (1 + priority_adjustment)
+  else:
+    score += training_data["unity_spirit_explosions"] * (1 + year_adjustment) / (1 + abs(priority_adjustment))
+  debug(f"Unity training score: {training_name} -> {score}")
+  return score
+
+def reference_create_training_score_entry(training_name, training_data, score_tuple):
+  total_rainbow_friends = training_data[training_name]["friendship_levels"]["yellow"] + training_data[training_name]["friendship_levels"]["max"]
+  total_friendship_increases = training_data["total_friendship_levels"]["gray"] + training_data["total_friendship_levels"]["blue"] + training_data["total_friendship_levels"]["green"]
+  entry = {
+    "score_tuple": score_tuple,
+    "failure": training_data["failure"],
+    "total_supports": training_data["total_supports"],
+    "stat_gains": training_data["stat_gains"],
+    "friendship_levels": training_data["total_friendship_levels"],
+    "total_rainbow_friends": total_rainbow_friends,
+    "total_friendship_increases": total_friendship_increases
+  }
+  if constants.SCENARIO_NAME == "unity":
+    entry["unity_gauge_fills"] = training_data["unity_gauge_fills"]
+    entry["unity_trainings"] = training_data["unity_trainings"] - training_data["unity_gauge_fills"]
+    entry["unity_spirit_explosions"] = training_data["unity_spirit_explosions"]
+  return entry
+
+REFERENCE = {
+  "risk": reference_calculate_risk_increase,
+  "support": reference_most_support_score,
+  "friendship": reference_max_out_friendships_score,
+  "rainbow": reference_rainbow_training_score,
+  "unity": reference_unity_training_score,
+  "entry": reference_create_training_score_entry,
+}
+RECORDS = {
+  "risk": trainings.calculate_risk_increase,
+  "support": trainings.most_support_score,
+  "friendship": trainings.max_out_friendships_score,
+  "rainbow": trainings.rainbow_training_score,
+  "unity": trainings.unity_training_score,
+  "entry": trainings.create_training_score_entry,
+}
+
+def score_turn(functions, year, turn, training_template):
+  """Every score the training strategies compute for a turn, rainbow and meta call all of them."""
+  scores = {}
+  for name, training in turn.items():
+    x = (name, training)
+    risk = functions["risk"](name, training, training_template["risk_taking_set"])
+    support = functions["support"](x)
+    friendship = functions["friendship"](x)
+    rainbow = functions["rainbow"](x)
+    unity = functions["unity"](x, year.split()[0]) if constants.SCENARIO_NAME == "unity" else 0
+    entry = functions["entry"](name, training, (rainbow[0] + friendship[0] + unity, rainbow[1]))
+    scores[name] = (risk, support, friendship, rainbow, unity, entry["total_rainbow_friends"], entry["total_friendship_increases"])
+  return scores
+
+def run(build, functions, readings, training_template):
+  # timed without tracemalloc, it slows every allocation down
+  start = time.perf_counter()
+  turns = [(year, {name: build(reading) for name, reading in turn.items()}) for year, turn in readings]
+  build_ms = (time.perf_counter() - start) * 1000
+  start = time.perf_counter()
+  scores = [score_turn(functions, year, turn, training_template) for year, turn in turns]
+  score_ms = (time.perf_counter() - start) * 1000
+
+  tracemalloc.start()
+  turns = [(year, {name: build(reading) for name, reading in turn.items()}) for year, turn in readings]
+  built_bytes = tracemalloc.get_traced_memory()[0]
+  tracemalloc.reset_peak()
+  for year, turn in turns:
+    score_turn(functions, year, turn, training_template)
+  current, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  # grown is what scoring left behind in the results, auto-vivified children for the dicts
+  return scores, build_ms, score_ms, built_bytes, current - built_bytes, peak - built_bytes
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--turns", type=int, default=2000)
+  parser.add_argument("--scenario", choices=["ura", "unity"], default="ura")
+  options = parser.parse_args()
+
+  training_template = load_config()
+  constants.SCENARIO_NAME = "unity" if options.scenario == "unity" else ""
+  readings = list(synthetic_readings(options.turns))
+
+  results = {}
+  for label, build, functions in (("CleanDefaultDict", build_dict, REFERENCE), ("TrainingResult", build_record, RECORDS)):
+    scores, build_ms, score_ms, built_bytes, grown_bytes, peak_bytes = run(build, functions, readings, training_template)
+    results[label] = scores
+    print(f"{label:>16}: build {build_ms / options.turns * 1000:.1f} us/turn, {built_bytes / options.turns / 1024:.1f} KiB/turn held, "
+          f"score {score_ms / options.turns * 1000:.1f} us/turn, {peak_bytes / options.turns / 1024:.2f} KiB/turn peak, "
+          f"{grown_bytes / options.turns:.0f} B/turn grown by reads")
+
+  mismatched = sum(1 for old, new in zip(results["CleanDefaultDict"], results["TrainingResult"]) if old != new)
+  print(f"{options.turns} turns, {mismatched} with different scores")
+  return 1 if mismatched else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
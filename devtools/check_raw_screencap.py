@@ -0,0 +1,95 @@
+# checks the raw screencap parser against a fake adb transport serving recorded frames
+# record a frame on a device with: adb exec-out screencap > frame.raw
+# usage: python devtools/check_raw_screencap.py [frame.raw ...]
+# without arguments it builds raw frames from screenshot.png with both header layouts
+import os
+import struct
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.adb_raw_capture import RawScreencap, RawCaptureError
+
+class FakeSocket:
+  def __init__(self, data, max_chunk=65536):
+    self.data = memoryview(data)
+    self.pos = 0
+    # adb hands us the stream in small pieces, make sure partial reads work
+    self.max_chunk = max_chunk
+
+  def recv_into(self, view, nbytes=0):
+    nbytes = min(nbytes or len(view), self.max_chunk, len(self.data) - self.pos)
+    view[:nbytes] = self.data[self.pos:self.pos + nbytes]
+    self.pos += nbytes
+    return nbytes
+
+class FakeTransport:
+  def __init__(self, frames):
+    self.frames = frames
+    self.index = 0
+
+  def open(self):
+    data = self.frames[self.index % len(self.frames)]
+    self.index += 1
+    return FakeSocket(data), lambda: None
+
+def encode_raw(rgb, with_dataspace):
+  height, width = rgb.shape[:2]
+  rgba = cv2.cvtColor(rgb, cv2.COLOR_RGB2RGBA)
+  header = struct.pack("<III", width, height, 1)
+  if with_dataspace:
+    header += struct.pack("<I", 0)
+  return header + rgba.tobytes()
+
+def main():
+  if len(sys.argv) > 1:
+    frames = []
+    for path in sys.argv[1:]:
+      with open(path, "rb") as f:
+        frames.append(f.read())
+    expected = [None] * len(frames)
+  else:
+    bgr = cv2.imread("screenshot.png")
+    if bgr is None:
+      print("screenshot.png not found, run from the repo root or pass recorded frames")
+      return 1
+    rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    frames = [encode_raw(rgb, False), encode_raw(rgb, True)]
+    expected = [rgb, rgb]
+
+  capture = RawScreencap(FakeTransport(frames))
+  for i, want in enumerate(expected):
+    image = capture.capture()
+    print(f"frame {i}: {image.shape} {image.dtype}")
+    if want is not None and not np.array_equal(image, want):
+      print(f"frame {i}: pixels differ from the source image")
+      return 1
+
+  try:
+    RawScreencap.parse(memoryview(frames[0][:-1]))
+    print("truncated frame was accepted")
+    return 1
+  except RawCaptureError as e:
+    print(f"truncated frame rejected: {e}")
+
+  runs = 50
+  start = time.perf_counter()
+  for _ in range(runs):
+    capture.capture()
+  raw_ms = (time.perf_counter() - start) * 1000 / runs
+  print(f"raw parse: {raw_ms:.2f} ms per frame")
+
+  if expected[0] is not None:
+    ok, png = cv2.imencode(".png", cv2.cvtColor(expected[0], cv2.COLOR_RGB2BGR))
+    start = time.perf_counter()
+    for _ in range(runs):
+      cv2.cvtColor(cv2.imdecode(png, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    png_ms = (time.perf_counter() - start) * 1000 / runs
+    print(f"png decode: {png_ms:.2f} ms per frame (device side encode not included)")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,154 @@
+# equivalence and micro benchmark of crop_after_plus_component / clean_noise against the original loop versions
+# runs on synthetic crops, and on the per-stat boxes of a recorded session or screenshot directory when one is given
+# usage: python devtools/check_stat_gain_crops.py [source] [--layout adb|steam|window] [--scenario ura|unity] [--synthetic 500]
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.screenshot import crop_after_plus_component, clean_noise
+from core.state import segment_stat_gains, stat_gain_boxes
+from bench_stat_gains import load_frames, scenario_regions, apply_layout
+
+REFERENCE_ZERO = np.zeros((5, 5), dtype=np.uint8)
+
+def reference_clean_noise(img):
+  kernel = np.ones((2, 2), np.uint8)
+  img = cv2.erode(img, kernel, iterations=1, anchor=(1,1))
+  img = cv2.erode(img, kernel, iterations=1, anchor=(0,0))
+  img = cv2.dilate(img, kernel, iterations=1, anchor=(0,0))
+  img = cv2.dilate(img, kernel, iterations=1, anchor=(1,1))
+  reduced = cv2.erode(img, kernel, iterations=1, anchor=(0,0))
+  reduced = cv2.erode(img, kernel, iterations=1, anchor=(1,1))
+  restored = cv2.dilate(reduced, kernel, iterations=1, anchor=(1,1))
+  restored = cv2.dilate(reduced, kernel, iterations=1, anchor=(0,0))
+  binarized = cv2.threshold(restored, 245, 255, cv2.THRESH_BINARY)[1]
+  return cv2.GaussianBlur(binarized, (3,3), 0)
+
+def reference_crop_after_plus_component(img, pad_right=5, plus_length=14, bar_width=1):
+  n, labels, stats, centroids = cv2.connectedComponentsWithStats(img)
+  extension_width = int(plus_length // 2)
+  if n <= 1:
+    return REFERENCE_ZERO
+  plus_sign = None
+  for i in range(1, n):
+    midpoint_x = int(centroids[i][0])
+    midpoint_y = int(centroids[i][1])
+    start_x = max(0, midpoint_x - extension_width)
+    end_x = min(img.shape[1], midpoint_x + extension_width)
+    has_horizontal_bar = False
+    for y_offset in range(-bar_width, bar_width + 1):
+      check_y = midpoint_y + y_offset
+      if 0 <= check_y < img.shape[0] and np.all(img[check_y, start_x:end_x] == 255):
+        has_horizontal_bar = True
+        break
+    start_y = max(0, midpoint_y - extension_width)
+    end_y = min(img.shape[0], midpoint_y + extension_width)
+    has_vertical_bar = False
+    for x_offset in range(-bar_width, bar_width + 1):
+      check_x = midpoint_x + x_offset
+      if 0 <= check_x < img.shape[1] and np.all(img[start_y:end_y, check_x] == 255):
+        has_vertical_bar = True
+        break
+    if has_horizontal_bar and has_vertical_bar:
+      plus_sign = i
+  if plus_sign is None:
+    return REFERENCE_ZERO
+  left, top, width, height, area = stats[plus_sign]
+  crop_x_start = left + width + pad_right
+  component_right_edges = [(i, stats[i][0] + stats[i][2]) for i in range(1, n)]
+  component_right_edges.sort(key=lambda x: x[1])
+  rightmost_left, _, rightmost_width, _, _ = stats[component_right_edges[-1][0]]
+  crop_x_end = min(rightmost_left + rightmost_width + 2, img.shape[1])
+  cropped_image = img[:, crop_x_start:crop_x_end]
+  if cropped_image.shape[1] < 10:
+    return REFERENCE_ZERO
+  return cropped_image
+
+def synthetic_crops(count, seed=0):
+  """Stat gain like boxes: a plus sign, a number and some specks, at random sizes and positions."""
+  rng = np.random.default_rng(seed)
+  for i in range(count):
+    h, w = int(rng.integers(24, 52)), int(rng.integers(60, 150))
+    img = np.zeros((h, w), dtype=np.uint8)
+    if rng.random() < 0.9:
+      size = int(rng.integers(8, 18))
+      thickness = int(rng.integers(1, 5))
+      cx, cy = int(rng.integers(size // 2, w // 2)), int(rng.integers(size // 2, h - size // 2))
+      cv2.line(img, (cx - size // 2, cy), (cx + size // 2, cy), 255, thickness)
+      cv2.line(img, (cx, cy - size // 2), (cx, cy + size // 2), 255, thickness)
+      text = str(rng.integers(1, 100))
+      cv2.putText(img, text, (cx + size // 2 + int(rng.integers(2, 8)), cy + size // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                  float(rng.uniform(0.4, 0.9)), 255, int(rng.integers(1, 4)))
+    for _ in range(int(rng.integers(0, 12))):
+      x, y = int(rng.integers(0, w)), int(rng.integers(0, h))
+      img[y:y + int(rng.integers(1, 4)), x:x + int(rng.integers(1, 4))] = 255
+    yield f"synthetic {i}", img, {"plus_length": 12, "bar_width": 0} if rng.random() < 0.3 else {}
+
+def recorded_crops(options):
+  apply_layout(options.layout)
+  for name, frame in load_frames(options.source):
+    for label, region in scenario_regions(options.scenario):
+      x, y, w, h = region["region_xywh"]
+      secondary = region.get("secondary_stat_gains", False)
+      crop = np.ascontiguousarray(frame[y:y+h, x:x+w])
+      mask = segment_stat_gains(crop, secondary, region.get("scale_factor", 1), False)
+      kwargs = {"plus_length": 12, "bar_width": 0} if secondary else {}
+      for key, box in stat_gain_boxes(mask):
+        yield f"{name} {label} {key}", box, kwargs
+
+def compare(name, crops):
+  crop_ms = [0.0, 0.0]
+  clean_ms = [0.0, 0.0]
+  total = mismatched = plus_found = 0
+  for crop_name, img, kwargs in crops:
+    total += 1
+    start = time.perf_counter()
+    reference = reference_crop_after_plus_component(img, **kwargs)
+    crop_ms[0] += (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    cropped = crop_after_plus_component(img, **kwargs)
+    crop_ms[1] += (time.perf_counter() - start) * 1000
+    if reference.shape != cropped.shape or not np.array_equal(reference, cropped):
+      mismatched += 1
+      print(f"  crop differs: {crop_name} {reference.shape} vs {cropped.shape}")
+      continue
+    if cropped is REFERENCE_ZERO or np.all(cropped == 0):
+      continue
+    plus_found += 1
+    start = time.perf_counter()
+    reference = reference_clean_noise(np.ascontiguousarray(cropped))
+    clean_ms[0] += (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    cleaned = clean_noise(np.ascontiguousarray(cropped))
+    clean_ms[1] += (time.perf_counter() - start) * 1000
+    if not np.array_equal(reference, cleaned):
+      mismatched += 1
+      print(f"  clean differs: {crop_name}")
+  if not total:
+    return 0
+  print(f"{name}: {total} crops, {plus_found} with a plus sign, {mismatched} mismatches")
+  print(f"  crop_after_plus_component {crop_ms[0] / total:.3f} -> {crop_ms[1] / total:.3f} ms per crop")
+  if plus_found:
+    print(f"  clean_noise {clean_ms[0] / plus_found:.3f} -> {clean_ms[1] / plus_found:.3f} ms per crop")
+  return mismatched
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("source", nargs="?")
+  parser.add_argument("--layout", choices=["adb", "steam", "window"], default="steam")
+  parser.add_argument("--scenario", choices=["ura", "unity"], default="ura")
+  parser.add_argument("--synthetic", type=int, default=500)
+  options = parser.parse_args()
+
+  mismatched = compare("synthetic", synthetic_crops(options.synthetic))
+  if options.source:
+    mismatched += compare("recorded", recorded_crops(options))
+  return 1 if mismatched else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,48 @@
+# plays simulated careers (core/simulator.py) through the real Strategy and compares training_strategy configs
+# every config plays the same seeds, so the differences come from the configs and not the dice
+# expect about 10 careers/s per worker, the default 2000 careers per config are around 200 cpu-seconds
+# usage: python devtools/simulate_careers.py [config.json other.json ...] [--careers 2000] [--workers 8] [--scenario ura|unity]
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import core.simulator as simulator
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("configs", nargs="*", help="config files to compare, config.json (or the template) by default")
+  parser.add_argument("--careers", type=int, default=2000)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--workers", type=int, default=None, help="processes, 1 runs in this one")
+  parser.add_argument("--chunk-size", type=int, default=25, help="careers per task handed to a worker")
+  parser.add_argument("--scenario", choices=["ura", "unity"], default="ura")
+  parser.add_argument("--deck", default=",".join(simulator.DEFAULT_DECK), help="support card types, comma separated")
+  parser.add_argument("--json", help="write every career's result here")
+  options = parser.parse_args()
+
+  configs = options.configs or ["config.json" if os.path.isfile("config.json") else "config.template.json"]
+  configs = [os.path.abspath(path) for path in configs]
+  career_options = {"deck": tuple(options.deck.split(",")), "scenario": "unity" if options.scenario == "unity" else ""}
+  results, careers_per_second = simulator.simulate(configs, options.careers, seed=options.seed, workers=options.workers,
+                                                   chunk_size=options.chunk_size, career_options=career_options)
+  print(f"{options.careers} careers per config, {careers_per_second:.0f} careers/s")
+
+  summaries = {path: simulator.summarize(career_results) for path, career_results in results.items()}
+  names = [os.path.basename(path) for path in configs]
+  width = max(12, *(len(name) for name in names))
+  print(f"{'mean (p10-p90)':>16}  " + "  ".join(f"{name:>{width + 6}}" for name in names))
+  for metric in simulator.SUMMARY_METRICS:
+    cells = []
+    for path in configs:
+      mean, std, p10, p50, p90 = summaries[path][metric]
+      cells.append(f"{mean:>{width - 6}.1f} ({p10:.0f}-{p90:.0f})".rjust(width + 6))
+    print(f"{metric:>16}  " + "  ".join(cells))
+
+  if options.json:
+    with open(options.json, "w", encoding="utf-8") as f:
+      json.dump(results, f)
+
+if __name__ == "__main__":
+  main()
@@ -57,6 +57,7 @@ import utils.constants as constants
 from utils.log import info, warning, error, debug, args, init_logging
 
 from core.skeleton import career_lobby
+from core.ocr import warm_up_reader
 import core.config as config
 import core.bot as bot
 from server.main import app
@@ -146,6 +147,7 @@ def hotkey_listener():
     if not bot.is_bot_running:
       print("[BOT] Starting...")
       bot.is_bot_running = True
+      warm_up_reader()
       t = threading.Thread(target=main, daemon=True)
       t.start()
     else:
@@ -0,0 +1,48 @@
+# runs the career loop against a recorded session instead of a live game
+# Use with: py replay.py --replay path/to/session [--replay-layout adb|steam|window] [--debug]
+import sys
+import time
+
+import utils.constants as constants
+from utils.log import info, error, args, init_logging
+import utils.replay_actions as replay_actions
+import core.config as config
+import core.bot as bot
+
+from core.skeleton import career_lobby
+
+def main():
+  if not args.replay:
+    error("No session given. Use with: py replay.py --replay path/to/session")
+    return 1
+  config.reload_config()
+  init_logging()
+
+  bot.use_replay = True
+  bot.use_adb = False
+  replay_actions.load_session(args.replay)
+  # regions have to match the layout the frames were recorded in
+  layout = args.replay_layout or replay_actions.session_layout or "adb"
+  info(f"Replay layout: {layout}")
+  if layout == "adb":
+    constants.adjust_constants_x_coords(offset=-155)
+  elif layout == "window":
+    constants.adjust_constants_x_coords()
+
+  bot.is_bot_running = True
+  start = time.perf_counter()
+  cpu_start = time.process_time()
+  career_lobby(args.dry_run_turn)
+  wall = time.perf_counter() - start
+  cpu = time.process_time() - cpu_start
+
+  turns = replay_actions.turn_records
+  info(f"Replay finished: {len(turns)} turns, {replay_actions.frame_index + 1}/{len(replay_actions.frames)} frames, {len(replay_actions.input_log)} inputs.")
+  info(f"Total: {wall:.2f} s wall, {cpu:.2f} s cpu, {replay_actions.virtual_now:.1f} s virtual.")
+  if turns:
+    per_turn = sorted(record["process_time"] for record in turns)
+    info(f"Per turn cpu: mean {sum(per_turn) / len(per_turn) * 1000:.0f} ms, median {per_turn[len(per_turn) // 2] * 1000:.0f} ms, max {per_turn[-1] * 1000:.0f} ms.")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
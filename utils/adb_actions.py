@@ -3,14 +3,20 @@ import numpy as np
 import core.bot as bot
 from utils.log import info, debug, error, debug_window, args
 from utils.constants import name_of_variable
+from utils.frame_cache import FrameCache
+from utils.adb_raw_capture import RawScreencap, AdbExecTransport
 
 device = None
+raw_screencap = None
 def init_adb():
-  global device
+  global device, raw_screencap
   if bot.use_adb:
     try:
       adb.connect(bot.device_id)
       device = adb.device(bot.device_id)
+      if args.adb_capture == "raw":
+        raw_screencap = RawScreencap(AdbExecTransport(device))
+        info("Using raw ADB screencap capture.")
     except Exception as e:
       error(f"Failed to initialize ADB: {e}")
       return False
@@ -19,17 +25,23 @@ def init_adb():
 def click(x, y):
   if device is None:
     return False
-  return device.click(x, y)
+  result = device.click(x, y)
+  frame_cache.invalidate("click")
+  return result
 
 def swipe(x1, y1, x2, y2, duration=0.3):
   if device is None:
     return False
-  return device.swipe(x1, y1, x2, y2, duration)
+  result = device.swipe(x1, y1, x2, y2, duration)
+  frame_cache.invalidate("swipe")
+  return result
 
 def text(content):
   if device is None:
     return False
-  return device.send_keys(content)
+  result = device.send_keys(content)
+  frame_cache.invalidate("text")
+  return result
 
 def enable_cursor_display():
   if device is None:
@@ -53,37 +65,56 @@ def disable_cursor_display():
   except Exception:
     return False
 
-cached_screenshot = []
-def screenshot(region_xywh: tuple[int, int, int, int] = None, force_save=False):
-  global cached_screenshot
+frame_cache = FrameCache("adb")
+def capture_frame(max_age_ms=None):
   if device is None:
     error(f"ADB device is None, this should not happen, check ADB connection and device ID, if problem persists, please report this error.")
     raise Exception("ADB device is None")
-  if args.device_debug:
-    debug(f"Screenshot region: {region_xywh}")
-
-  if len(cached_screenshot) > 0:
+  frame = frame_cache.get(max_age_ms)
+  if frame is not None:
     if args.device_debug:
       debug(f"Using cached screenshot")
-    screenshot = cached_screenshot
-  else:
-    if args.device_debug:
-      debug(f"Taking new screenshot")
+    return frame
+  if args.device_debug:
+    debug(f"Taking new screenshot")
+  image = None
+  if raw_screencap is not None:
+    image = capture_raw()
+  if image is None:
     try:
-      screenshot = np.array(device.screenshot(error_ok=False))
+      image = np.array(device.screenshot(error_ok=False))
     except:
-      screenshot = np.array(device.screenshot())
-    cached_screenshot = screenshot
-  if force_save:
-    debug_window(screenshot, save_name="adb_screenshot", force_save=force_save)
-  if args.device_debug:
-    debug(f"Screenshot shape: {screenshot.shape}")
+      image = np.array(device.screenshot())
+  return frame_cache.put(image)
+
+def capture_raw():
+  global raw_screencap
+  try:
+    return raw_screencap.capture()
+  except Exception as e:
+    # not every device/emulator gives us a usable raw stream, png always works
+    error(f"Raw screencap failed, falling back to PNG capture: {e}")
+    raw_screencap = None
+    return None
+
+def crop_region(screenshot, region_xywh: tuple[int, int, int, int] = None):
   if screenshot.shape[0] == 800 and screenshot.shape[1] == 1080:
     # change region from portrait to landscape
     region_xywh = (0, 0, 1080, 800)
   if region_xywh:
     x, y, w, h = region_xywh
     screenshot = screenshot[y:y+h, x:x+w]
+  return screenshot
+
+def screenshot(region_xywh: tuple[int, int, int, int] = None, force_save=False, max_age_ms=None):
+  if args.device_debug:
+    debug(f"Screenshot region: {region_xywh}")
+  screenshot = capture_frame(max_age_ms).image
+  if force_save:
+    debug_window(screenshot, save_name="adb_screenshot", force_save=force_save)
+  if args.device_debug:
+    debug(f"Screenshot shape: {screenshot.shape}")
+  screenshot = crop_region(screenshot, region_xywh)
   if args.device_debug:
     debug(f"Screenshot shape: {screenshot.shape}")
     variable_name = name_of_variable(region_xywh)
@@ -0,0 +1,84 @@
+# raw framebuffer capture over adb, skips the png encode on the device and the decode here
+import struct
+import threading
+
+import cv2
+import numpy as np
+
+# screencap header is width, height, format and on android 12+ also the dataspace
+HEADER_SIZE = 12
+PIXEL_FORMATS = {
+  1: "RGBA_8888",
+  2: "RGBX_8888",
+}
+BYTES_PER_PIXEL = 4
+RECV_CHUNK = 1 << 20
+
+class RawCaptureError(Exception):
+  pass
+
+class AdbExecTransport:
+  """Opens an exec:screencap stream on an adbutils device. exec: doesn't mangle line endings like shell: does."""
+  def __init__(self, device):
+    self.device = device
+
+  def open(self):
+    connection = self.device.open_transport()
+    connection.send_command("exec:screencap")
+    connection.check_okay()
+    return connection.conn, connection.close
+
+class RawScreencap:
+  def __init__(self, transport):
+    self.transport = transport
+    # reused between captures, only grows if the resolution does
+    self._buffer = bytearray()
+    self._lock = threading.Lock()
+
+  def _ensure_capacity(self, size):
+    if len(self._buffer) < size:
+      self._buffer = bytearray(size)
+
+  def _recv_all(self, sock):
+    view = memoryview(self._buffer)
+    received = 0
+    while True:
+      if received == len(self._buffer):
+        # bigger screen than we sized for, grow and keep reading
+        grown = bytearray(len(self._buffer) + RECV_CHUNK)
+        grown[:received] = view[:received]
+        view.release()
+        self._buffer = grown
+        view = memoryview(self._buffer)
+      n = sock.recv_into(view[received:], min(RECV_CHUNK, len(self._buffer) - received))
+      if n == 0:
+        return received
+      received += n
+
+  def capture(self):
+    """Returns the current screen as an RGB array."""
+    with self._lock:
+      sock, close = self.transport.open()
+      try:
+        # fits any phone resolution on the first call, raw frames are never bigger than this anyway
+        self._ensure_capacity(HEADER_SIZE + 4 + 1080 * 1920 * BYTES_PER_PIXEL)
+        received = self._recv_all(sock)
+      finally:
+        close()
+      return self.parse(memoryview(self._buffer)[:received])
+
+  @staticmethod
+  def parse(data):
+    if len(data) < HEADER_SIZE:
+      raise RawCaptureError(f"Raw screencap too short: {len(data)} bytes")
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    if pixel_format not in PIXEL_FORMATS:
+      raise RawCaptureError(f"Unsupported screencap pixel format: {pixel_format}")
+    pixel_bytes = width * height * BYTES_PER_PIXEL
+    # whatever is left over in front of the pixels is the optional dataspace field
+    offset = len(data) - pixel_bytes
+    if offset not in (HEADER_SIZE, HEADER_SIZE + 4):
+      raise RawCaptureError(f"Raw screencap size mismatch: {len(data)} bytes for {width}x{height}")
+    rgba = np.frombuffer(data, dtype=np.uint8, count=pixel_bytes, offset=offset).reshape(height, width, BYTES_PER_PIXEL)
+    # the buffer is reused by the next capture, so the cached frame needs its own pixels
+    return cv2.cvtColor(rgba, cv2.COLOR_RGBA2RGB)
@@ -3,16 +3,45 @@ import numpy as np
 import core.bot as bot
 import utils.pyautogui_actions as pyautogui_actions
 import utils.adb_actions as adb_actions
+import utils.replay_actions as replay_actions
+import utils.session_recorder as session_recorder
 import utils.constants as constants
-import inspect
-from utils.log import error, info, warning, debug, debug_window, args
+import utils.template_registry as template_registry
+import utils.result_cache as result_cache
+import utils.profiler as profiler
+import utils.flight_recorder as flight_recorder
+import sys
+import threading
+from contextlib import contextmanager
+from utils.log import error, info, warning, debug, debug_window, args, call_site, call_stack
 import os
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 import warnings
 warnings.filterwarnings("ignore", message="pkg_resources is deprecated as an API")
 import pygame
 
-from time import sleep, time
+from time import sleep as real_sleep, time as real_time, perf_counter
+
+# wall time split of the current turn, reset by log_wait_stats
+def _empty_wait_stats():
+  return {"start": perf_counter(), "sleep": 0.0, "poll": 0.0, "waits": 0, "evaluations": 0}
+
+wait_stats = _empty_wait_stats()
+
+# replays run on a virtual clock so waits don't block
+@profiler.timed("sleep")
+def sleep(seconds):
+  start = perf_counter()
+  if bot.use_replay:
+    replay_actions.sleep(seconds)
+  else:
+    real_sleep(seconds)
+  wait_stats["sleep"] += perf_counter() - start
+
+def time():
+  if bot.use_replay:
+    return replay_actions.time_now()
+  return real_time()
 
 class BotStopException(Exception):
   #Exception raised to immediately stop the bot
@@ -24,12 +53,11 @@ try:
 except pygame.error:
   AUDIO_AVAILABLE = False
 def stop_bot(message = None, notification_string = None, volume = 0.3):
-  stack = inspect.stack()
-  debug(f"stop_bot called from {stack[1].function}")
+  # stop_bot runs once per stop, so the trace is always built. it goes to log_debug.txt only, the console and log.txt stay at INFO without --debug
+  debug(f"stop_bot called from {call_site()}")
   debug("======== Tracing stack ==========")
-  for frame in stack:
-    frame_info = frame[0]
-    debug(f"Function: {frame_info.f_code.co_name}, File: {frame_info.f_code.co_filename}, Line: {frame_info.f_lineno}")
+  for site in call_stack(0):
+    debug(site)
   debug("=================================")
   # Stop the bot immediately by raising an exception
   flush_screenshot_cache()
@@ -41,12 +69,16 @@ def stop_bot(message = None, notification_string = None, volume = 0.3):
     pygame.mixer.music.play()
   if message is not None:
     debug(f"Bot stopped with message: {message}")
+    # hotkey stops and finished careers aren't failures, nothing to look at
+    if message != "finished":
+      flight_recorder.dump_safely(message)
   raise BotStopException("Bot stopped. If this was not intentional, please report with the logs above.")
 
 Pos = tuple[int, int]                     # (x, y)
 Box = tuple[int, int, int, int]           # (x, y, w, h)
 
-def click(target: Pos | Box, clicks: int = 1, interval: float = 0.1, duration: float = 0.225, text: str = ""):
+@profiler.timed("input")
+def click(target: Pos | Box, clicks: int = 1, interval: float = 0.1, duration: float = 0.225, text: str = "", settle_region: tuple[int, int, int, int] = None):
   if text:
     debug(text)
   if not bot.is_bot_running:
@@ -55,45 +87,43 @@ def click(target: Pos | Box, clicks: int = 1, interval: float = 0.1, duration: f
     return False
   elif len(target) == 2:
     x, y = target
-    if bot.use_adb:
+    if bot.use_adb or bot.use_replay:
       sleep(duration)
       for _ in range(clicks):
-        adb_actions.click(x, y)
+        capture_backend().click(x, y)
         sleep(interval)
     else:
       pyautogui_actions.click(x_y=(x, y), clicks=clicks, interval=interval, duration=duration)
+    record_input("click", clicks, x=int(x), y=int(y))
   elif len(target) == 4:
     x, y, w, h = target
     cx = x + w // 2
     cy = y + h // 2
-    if bot.use_adb:
+    if bot.use_adb or bot.use_replay:
       sleep(duration)
       for _ in range(clicks):
-        adb_actions.click(cx, cy)
+        capture_backend().click(cx, cy)
         sleep(interval)
     else:
       pyautogui_actions.click(x_y=(cx, cy), clicks=clicks, interval=interval, duration=duration)
+    record_input("click", clicks, x=int(cx), y=int(cy))
   else:
     raise TypeError(f"Expected (x, y) or (x, y, w, h) tuple, got type {type(target)}: {target}")
-  if args.device_debug:
-    debug(f"We clicked on {target}, screen might change, flushing screenshot cache.")
-  flush_screenshot_cache()
-  sleep(0.35)
+  settle(0.35, settle_region)
   return True
 
+@profiler.timed("input")
 def swipe(start_x_y : tuple[int, int], end_x_y : tuple[int, int], duration=0.3, text: str = ""):
   if text and args.device_debug:
     debug(text)
   # Swipe from start to end coordinates
   if not bot.is_bot_running:
     stop_bot()
-  if bot.use_adb:
-    adb_actions.swipe(start_x_y[0], start_x_y[1], end_x_y[0], end_x_y[1], duration)
+  if bot.use_adb or bot.use_replay:
+    capture_backend().swipe(start_x_y[0], start_x_y[1], end_x_y[0], end_x_y[1], duration)
   else:
     pyautogui_actions.swipe(start_x_y, end_x_y, duration)
-  if args.device_debug:
-    debug(f"We swiped from {start_x_y} to {end_x_y}, screen might change, flushing screenshot cache.")
-  flush_screenshot_cache()
+  record_input("swipe", start=[int(v) for v in start_x_y], end=[int(v) for v in end_x_y], duration=duration)
   return True
 
 def drag(start_x_y : tuple[int, int], end_x_y : tuple[int, int], duration=0.5, text: str = ""):
@@ -104,9 +134,6 @@ def drag(start_x_y : tuple[int, int], end_x_y : tuple[int, int], duration=0.5, t
     stop_bot()
   swipe(start_x_y, end_x_y, duration)
   click(end_x_y)
-  if args.device_debug:
-    debug(f"We dragged from {start_x_y} to {end_x_y}, screen might change, flushing screenshot cache.")
-  flush_screenshot_cache()
   return True
 
 def long_press(mouse_x_y : tuple[int, int], duration=2.0, text: str = ""):
@@ -116,12 +143,10 @@ def long_press(mouse_x_y : tuple[int, int], duration=2.0, text: str = ""):
   if not bot.is_bot_running:
     stop_bot()
   swipe(mouse_x_y, mouse_x_y, duration)
-  if args.device_debug:
-    debug(f"We long pressed on {mouse_x_y}, screen might change, flushing screenshot cache.")
-  flush_screenshot_cache()
   sleep(0.35)
   return True
 
+@profiler.timed("template")
 def match_cached_templates(cached_templates, region_ltrb=None, threshold=0.85, text: str = "", template_scaling=1.0, stop_after_first_match=False):
   if region_ltrb == None:
     raise ValueError(f"region_ltrb cannot be None")
@@ -130,13 +155,15 @@ def match_cached_templates(cached_templates, region_ltrb=None, threshold=0.85, t
   if args.save_images:
     debug_window(_screenshot, save_name=f"cached_templates_screenshot")
   for name, template in cached_templates.items():
+    # plain asset paths are resolved through the template registry
+    if isinstance(template, str):
+      template = template_registry.get_template(template, template_scaling=template_scaling)
     if args.save_images:
       debug_window(template, save_name=f"{name}_template")
     result = cv2.matchTemplate(_screenshot, template, cv2.TM_CCOEFF_NORMED)
-    loc = np.where(result >= threshold)
     h, w = template.shape[:2]
-    boxes = [(x+region_ltrb[0], y+region_ltrb[1], w, h) for (x, y) in zip(*loc[::-1])]
-    results[name] = deduplicate_boxes(boxes)
+    boxes, _ = find_matches(result, threshold, w, h)
+    results[name] = [(x+region_ltrb[0], y+region_ltrb[1], w, h) for (x, y, w, h) in boxes]
     if stop_after_first_match and len(results[name]) > 0:
       debug(f"Stopping after first match: {name}")
       break
@@ -153,42 +180,82 @@ def multi_match_templates(templates, screenshot: np.ndarray, threshold=0.85, tex
       break
   return results
 
-def match_template(template_path : str, screenshot : np.ndarray, threshold=0.85, text: str = "", grayscale=False, template_scaling=1.0):
+@profiler.timed("template")
+@result_cache.memoize(image_arg=1)
+def match_template(template_path : str, screenshot : np.ndarray, threshold=0.85, text: str = "", grayscale=False, template_scaling=1.0, best_only=False, return_scores=False):
   if text and args.device_debug:
     debug(text)
+  template = template_registry.get_template(template_path, grayscale=grayscale, template_scaling=template_scaling)
   if grayscale:
-    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
     screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2GRAY)
-  else:
-    template = cv2.imread(template_path, cv2.IMREAD_COLOR)  # safe default
-    if template.shape[2] == 4:
-      template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-    template = cv2.cvtColor(template, cv2.COLOR_RGB2BGR)
-  if template_scaling != 1.0:
-    template = cv2.resize(template, (int(template.shape[1] * template_scaling), int(template.shape[0] * template_scaling)))
   if args.save_images:
     template_name = template_path.split("/")[-1].split(".")[0]
     debug_window(template, save_name=f"{template_name}_template")
     debug_window(screenshot, save_name=f"{template_name}_screenshot")
   result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
-  loc = np.where(result >= threshold)
-
   h, w = template.shape[:2]
-  boxes = [(x, y, w, h) for (x, y) in zip(*loc[::-1])]
 
-  return deduplicate_boxes(boxes)
+  if best_only:
+    boxes, scores = best_match(result, threshold, w, h)
+  else:
+    boxes, scores = find_matches(result, threshold, w, h)
+  if return_scores:
+    return boxes, scores
+  return boxes
+
+def best_match(result : np.ndarray, threshold, w, h):
+  # single best peak, no need to collect and suppress every hit above threshold
+  _, max_val, _, max_loc = cv2.minMaxLoc(result)
+  if not max_val >= threshold:
+    return [], []
+  return [(int(max_loc[0]), int(max_loc[1]), w, h)], [float(max_val)]
+
+def find_matches(result : np.ndarray, threshold, w, h, min_dist=5):
+  # only local maxima can win a cluster, drop the rest before the suppression loop
+  window = np.ones((2 * min_dist + 1, 2 * min_dist + 1), np.uint8)
+  peaks = (result >= threshold) & (result >= cv2.dilate(result, window))
+  ys, xs = np.nonzero(peaks)
+  if len(xs) == 0:
+    return [], []
+  boxes = np.empty((len(xs), 4), dtype=np.int64)
+  boxes[:, 0] = xs
+  boxes[:, 1] = ys
+  boxes[:, 2] = w
+  boxes[:, 3] = h
+  return deduplicate_boxes(boxes, result[ys, xs], min_dist=min_dist)
+
+def deduplicate_boxes(boxes_xywh, scores=None, min_dist=5):
+  """
+  Non-maximum suppression over (x, y, w, h) boxes. Boxes whose centers are within
+  min_dist of a better scoring box on both axes are dropped. Without scores the
+  first box in the given order wins, same as the old scan order behaviour.
+
+  Returns (boxes, scores), both in the order the surviving boxes were given.
+  """
+  if len(boxes_xywh) == 0:
+    return [], []
+  boxes = np.asarray(boxes_xywh, dtype=np.int64).reshape(-1, 4)
+  if scores is None:
+    scores = np.zeros(len(boxes), dtype=np.float64)
+  else:
+    scores = np.asarray(scores, dtype=np.float64)
+  centers_x = boxes[:, 0] + boxes[:, 2] // 2
+  centers_y = boxes[:, 1] + boxes[:, 3] // 2
 
-def deduplicate_boxes(boxes_xywh : list[tuple[int, int, int, int]], min_dist=5):
-  # boxes_xywh = (x, y, width, height)
-  filtered = []
-  for x, y, w, h in boxes_xywh:
-    cx, cy = x + w // 2, y + h // 2
-    if all(abs(cx - (fx + fw // 2)) > min_dist or abs(cy - (fy + fh // 2)) > min_dist
-        for fx, fy, fw, fh in filtered):
-      filtered.append((x, y, w, h))
-  return filtered
+  # best first, ties keep their original order
+  order = np.argsort(-scores, kind="stable")
+  keep = []
+  while len(order) > 0:
+    best = order[0]
+    keep.append(best)
+    far = (np.abs(centers_x[order] - centers_x[best]) > min_dist) | (np.abs(centers_y[order] - centers_y[best]) > min_dist)
+    order = order[far]
+  keep.sort()
+  return [tuple(int(v) for v in boxes[i]) for i in keep], [float(scores[i]) for i in keep]
 
-def screenshot(region_xywh : tuple[int, int, int, int] = None, region_ltrb : tuple[int, int, int, int] = None, force_save=False):
+# max_age_ms=0 forces a fresh capture, None uses the backend default
+@profiler.timed("capture")
+def screenshot(region_xywh : tuple[int, int, int, int] = None, region_ltrb : tuple[int, int, int, int] = None, force_save=False, max_age_ms=None):
   if not bot.is_bot_running:
     stop_bot()
 
@@ -205,14 +272,23 @@ def screenshot(region_xywh : tuple[int, int, int, int] = None, region_ltrb : tup
     if args.device_debug:
       debug(f"Screenshot: {constants.GAME_WINDOW_REGION}")
 
-  if bot.use_adb:
+  pinned = getattr(_frame_pin, "frame", None)
+  if pinned is not None and max_age_ms != 0:
+    if args.device_debug:
+      debug(f"Using pinned frame {pinned.frame_id}")
+    screenshot = capture_backend().crop_region(pinned.image, region_xywh)
+  elif bot.use_replay:
+    screenshot = replay_actions.screenshot(region_xywh=region_xywh, force_save=force_save, max_age_ms=max_age_ms)
+  elif bot.use_adb:
     if args.device_debug:
       debug(f"Using ADB screenshot")
-    screenshot = adb_actions.screenshot(region_xywh=region_xywh, force_save=force_save)
+    screenshot = adb_actions.screenshot(region_xywh=region_xywh, force_save=force_save, max_age_ms=max_age_ms)
   else:
     if args.device_debug:
       debug(f"Using PyAutoGUI screenshot")
-    screenshot = pyautogui_actions.screenshot(region_xywh=region_xywh, force_save=force_save)
+    screenshot = pyautogui_actions.screenshot(region_xywh=region_xywh, force_save=force_save, max_age_ms=max_age_ms)
+  if args.record_session is not None:
+    record_capture()
   debug_window(screenshot, save_name="device_screenshot")
   return np.array(screenshot)
 
@@ -225,31 +301,133 @@ def screenshot_match(match, region : tuple[int, int, int, int]):
   )
   return screenshot(region_xywh=screenshot_region)
 
+# wait_for polls this often right after a change, backing off to WAIT_MAX_INTERVAL while the region stays still
+WAIT_MIN_INTERVAL = 0.05
+WAIT_MAX_INTERVAL = 0.3
+WAIT_BACKOFF = 1.5
+# probes are grayscale and at most this wide, a region changed if their mean absolute difference is above the threshold
+PROBE_WIDTH = 96
+PROBE_CHANGE_THRESHOLD = 1.5
+
+def frame_probe(image):
+  """Small grayscale copy of a screenshot for cheap change detection."""
+  image = np.asarray(image)
+  if image.ndim == 3:
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+  height, width = image.shape[:2]
+  if width > PROBE_WIDTH:
+    image = cv2.resize(image, (PROBE_WIDTH, max(1, height * PROBE_WIDTH // width)), interpolation=cv2.INTER_AREA)
+  return image
+
+def probe_changed(previous, current, threshold=PROBE_CHANGE_THRESHOLD):
+  if previous is None or previous.shape != current.shape:
+    return True
+  return cv2.absdiff(previous, current).mean() > threshold
+
+def wait_for(condition, timeout=0, region_ltrb=None, interval=WAIT_MIN_INTERVAL, max_interval=WAIT_MAX_INTERVAL, backoff=WAIT_BACKOFF):
+  """Calls condition(screenshot) of region_ltrb until it returns something truthy or timeout seconds pass,
+  and returns its last result. After the first call it only runs again once the region has changed,
+  fresh captures are taken every interval seconds, growing by backoff up to max_interval while nothing moves."""
+  if region_ltrb is None:
+    region_ltrb = constants.GAME_WINDOW_BBOX
+  start = time()
+  poll_start = perf_counter()
+  sleep_before = wait_stats["sleep"]
+  _screenshot = screenshot(region_ltrb=region_ltrb)
+  result = condition(_screenshot)
+  evaluated_probe = frame_probe(_screenshot) if not result and timeout > 0 else None
+  evaluations = 1
+  delay = interval
+  while not result and time() - start < timeout:
+    sleep(min(delay, max(0.0, timeout - (time() - start))))
+    _screenshot = screenshot(region_ltrb=region_ltrb, max_age_ms=0)
+    probe = frame_probe(_screenshot)
+    # compared to the last evaluated frame so slow fades add up instead of slipping under the threshold
+    if probe_changed(evaluated_probe, probe):
+      evaluated_probe = probe
+      result = condition(_screenshot)
+      evaluations += 1
+      delay = interval
+    else:
+      delay = min(delay * backoff, max_interval)
+  wait_stats["poll"] += perf_counter() - poll_start - (wait_stats["sleep"] - sleep_before)
+  wait_stats["waits"] += 1
+  wait_stats["evaluations"] += evaluations
+  if args.device_debug:
+    debug(f"wait_for: {'done' if result else 'timed out'} after {time() - start:.2f} s, {evaluations} evaluations")
+  return result
+
+# after an input the region is probed this often, it has settled after SETTLE_STABLE_PROBES unchanged probes in a row
+SETTLE_INTERVAL = 0.05
+SETTLE_STABLE_PROBES = 3
+
+def wait_for_settle(max_wait, region_ltrb=None, stable_probes=SETTLE_STABLE_PROBES):
+  """Returns once the region has changed and then stopped changing, or after max_wait seconds.
+  A region that never changes waits the full max_wait, the input may just not have landed yet."""
+  if region_ltrb is None:
+    region_ltrb = constants.GAME_WINDOW_BBOX
+  start = time()
+  deadline = start + max_wait
+  previous = frame_probe(screenshot(region_ltrb=region_ltrb, max_age_ms=0))
+  capture_time = time() - start
+  changed = False
+  stable = 0
+  while time() < deadline:
+    sleep(min(SETTLE_INTERVAL, max(0.0, deadline - time())))
+    remaining = deadline - time()
+    if remaining < capture_time:
+      # another probe would end past max_wait, sleep out what is left instead
+      sleep(max(0.0, remaining))
+      break
+    capture_start = time()
+    probe = frame_probe(screenshot(region_ltrb=region_ltrb, max_age_ms=0))
+    capture_time = time() - capture_start
+    if probe_changed(previous, probe):
+      changed = True
+      stable = 0
+    else:
+      stable += 1
+      if changed and stable >= stable_probes:
+        break
+    previous = probe
+  elapsed = time() - start
+  if args.device_debug:
+    debug(f"wait_for_settle: {'settled' if changed and elapsed < max_wait else 'full wait'} after {elapsed:.2f} of {max_wait:.2f} s")
+  return elapsed
+
+def settle(max_wait, region_ltrb=None):
+  """Delay after an input, max_wait is the fixed delay and with --adaptive-delays only the upper bound."""
+  if args.adaptive_delays and not bot.use_replay:
+    return wait_for_settle(max_wait, region_ltrb)
+  sleep(max_wait)
+  return max_wait
+
+def log_wait_stats():
+  """Logs how the wall time since the last call split into sleeping, polling in wait_for and everything else."""
+  global wait_stats
+  stats, wait_stats = wait_stats, _empty_wait_stats()
+  wall = perf_counter() - stats["start"]
+  working = max(0.0, wall - stats["sleep"] - stats["poll"])
+  debug(f"Turn wall time {wall:.2f} s: {stats['sleep']:.2f} s sleeping, {stats['poll']:.2f} s polling in {stats['waits']} waits "
+        f"({stats['evaluations']} evaluations), {working:.2f} s working.")
+  return stats
+
 def locate(img_path : str, confidence=0.8, min_search_time=0, region_ltrb : tuple[int, int, int, int] = None, text: str = "", template_scaling=1.0):
   if text and args.device_debug:
     debug(text)
   if region_ltrb is None:
     region_ltrb = constants.GAME_WINDOW_BBOX
   time_start = time()
-  _screenshot = screenshot(region_ltrb=region_ltrb)
-  boxes = match_template(img_path, _screenshot, confidence, template_scaling=template_scaling)
-  tries = 1
+  boxes = wait_for(lambda image: match_template(img_path, image, confidence, template_scaling=template_scaling, best_only=True),
+                   timeout=min_search_time, region_ltrb=region_ltrb)
   elapsed_time = time() - time_start
 
-  while len(boxes) < 1 and elapsed_time < min_search_time:
-    tries += 1
-    flush_screenshot_cache()
-    _screenshot = screenshot(region_ltrb=region_ltrb)
-    boxes = match_template(img_path, _screenshot, confidence, template_scaling=template_scaling)
-    sleep(0.5)
-    elapsed_time = time() - time_start
-
   if len(boxes) < 1:
     if min_search_time > 0:
-      debug(f"{img_path} not found after {elapsed_time:.2f} seconds, tried {tries} times")
+      debug(f"{img_path} not found after {elapsed_time:.2f} seconds")
     return None
   if args.device_debug:
-    debug(f"{img_path} found after {elapsed_time:.2f} seconds, tried {tries} times")
+    debug(f"{img_path} found after {elapsed_time:.2f} seconds")
   x, y, w, h = boxes[0]
   offset_x = region_ltrb[0]
   offset_y = region_ltrb[1]
@@ -277,16 +455,76 @@ def locate_and_click(img_path : str, confidence=0.8, min_search_time=0.5, region
     debug(f"locate_and_click: {coordinates}")
 
   if coordinates:
-    click(coordinates, duration=duration)
+    click(coordinates, duration=duration, settle_region=region_ltrb)
     return True
   return False
 
+def capture_backend():
+  if bot.use_replay:
+    return replay_actions
+  return adb_actions if bot.use_adb else pyautogui_actions
+
 def flush_screenshot_cache():
+  # the backends invalidate on their own inputs, this is for screen changes we don't cause
+  # a recognizer retrying inside a frame_scope wants a new frame too, so it drops its pin
+  if getattr(_frame_pin, "frame", None) is not None and _frame_pin.strict:
+    # the screen already moved on to something else, the pinned frame is all this thread gets
+    return
+  _frame_pin.frame = None
+  capture_backend().frame_cache.invalidate("flush")
+
+# frame pinned for the current thread, screenshot() crops from it instead of capturing
+_frame_pin = threading.local()
+
+@profiler.timed("capture")
+def capture_frame(max_age_ms=None):
+  """Full frame from the active backend, for handing to frame_scope."""
+  if not bot.is_bot_running:
+    stop_bot()
+  frame = capture_backend().capture_frame(max_age_ms)
+  if args.record_session is not None:
+    record_capture()
+  return frame
+
+@contextmanager
+def frame_scope(frame, strict=False):
+  """Every screenshot() in this thread reads from frame until the scope ends, a flush or max_age_ms=0.
+  strict scopes ignore flushes, for frames of a screen the bot has already left."""
+  previous = getattr(_frame_pin, "frame", None), getattr(_frame_pin, "strict", False)
+  _frame_pin.frame = frame
+  _frame_pin.strict = strict
+  try:
+    yield frame
+  finally:
+    _frame_pin.frame, _frame_pin.strict = previous
+
+def log_capture_stats():
+  return capture_backend().frame_cache.log_turn_stats()
+
+def session_layout():
   if bot.use_adb:
-    if args.device_debug:
-      debug(f"Flushing ADB screenshot cache")
-    adb_actions.cached_screenshot = []
-  else:
-    if args.device_debug:
-      debug(f"Flushing PyAutoGUI screenshot cache")
-    pyautogui_actions.cached_screenshot = []
+    return "adb"
+  return "window" if constants.OFFSET_APPLIED else "steam"
+
+def record_capture():
+  recorder = session_recorder.recorder
+  if recorder is None:
+    recorder = session_recorder.start(args.record_session or session_recorder.default_session_path(), session_layout())
+  frame = capture_backend().frame_cache.frame
+  if frame is None:
+    return
+  # first caller outside this file and the profiler's wrappers is the one that actually wanted the screenshot
+  caller = sys._getframe(1)
+  while caller is not None and caller.f_code.co_filename in (__file__, profiler.__file__):
+    caller = caller.f_back
+  if caller is not None:
+    caller = f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_code.co_name}:{caller.f_lineno}"
+  recorder.record_frame(frame, caller)
+
+def record_input(event, count=1, **details):
+  # one entry per physical input, replay advances a frame for each of them
+  recorder = session_recorder.recorder
+  if recorder is None:
+    return
+  for _ in range(count):
+    recorder.record_input(event, **details)
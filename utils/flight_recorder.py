@@ -0,0 +1,164 @@
+# keeps the last captured frames and recognizer crops in memory, written to disk only when the bot stops on a failure
+# recording is a reference append, a background thread jpeg encodes the entries so the ring stays small
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+import utils.log as log
+from utils.log import debug, info, warning, args
+
+FLIGHT_DIR_NAME = "flight"
+# anything wider than this, frames and whole-frame crops alike, is downscaled before encoding
+FRAME_WIDTH = 540
+JPEG_QUALITY = 80
+CROP_RING_SIZE = 128
+
+# captures and inputs happen in these, the interesting call site is whoever called into them
+_PLUMBING_FILES = {"frame_cache.py", "device_action_wrapper.py", "adb_actions.py", "pyautogui_actions.py", "replay_actions.py",
+                   "profiler.py", "result_cache.py", "flight_recorder.py", "screenshot.py", "tools.py"}
+
+_frames = deque(maxlen=args.flight_recorder or 1)
+_crops = deque(maxlen=CROP_RING_SIZE)
+_condition = threading.Condition()
+_encoder = None
+_site_labels = {}
+# digest -> entry for the crops currently in the ring, the same pixels are only kept once
+_crop_digests = {}
+# frames are never written into after capture, crops of them can be kept by reference
+_latest_frame_image = None
+
+class Entry:
+  __slots__ = ("kind", "timestamp", "label", "site", "image", "jpeg", "digest")
+
+  def __init__(self, kind, label, site, image, digest=None):
+    self.kind = kind
+    self.timestamp = time.time()
+    self.label = label
+    self.site = site
+    self.image = image
+    self.jpeg = None
+    self.digest = digest
+
+def enabled():
+  return bool(args.flight_recorder)
+
+def _call_site():
+  frame = sys._getframe(2)
+  while frame is not None and os.path.basename(frame.f_code.co_filename) in _PLUMBING_FILES:
+    frame = frame.f_back
+  if frame is None:
+    return "?"
+  key = (frame.f_code, frame.f_lineno)
+  label = _site_labels.get(key)
+  if label is None:
+    label = _site_labels[key] = f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+  return label
+
+def _encode(entry):
+  image = entry.image
+  if image.dtype != np.uint8:
+    image = np.clip(image, 0, 255).astype(np.uint8)
+  if image.shape[1] > FRAME_WIDTH:
+    image = cv2.resize(image, (FRAME_WIDTH, image.shape[0] * FRAME_WIDTH // image.shape[1]), interpolation=cv2.INTER_AREA)
+  if image.ndim == 3:
+    # frames are RGB, jpeg wants BGR
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+  ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+  return buffer.tobytes() if ok else b""
+
+def _encode_pending():
+  while True:
+    with _condition:
+      pending = [entry for ring in (_frames, _crops) for entry in ring if entry.jpeg is None]
+      while not pending:
+        _condition.wait()
+        pending = [entry for ring in (_frames, _crops) for entry in ring if entry.jpeg is None]
+    for entry in pending:
+      try:
+        jpeg = _encode(entry)
+      except Exception as e:
+        debug(f"Flight recorder couldn't encode {entry.label}: {e}")
+        jpeg = b""
+      with _condition:
+        entry.jpeg = jpeg
+        entry.image = None
+
+def _record(ring, kind, image, label, digest=None):
+  global _encoder
+  entry = Entry(kind, label, _call_site(), image, digest)
+  with _condition:
+    if _encoder is None:
+      _encoder = threading.Thread(target=_encode_pending, name="flight-recorder", daemon=True)
+      _encoder.start()
+    if digest is not None:
+      if digest in _crop_digests:
+        return
+      if len(ring) == ring.maxlen and ring[0].digest is not None:
+        _crop_digests.pop(ring[0].digest, None)
+      _crop_digests[digest] = entry
+    ring.append(entry)
+    _condition.notify()
+
+def _is_frame_view(image):
+  base = image
+  while isinstance(base.base, np.ndarray):
+    base = base.base
+  return _latest_frame_image is not None and base is _latest_frame_image
+
+def record_frame(frame):
+  """frame is a frame_cache.Frame, nothing writes into its image after capture so keeping the reference is enough."""
+  global _latest_frame_image
+  if not args.flight_recorder or frame.image is None:
+    return
+  _latest_frame_image = frame.image
+  _record(_frames, "frame", frame.image, f"frame_{frame.frame_id}")
+
+def record_crop(image, label, digest=None):
+  """digest is the hash the caller already has for these pixels, a crop seen again while it is still in the ring is skipped."""
+  if not args.flight_recorder or not isinstance(image, np.ndarray):
+    return
+  if digest is not None and digest in _crop_digests:
+    return
+  # callers may reuse their buffers, crops are copied unless they are a view of the captured frame
+  if not _is_frame_view(image):
+    image = image.copy()
+  _record(_crops, "crop", image, label, digest)
+
+def dump(reason):
+  """Writes both rings to <log dir>/flight/<time>_<reason>/ and returns the directory, None if there was nothing to write."""
+  with _condition:
+    entries = sorted(list(_frames) + list(_crops), key=lambda entry: entry.timestamp)
+  if not entries:
+    return None
+  path = os.path.join(log.log_dir or "logs", FLIGHT_DIR_NAME, f"{time.strftime('%Y%m%d_%H%M%S')}_{reason}")
+  os.makedirs(path, exist_ok=True)
+  index = []
+  for i, entry in enumerate(entries):
+    with _condition:
+      jpeg, image = entry.jpeg, entry.image
+    if jpeg is None:
+      # the encoder hasn't gotten to it yet
+      jpeg = _encode(Entry(entry.kind, entry.label, entry.site, image))
+    safe_label = "".join(c if c.isalnum() or c in "_-" else "_" for c in entry.label)[:60]
+    name = f"{i:03d}_{entry.kind}_{safe_label}.jpg"
+    with open(os.path.join(path, name), "wb") as f:
+      f.write(jpeg)
+    index.append({"file": name, "kind": entry.kind, "time": round(entry.timestamp, 3), "label": entry.label, "site": entry.site})
+  with open(os.path.join(path, "index.json"), "w", encoding="utf-8") as f:
+    json.dump({"reason": reason, "entries": index}, f, indent=1)
+  info(f"Flight recorder: wrote {len(index)} frames and crops to {path}")
+  return path
+
+def dump_safely(reason):
+  # called while the bot is already failing, this must not make it worse
+  try:
+    return dump(reason)
+  except Exception as e:
+    warning(f"Flight recorder dump failed: {e}")
+    return None
@@ -0,0 +1,83 @@
+# versioned cache for captured frames, shared by the capture backends
+import itertools
+import threading
+import time
+
+import utils.flight_recorder as flight_recorder
+from utils.log import debug, args
+
+# frames older than this are never served, even if no input happened in between
+DEFAULT_MAX_AGE_MS = 1000
+
+_frame_ids = itertools.count(1)
+
+class Frame:
+  """A full captured frame with a process-wide monotonic id and its capture time."""
+  __slots__ = ("frame_id", "timestamp", "image")
+
+  def __init__(self, image, timestamp=None):
+    self.frame_id = next(_frame_ids)
+    self.timestamp = time.perf_counter() if timestamp is None else timestamp
+    self.image = image
+
+  def age_ms(self):
+    return (time.perf_counter() - self.timestamp) * 1000
+
+  def __repr__(self):
+    return f"<Frame id={self.frame_id}, age={self.age_ms():.0f}ms, shape={getattr(self.image, 'shape', None)}>"
+
+class FrameCache:
+  def __init__(self, name, max_age_ms=DEFAULT_MAX_AGE_MS):
+    self.name = name
+    self.max_age_ms = max_age_ms
+    self.frame = None
+    self.capture_count = 0
+    self._lock = threading.Lock()
+    self.turn_stats = self._empty_stats()
+
+  @staticmethod
+  def _empty_stats():
+    return {"captures": 0, "hits": 0, "expired": 0, "invalidations": 0}
+
+  def get(self, max_age_ms=None):
+    """Returns the cached frame if it is younger than max_age_ms, otherwise None."""
+    if max_age_ms is None:
+      max_age_ms = self.max_age_ms
+    with self._lock:
+      frame = self.frame
+      if frame is None:
+        return None
+      if max_age_ms is not None and frame.age_ms() > max_age_ms:
+        self.turn_stats["expired"] += 1
+        if args.device_debug:
+          debug(f"[{self.name}] Cached frame {frame.frame_id} is {frame.age_ms():.0f}ms old, max age {max_age_ms}ms.")
+        return None
+      self.turn_stats["hits"] += 1
+      return frame
+
+  def put(self, image):
+    frame = Frame(image)
+    with self._lock:
+      self.frame = frame
+      self.capture_count += 1
+      self.turn_stats["captures"] += 1
+    flight_recorder.record_frame(frame)
+    if args.device_debug:
+      debug(f"[{self.name}] New frame {frame.frame_id}, shape {getattr(image, 'shape', None)}")
+    return frame
+
+  def invalidate(self, reason=""):
+    with self._lock:
+      if self.frame is None:
+        return
+      self.frame = None
+      self.turn_stats["invalidations"] += 1
+    if args.device_debug:
+      debug(f"[{self.name}] Frame cache invalidated: {reason}")
+
+  def log_turn_stats(self):
+    with self._lock:
+      stats = self.turn_stats
+      self.turn_stats = self._empty_stats()
+    debug(f"[{self.name}] Captures this turn: {stats['captures']}, cache hits: {stats['hits']}, expired: {stats['expired']}, invalidated: {stats['invalidations']}.")
+    return stats
@@ -9,6 +9,7 @@ import sys
 import time
 import shutil
 import threading
+from collections import deque
 from logging.handlers import RotatingFileHandler
 import atexit
 import cv2
@@ -32,6 +33,13 @@ parser.add_argument('--limit-turns', type=int, help='Limit the number of turns t
 parser.add_argument('--dry-run-turn', action='store_true', help='Dry run a single turn')
 parser.add_argument('--device-debug', action='store_true', help='Enable device debug logging')
 parser.add_argument('--use-adb', type=str, help='Specify ADB device string')
+parser.add_argument('--replay', type=str, help='Replay a recorded session directory or .npz archive instead of using a device. Use with: py replay.py --replay path')
+parser.add_argument('--replay-layout', choices=['adb', 'steam', 'window'], help='Which backend the replayed frames were recorded with, recorded sessions know this on their own')
+parser.add_argument('--record-session', nargs='?', const='', type=str, default=None, help='Record every distinct captured frame and input to a session directory (default: logs/sessions/<time>)')
+parser.add_argument('--adb-capture', choices=['png', 'raw'], default='png', help='ADB capture mode, raw skips the PNG encode/decode')
+parser.add_argument('--png-compression', type=int, choices=range(10), default=1, metavar='0-9', help='PNG compression level of saved debug images, higher is smaller and slower')
+parser.add_argument('--adaptive-delays', action='store_true', help='Wait for the screen to settle after inputs instead of always sleeping the full delay, the fixed delays become the maximums')
+parser.add_argument('--flight-recorder', type=int, default=32, metavar='FRAMES', help='Keep this many recent frames (and recognizer crops) in memory and write them to logs/flight when the bot stops on an error, 0 disables')
 parser.add_argument('--cm', action='store_true', help='Auto CM races. Use with: py auto_misc.py --cm')
 parser.add_argument('--lr', action='store_true', help='Auto Legend Races. Use with: py auto_misc.py --lr')
 parser.add_argument('--tt', nargs="?", const="hard", type=str, help='Auto team trials. Defaults to hard if used only as --tt. Use with: py auto_misc.py --tt hard/medium/easy')
@@ -62,6 +70,30 @@ else:
 
 # Store save-images flag globally for debug_window function
 SAVE_DEBUG_IMAGES = args.save_images
+# debug lines that need extra work to build check this first
+DEBUG_ENABLED = args.debug is not None
+
+# (code, line) -> "function (file:line)", a call site is formatted once
+_call_site_labels = {}
+
+def call_site(depth=1):
+  """function (file:line) of the caller's caller at depth=1, from the frame objects alone.
+  inspect.stack() reads source files for every frame, this is a dict lookup after the first call."""
+  frame = sys._getframe(depth + 1)
+  key = (frame.f_code, frame.f_lineno)
+  label = _call_site_labels.get(key)
+  if label is None:
+    label = _call_site_labels[key] = f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+  return label
+
+def call_stack(depth=1):
+  """Call sites from the caller's caller outwards, innermost first."""
+  sites = []
+  frame = sys._getframe(depth + 1)
+  while frame is not None:
+    sites.append(f"{frame.f_code.co_name} ({frame.f_code.co_filename}:{frame.f_lineno})")
+    frame = frame.f_back
+  return sites
 
 def _format_floats_in_string(s):
   """Format floats in string to 2 decimal places using pure regex."""
@@ -89,6 +121,10 @@ _debug_img_re = re.compile(
 def debug(message, *args, **kwargs):
   global _debug_img_first, _debug_img_last
 
+  # init_logging lets everything through, without it (core/simulator.py workers) nothing would take the line
+  if not logging.root.isEnabledFor(logging.DEBUG):
+    return
+
   msg = _format_floats_in_string(message)
 
   m = _debug_img_re.match(msg)
@@ -161,20 +197,87 @@ def rotate_and_delete(dir_path):
     daemon=True
   ).start()
 
+# debug images are written by a background thread, if it falls behind the oldest pending images are dropped
+# full screens are ~6 MB each, so the queue is capped by the pixels it holds rather than by count
+DEBUG_IMAGE_QUEUE_BYTES = 256 * 1024 * 1024
+
+_image_queue = deque()
+_image_condition = threading.Condition()
+_image_writer = None
+# queued plus the one being written
+_images_pending = 0
+_pending_image_bytes = 0
+dropped_debug_images = 0
+
+def _write_debug_images():
+  global _images_pending, _pending_image_bytes
+  params = [cv2.IMWRITE_PNG_COMPRESSION, args.png_compression]
+  while True:
+    with _image_condition:
+      while not _image_queue:
+        _image_condition.wait()
+      path, screen = _image_queue.popleft()
+    try:
+      if not cv2.imwrite(path, screen, params):
+        warning(f"Couldn't write debug image {path}")
+    except Exception as e:
+      # one bad image must not take the writer down, the flush would wait on it forever
+      warning(f"Couldn't write debug image {path}: {e}")
+    finally:
+      with _image_condition:
+        _images_pending -= 1
+        _pending_image_bytes -= screen.nbytes
+        _image_condition.notify_all()
+
+def _queue_debug_image(path, screen):
+  global _image_writer, _images_pending, _pending_image_bytes, dropped_debug_images
+  with _image_condition:
+    if _image_writer is None:
+      _image_writer = threading.Thread(target=_write_debug_images, name="debug-image-writer", daemon=True)
+      _image_writer.start()
+    # the image being written stays counted until it is done, only queued ones can be dropped
+    while _image_queue and _pending_image_bytes + screen.nbytes > DEBUG_IMAGE_QUEUE_BYTES:
+      _, dropped = _image_queue.popleft()
+      _images_pending -= 1
+      _pending_image_bytes -= dropped.nbytes
+      dropped_debug_images += 1
+    _images_pending += 1
+    _pending_image_bytes += screen.nbytes
+    _image_queue.append((path, screen))
+    _image_condition.notify_all()
+
+def flush_debug_image_queue(timeout=10):
+  """Waits until the writer has caught up, at exit pending images would be lost otherwise."""
+  deadline = time.time() + timeout
+  with _image_condition:
+    while _images_pending and time.time() < deadline:
+      _image_condition.wait(0.1)
+  if dropped_debug_images:
+    logging.debug(f"Dropped {dropped_debug_images} debug images, the writer couldn't keep up.")
+
+atexit.register(flush_debug_image_queue)
+
 debug_image_counter = 0
+_debug_image_counter_lock = threading.Lock()
 def debug_window(screen, wait_timer=0, x=-1400, y=-100, save_name=None, show_on_screen=False, force_save=False):
+  save = save_name and (SAVE_DEBUG_IMAGES or force_save)
+  if not save and not show_on_screen:
+    return
+  # a copy, the caller is free to reuse its buffer before the writer gets to it
   screen = np.array(screen)
 
-  if save_name and (SAVE_DEBUG_IMAGES or force_save):
+  if save:
   # Save with global counter to avoid overwriting
     global debug_image_counter
     base_name = save_name.rsplit('.', 1)[0]  # Remove extension if present
-    debug(f"Saving debug image: {debug_image_counter}_{base_name}.png")
+    with _debug_image_counter_lock:
+      counter = debug_image_counter
+      debug_image_counter += 1
+    debug(f"Saving debug image: {counter}_{base_name}.png")
     if bot.hotkey == "f1":
-      cv2.imwrite(f"logs/images/{debug_image_counter}_{base_name}.png", screen)
+      _queue_debug_image(f"logs/images/{counter}_{base_name}.png", screen)
     else:
-      cv2.imwrite(f"logs/{bot.hotkey}/images/{debug_image_counter}_{base_name}.png", screen)
-    debug_image_counter += 1
+      _queue_debug_image(f"logs/{bot.hotkey}/images/{counter}_{base_name}.png", screen)
 
   if show_on_screen:
     debug(f"Showing debug image: {save_name}")
@@ -0,0 +1,176 @@
+# per turn wall time by phase: capture, template, ocr, preprocessing, decision, input and sleep
+# nested phases only count their own time, a template match that captures its screenshot is split between the two
+# cheap enough to stay on: two perf_counter calls, a frame lookup and a locked dict update per instrumented call
+import functools
+import json
+import os
+import sys
+import threading
+from time import perf_counter
+
+import utils.log as log
+from utils.log import debug, info
+
+TIMINGS_NAME = "turn_timings.jsonl"
+# call sites listed per phase in the career summary
+SUMMARY_SITES = 5
+# sleep()/settle() call sites listed in the career sleep budget
+SUMMARY_SLEEP_SITES = 15
+
+_local = threading.local()
+_lock = threading.Lock()
+# the thread running the career loop, work on pool threads overlaps its wall time
+_loop_thread = None
+
+def _empty_totals():
+  return {"wall_ms": 0.0, "loop_ms": 0.0, "phases": {}, "sites": {}}
+
+_turn = _empty_totals()
+_turn_start = perf_counter()
+_turn_count = 0
+career = _empty_totals()
+# "function (file:line)" -> [seconds, calls] of tools.sleep / tools.settle for the whole career
+sleep_budget = {}
+
+def _stack():
+  stack = getattr(_local, "stack", None)
+  if stack is None:
+    stack = _local.stack = []
+  return stack
+
+def _call_site(name, depth):
+  # thin wrappers share the name of what they wrap (tools.sleep -> device_action.sleep), the site is past them
+  caller = sys._getframe(depth)
+  while caller is not None and caller.f_code.co_name == name:
+    caller = caller.f_back
+  return caller.f_code.co_name if caller is not None else "?"
+
+def _add(totals, phase, site, self_ms, on_loop):
+  entry = totals["phases"].get(phase)
+  if entry is None:
+    entry = totals["phases"][phase] = {"ms": 0.0, "calls": 0}
+  entry["ms"] += self_ms
+  entry["calls"] += 1
+  site_entry = totals["sites"].get(site)
+  if site_entry is None:
+    site_entry = totals["sites"][site] = {"phase": phase, "ms": 0.0, "calls": 0}
+  site_entry["ms"] += self_ms
+  site_entry["calls"] += 1
+  if on_loop:
+    totals["loop_ms"] += self_ms
+
+def _record(phase, site, start):
+  elapsed = perf_counter() - start
+  stack = _stack()
+  child = stack.pop()
+  if stack:
+    stack[-1] += elapsed
+  with _lock:
+    _add(_turn, phase, site, (elapsed - child) * 1000, threading.get_ident() == _loop_thread)
+
+def timed(phase, label=None):
+  """Decorator counting every call of the function towards phase, per call site."""
+  def decorator(func):
+    name = func.__name__
+    site_name = label or name
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      site = f"{site_name} <- {_call_site(name, 2)}"
+      _stack().append(0.0)
+      start = perf_counter()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        _record(phase, site, start)
+    return wrapper
+  return decorator
+
+class phase:
+  """with profiler.phase("decision"): ... for code that isn't a single function."""
+  __slots__ = ("name", "site", "start")
+
+  def __init__(self, name, site=None):
+    self.name = name
+    self.site = site or f"{name} <- {_call_site(name, 2)}"
+
+  def __enter__(self):
+    _stack().append(0.0)
+    self.start = perf_counter()
+    return self
+
+  def __exit__(self, *exc):
+    _record(self.name, self.site, self.start)
+    return False
+
+def record_sleep(site, seconds):
+  with _lock:
+    entry = sleep_budget.get(site)
+    if entry is None:
+      entry = sleep_budget[site] = [0.0, 0]
+    entry[0] += seconds
+    entry[1] += 1
+
+def start_career():
+  """Resets the career totals, the calling thread is the one whose wall time turns are measured in."""
+  global _loop_thread, _turn, _turn_start, _turn_count, career, sleep_budget
+  _loop_thread = threading.get_ident()
+  with _lock:
+    _turn = _empty_totals()
+    career = _empty_totals()
+    sleep_budget = {}
+  _turn_start = perf_counter()
+  _turn_count = 0
+
+def _merge(totals, turn):
+  totals["wall_ms"] += turn["wall_ms"]
+  totals["loop_ms"] += turn["loop_ms"]
+  for key in ("phases", "sites"):
+    for name, entry in turn[key].items():
+      target = totals[key].setdefault(name, {**entry, "ms": 0.0, "calls": 0})
+      target["ms"] += entry["ms"]
+      target["calls"] += entry["calls"]
+
+def end_turn(**details):
+  """Closes the current turn, appends its record to logs/turn_timings.jsonl and returns it."""
+  global _turn, _turn_start, _turn_count
+  now = perf_counter()
+  with _lock:
+    turn, _turn = _turn, _empty_totals()
+  turn["wall_ms"] = (now - _turn_start) * 1000
+  _turn_start = now
+  _turn_count += 1
+  _merge(career, turn)
+
+  record = {
+    "turn": _turn_count,
+    **details,
+    "wall_ms": round(turn["wall_ms"], 1),
+    "unattributed_ms": round(max(0.0, turn["wall_ms"] - turn["loop_ms"]), 1),
+    "phases": {name: {"ms": round(entry["ms"], 1), "calls": entry["calls"]} for name, entry in turn["phases"].items()},
+    "sites": {site: {"phase": entry["phase"], "ms": round(entry["ms"], 1), "calls": entry["calls"]}
+              for site, entry in sorted(turn["sites"].items(), key=lambda item: -item[1]["ms"])},
+  }
+  try:
+    with open(os.path.join(log.log_dir or "logs", TIMINGS_NAME), "a", encoding="utf-8") as f:
+      f.write(json.dumps(record) + "\n")
+  except OSError as e:
+    debug(f"Couldn't write turn timings: {e}")
+  phases = ", ".join(f"{name} {entry['ms']:.0f}" for name, entry in sorted(turn["phases"].items(), key=lambda item: -item[1]["ms"]))
+  debug(f"Turn {_turn_count} took {turn['wall_ms']:.0f} ms: {phases}, unattributed {record['unattributed_ms']:.0f} (ms, pool threads overlap).")
+  return record
+
+def career_summary():
+  if _turn_count == 0:
+    return
+  wall = career["wall_ms"]
+  info(f"Career timing: {_turn_count} turns, {wall / 1000:.1f} s, {wall / _turn_count / 1000:.2f} s per turn.")
+  for name, entry in sorted(career["phases"].items(), key=lambda item: -item[1]["ms"]):
+    sites = sorted(((site, site_entry) for site, site_entry in career["sites"].items() if site_entry["phase"] == name), key=lambda item: -item[1]["ms"])
+    top = ", ".join(f"{site} {site_entry['ms'] / 1000:.1f} s" for site, site_entry in sites[:SUMMARY_SITES])
+    info(f"  {name}: {entry['ms'] / 1000:.1f} s ({entry['ms'] / wall * 100:.0f}% of wall), {entry['calls']} calls. Top: {top}")
+  info(f"  unattributed on the loop thread: {max(0.0, wall - career['loop_ms']) / 1000:.1f} s")
+  if sleep_budget:
+    total = sum(seconds for seconds, _ in sleep_budget.values())
+    info(f"Sleep budget: {total:.1f} s in {sum(calls for _, calls in sleep_budget.values())} sleep/settle calls, by caller:")
+    for site, (seconds, calls) in sorted(sleep_budget.items(), key=lambda item: -item[1][0])[:SUMMARY_SLEEP_SITES]:
+      info(f"  {site}: {seconds:.1f} s, {calls} calls, {seconds / calls:.2f} s each")
@@ -5,6 +5,8 @@ from utils.log import debug, warning, error, info, debug_window, args
 import core.bot as bot
 import numpy as np
 import cv2
+import threading
+from utils.frame_cache import FrameCache
 
 # bot.windows_window.width and bot.windows_window.height is screen resolution
 # world is 1080p, screen is arbitrary
@@ -92,6 +94,7 @@ def click(x_y : tuple[int, int], clicks: int = 1, interval: float = 0.1, duratio
   else:
     x, y = x_y[0], x_y[1]
   pyautogui.click(x, y, clicks=clicks, interval=interval, duration=duration)
+  frame_cache.invalidate("click")
   return True
 
 def swipe(start_x_y : tuple[int, int], end_x_y : tuple[int, int], duration=0.3):
@@ -106,20 +109,24 @@ def swipe(start_x_y : tuple[int, int], end_x_y : tuple[int, int], duration=0.3):
   hold()
   pyautogui.moveTo(end_x, end_y, duration=duration-delay_to_first_move)
   release()
+  frame_cache.invalidate("swipe")
   return True
 
 def moveTo(x, y, duration=0.2):
   if CONVERSION_PARAMS is not None:
     x, y = screen_space_to_world(x, y)
   pyautogui.moveTo(x, y, duration=duration)
+  frame_cache.invalidate("move")
   return True
 
 def hold():
   pyautogui.mouseDown()
+  frame_cache.invalidate("mouse down")
   return True
 
 def release():
   pyautogui.mouseUp()
+  frame_cache.invalidate("mouse up")
   return True
 
 def crop_screenshot(screenshot, pixel_crop_amount):
@@ -140,57 +147,118 @@ def scale_screenshot(screenshot, scaling_factor):
     scale_first = screenshot.shape[1]
   return cv2.resize(screenshot, (scale_first, scale_second), interpolation=cv2.INTER_AREA)
 
-cached_screenshot = []
-def screenshot(region_xywh : tuple[int, int, int, int] = None, force_save=False):
-  global cached_screenshot
-  screenshot = None
+frame_cache = FrameCache("pyautogui")
+# regions up to this fraction of the window are grabbed on their own when there's no cached frame
+ROI_CAPTURE_MAX_FRACTION = 0.25
+
+# mss handles are tied to the thread that created them, so every thread keeps its own
+_grabbers = threading.local()
+def get_grabber():
+  sct = getattr(_grabbers, "sct", None)
+  if sct is None:
+    sct = mss.mss()
+    _grabbers.sct = sct
+  return sct
+
+def get_window_region():
+  if bot.windows_window:
+    return {
+      "left": bot.windows_window.left,
+      "top": bot.windows_window.top,
+      "width": bot.windows_window.width,
+      "height": bot.windows_window.height
+    }
+  raise Exception("Couldn't find the windows_window somehow, please report this error.")
+
+def grab(region):
+  # mss gives BGRA, the array is a view on the grab buffer until cvtColor makes the RGB copy
+  return cv2.cvtColor(np.asarray(get_grabber().grab(region)), cv2.COLOR_BGRA2RGB)
+
+def capture_frame(max_age_ms=None):
+  frame = frame_cache.get(max_age_ms)
+  if frame is not None:
+    if args.device_debug:
+      debug(f"Using cached screenshot")
+    return frame
+  return new_frame()
+
+def new_frame():
+  window_region = get_window_region()
+  if args.device_debug:
+    debug(f"Taking new screenshot")
+  return frame_cache.put(grab(window_region))
+
+def world_region(region_xywh : tuple[int, int, int, int]):
+  x, y, w, h = region_xywh
+  debug(f"requested region: ({x},{y},{x+w},{y+h})")
+  x1, y1 = screen_space_to_world(x+w, y+h)
+  x, y = screen_space_to_world(x, y)
+  if CONVERSION_PARAMS is not None and CONVERSION_PARAMS["scale"] < 1:
+    if x == x1:
+      x1 = x + 1
+    if y == y1:
+      y1 = y + 1
+  debug(f"screenshotted region: ({x},{y},{x1},{y1})")
+  return x, y, x1, y1
+
+def scale_region(screenshot, force_save=False):
+  debug_window(screenshot, save_name="pyautogui_screenshot", force_save=force_save)
+  if CONVERSION_PARAMS is not None:
+    screenshot = scale_screenshot(screenshot, CONVERSION_PARAMS["scale"])
+    debug_window(screenshot, save_name="pyautogui_screenshot_scaled", force_save=force_save)
+  return screenshot
+
+def crop_region(screenshot, region_xywh : tuple[int, int, int, int] = None, force_save=False):
+  if not region_xywh:
+    region_xywh = GAME_WINDOW_REGION
+  # crop screenshot to region_xywh
+  if region_xywh:
+    x, y, x1, y1 = world_region(region_xywh)
+    screenshot = scale_region(screenshot[y:y1, x:x1], force_save=force_save)
+  return screenshot
+
+def capture_roi(region_xywh : tuple[int, int, int, int], force_save=False):
+  """Grabs only the requested region, returns None if it's big enough that a full frame is the better deal."""
+  window_region = get_window_region()
+  x, y, x1, y1 = world_region(region_xywh)
+  # clip like slicing the full frame would
+  x, x1 = max(x, 0), min(x1, window_region["width"])
+  y, y1 = max(y, 0), min(y1, window_region["height"])
+  if x1 <= x or y1 <= y:
+    return None
+  if (x1 - x) * (y1 - y) > window_region["width"] * window_region["height"] * ROI_CAPTURE_MAX_FRACTION:
+    return None
+  if args.device_debug:
+    debug(f"Taking region screenshot")
+  screenshot = grab({
+    "left": window_region["left"] + x,
+    "top": window_region["top"] + y,
+    "width": x1 - x,
+    "height": y1 - y
+  })
+  return scale_region(screenshot, force_save=force_save)
+
+def screenshot(region_xywh : tuple[int, int, int, int] = None, force_save=False, max_age_ms=None):
   if not region_xywh:
     region_xywh = GAME_WINDOW_REGION
   if args.device_debug:
     debug(f"Screenshot region: {region_xywh}")
-  if len(cached_screenshot) > 0:
-    if args.device_debug:
-      debug(f"Using cached screenshot")
-    screenshot = cached_screenshot
-  else:
-    if bot.windows_window:
-      window_x, window_y = bot.windows_window.left, bot.windows_window.top
-      window_width, window_height = bot.windows_window.width, bot.windows_window.height
-    else:
-      raise Exception("Couldn't find the windows_window somehow, please report this error.")
-    window_region = {
-      "left": window_x,
-      "top": window_y,
-      "width": window_width,
-      "height": window_height
-    }
-    with mss.mss() as sct:
-      if args.device_debug:
-        debug(f"Taking new screenshot")
-      # take screenshot as BGRA
-      screenshot = np.array(sct.grab(window_region))
-      screenshot = cv2.cvtColor(screenshot, cv2.COLOR_BGRA2RGB)
+
+  frame = frame_cache.get(max_age_ms)
+  if frame is None:
+    # small probes on a cold cache don't need the whole window, unless we're recording full frames
+    if not force_save and args.record_session is None:
+      screenshot = capture_roi(region_xywh)
+      if screenshot is not None:
+        return screenshot
+    frame = new_frame()
+  elif args.device_debug:
+    debug(f"Using cached screenshot")
+  screenshot = frame.image
 
   if force_save:
     debug_window(screenshot, save_name="pyautogui_screenshot", force_save=force_save)
-  cached_screenshot = screenshot
 
-  # crop screenshot to region_xywh
-  if region_xywh:
-    x, y, w, h = region_xywh
-    debug(f"requested region: ({x},{y},{x+w},{y+h})")
-    x1, y1 = screen_space_to_world(x+w, y+h)
-    x, y = screen_space_to_world(x, y)
-    if CONVERSION_PARAMS is not None and CONVERSION_PARAMS["scale"] < 1:
-      if x == x1:
-        x1 = x + 1
-      if y == y1:
-        y1 = y + 1
-    debug(f"screenshotted region: ({x},{y},{x1},{y1})")
-    screenshot = screenshot[y:y1, x:x1]
-    debug_window(screenshot, save_name="pyautogui_screenshot", force_save=force_save)
-    if CONVERSION_PARAMS is not None:
-      screenshot = scale_screenshot(screenshot, CONVERSION_PARAMS["scale"])
-      debug_window(screenshot, save_name="pyautogui_screenshot_scaled", force_save=force_save)
+  screenshot = crop_region(screenshot, region_xywh, force_save=force_save)
   #debug_window(screenshot, save_name=f"pyautogui_screenshot_{x}_{y}_{w}_{h}")
   return screenshot
@@ -0,0 +1,131 @@
+# offline backend, serves recorded frames and logs inputs instead of sending them
+# frames are full game screenshots in the same layout as the backend they were recorded with
+import os
+import time
+
+import cv2
+import numpy as np
+
+import core.bot as bot
+from utils.log import info, debug, debug_window, args
+from utils.frame_cache import FrameCache
+import utils.session_recorder as session_recorder
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+session_path = None
+# layout stored by the session recorder, None for plain screenshot folders
+session_layout = None
+frames = []
+frame_index = 0
+input_log = []
+turn_records = []
+
+# virtual clock, sleeps advance it instead of blocking so a replay runs as fast as the cpu allows
+virtual_now = 0.0
+_turn_start = None
+
+# recorded frames only change on input, so they never go stale
+frame_cache = FrameCache("replay", max_age_ms=None)
+
+def load_session(path):
+  """Loads a recorded session, a directory of screenshots (sorted by name) or an .npz archive (sorted by key, RGB arrays)."""
+  global session_path, session_layout, frames, frame_index, input_log, turn_records, virtual_now, _turn_start
+  session_layout = None
+  if os.path.isfile(os.path.join(path, session_recorder.INDEX_NAME)):
+    index, recorded_frames = session_recorder.load_session(path)
+    frames = session_recorder.replay_frames(index, recorded_frames)
+    session_layout = index.get("layout")
+  elif os.path.isdir(path):
+    names = sorted(name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+    frames = [os.path.join(path, name) for name in names]
+  elif path.endswith(".npz"):
+    archive = np.load(path)
+    frames = [archive[key] for key in sorted(archive.files)]
+  else:
+    raise ValueError(f"Replay session must be a directory of images or an .npz archive: {path}")
+  if len(frames) == 0:
+    raise ValueError(f"Replay session has no frames: {path}")
+  session_path = path
+  frame_index = 0
+  input_log = []
+  turn_records = []
+  virtual_now = 0.0
+  _turn_start = (time.process_time(), virtual_now, frame_index)
+  frame_cache.invalidate("session loaded")
+  info(f"Loaded replay session {path} with {len(frames)} frames.")
+  return len(frames)
+
+def _decode(frame):
+  if isinstance(frame, np.ndarray):
+    return frame
+  image = cv2.imread(frame, cv2.IMREAD_COLOR)
+  if image is None:
+    raise ValueError(f"Couldn't decode replay frame: {frame}")
+  # recorded pngs are written by cv2, screenshots are RGB
+  return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+def advance(event, **details):
+  global frame_index
+  input_log.append({"frame": frame_index, "time": round(virtual_now, 3), "event": event, **details})
+  if args.device_debug:
+    debug(f"[replay] {event} {details} on frame {frame_index}")
+  frame_cache.invalidate(event)
+  if frame_index + 1 >= len(frames):
+    info(f"Replay reached the last frame after {len(input_log)} inputs.")
+    # the wrapper turns this into a BotStopException on the next call
+    bot.is_bot_running = False
+    return
+  frame_index += 1
+
+def click(x, y):
+  advance("click", x=int(x), y=int(y))
+  return True
+
+def swipe(x1, y1, x2, y2, duration=0.3):
+  advance("swipe", start=(int(x1), int(y1)), end=(int(x2), int(y2)), duration=duration)
+  return True
+
+def text(content):
+  advance("text", content=content)
+  return True
+
+def sleep(seconds):
+  global virtual_now
+  virtual_now += seconds
+
+def time_now():
+  return virtual_now
+
+def capture_frame(max_age_ms=None):
+  frame = frame_cache.get(max_age_ms)
+  if frame is not None:
+    return frame
+  return frame_cache.put(_decode(frames[frame_index]))
+
+def crop_region(screenshot, region_xywh: tuple[int, int, int, int] = None):
+  if region_xywh:
+    x, y, w, h = region_xywh
+    screenshot = screenshot[y:y+h, x:x+w]
+  return screenshot
+
+def screenshot(region_xywh: tuple[int, int, int, int] = None, force_save=False, max_age_ms=None):
+  screenshot = capture_frame(max_age_ms).image
+  if force_save:
+    debug_window(screenshot, save_name="replay_screenshot", force_save=force_save)
+  return crop_region(screenshot, region_xywh)
+
+def mark_turn():
+  """Closes the current turn's record, cpu time is process time so it isn't skewed by other load."""
+  global _turn_start
+  cpu_start, virtual_start, frame_start = _turn_start
+  record = {
+    "turn": len(turn_records) + 1,
+    "process_time": time.process_time() - cpu_start,
+    "virtual_time": virtual_now - virtual_start,
+    "frames": frame_index - frame_start,
+  }
+  turn_records.append(record)
+  _turn_start = (time.process_time(), virtual_now, frame_index)
+  info(f"[replay] Turn {record['turn']}: {record['process_time']*1000:.0f} ms cpu, {record['virtual_time']:.1f} s virtual, {record['frames']} frames.")
+  return record
@@ -0,0 +1,136 @@
+# memoizes recognizer results on the exact pixels they were given
+import copy
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import utils.flight_recorder as flight_recorder
+from utils.log import debug
+
+# results are small (strings, box lists), the cap mostly bounds the key/bookkeeping overhead
+MAX_BYTES = 8 * 1024 * 1024
+ENTRY_OVERHEAD = 200
+
+_entries = OrderedDict()
+_bytes = 0
+_lock = threading.Lock()
+
+# (function, caller) -> counters, per turn ones are reset by log_stats
+turn_stats = {}
+total_stats = {}
+
+# decorators stacked on top of memoize (profiler.timed) sit between a recognizer and its caller
+_WRAPPER_FILES = {"profiler.py", "result_cache.py"}
+
+def _caller():
+  frame = sys._getframe(2)
+  while frame is not None and os.path.basename(frame.f_code.co_filename) in _WRAPPER_FILES:
+    frame = frame.f_back
+  return frame.f_code.co_name if frame is not None else "?"
+
+def _empty_stats():
+  return {"hits": 0, "misses": 0, "saved_ms": 0.0}
+
+def _size_of(value):
+  if isinstance(value, (list, tuple)):
+    return sys.getsizeof(value) + sum(_size_of(item) for item in value)
+  if isinstance(value, dict):
+    return sys.getsizeof(value) + sum(_size_of(k) + _size_of(v) for k, v in value.items())
+  return sys.getsizeof(value)
+
+def hash_image(image):
+  image = np.ascontiguousarray(image)
+  digest = hashlib.blake2b(image.data, digest_size=16)
+  digest.update(f"{image.shape}{image.dtype}".encode())
+  return digest.hexdigest()
+
+def _count(label, hit, saved_ms=0.0):
+  # recognizers run on the state_pool threads, unlocked += would lose counts
+  with _lock:
+    for stats in (turn_stats, total_stats):
+      entry = stats.get(label)
+      if entry is None:
+        entry = stats[label] = _empty_stats()
+      if hit:
+        entry["hits"] += 1
+        entry["saved_ms"] += saved_ms
+      else:
+        entry["misses"] += 1
+
+def _store(key, value, cost_ms):
+  global _bytes
+  size = _size_of(value) + ENTRY_OVERHEAD
+  with _lock:
+    old = _entries.pop(key, None)
+    if old is not None:
+      _bytes -= old[2]
+    _entries[key] = (value, cost_ms, size)
+    _bytes += size
+    while _bytes > MAX_BYTES and _entries:
+      _, (_, _, evicted_size) = _entries.popitem(last=False)
+      _bytes -= evicted_size
+
+def _lookup(key):
+  with _lock:
+    entry = _entries.get(key)
+    if entry is not None:
+      _entries.move_to_end(key)
+    return entry
+
+def memoize(image_arg=0):
+  """Caches a recognizer on a hash of its image argument plus every other argument.
+  Returned containers are copies, callers are free to modify them."""
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      image = args[image_arg] if len(args) > image_arg else None
+      if image is None:
+        return func(*args, **kwargs)
+      other_args = args[:image_arg] + args[image_arg + 1:]
+      pixels = np.asarray(image)
+      digest = hash_image(pixels)
+      key = (func.__qualname__, digest, repr(other_args), repr(sorted(kwargs.items())))
+      caller = _caller()
+      label = f"{func.__name__} <- {caller}"
+      # every recognizer input passes through here, hit or miss, the recorder skips pixels it already holds
+      flight_recorder.record_crop(pixels, label, digest)
+
+      entry = _lookup(key)
+      if entry is not None:
+        _count(label, True, entry[1])
+        return copy.deepcopy(entry[0])
+      start = time.perf_counter()
+      value = func(*args, **kwargs)
+      _store(key, value, (time.perf_counter() - start) * 1000)
+      _count(label, False)
+      return copy.deepcopy(value)
+    return wrapper
+  return decorator
+
+def clear():
+  global _bytes
+  with _lock:
+    _entries.clear()
+    _bytes = 0
+
+def log_stats():
+  global turn_stats
+  with _lock:
+    stats, turn_stats = turn_stats, {}
+    totals = {label: dict(total_stats[label]) for label in stats}
+  if not stats:
+    return stats
+  # biggest savers first, that's what we want to know about
+  for label, entry in sorted(stats.items(), key=lambda item: -item[1]["saved_ms"]):
+    total = totals[label]
+    calls = total["hits"] + total["misses"]
+    debug(f"Result cache {label}: {entry['hits']} hits, {entry['misses']} misses, {entry['saved_ms']:.0f} ms saved this turn "
+          f"({total['hits']}/{calls} hits, {total['saved_ms']:.0f} ms saved total).")
+  debug(f"Result cache holds {len(_entries)} entries, {_bytes / 1024:.0f} KiB.")
+  return stats
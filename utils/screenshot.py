@@ -3,10 +3,12 @@ import mss
 import numpy as np
 import cv2
 import utils.device_action_wrapper as device_actions
+import utils.profiler as profiler
 import core.bot as bot
 from utils.log import debug_window, debug, args
 
 
+@profiler.timed("preprocessing")
 def enhanced_screenshot(region=(0, 0, 1920, 1080), debug_flag=False) -> Image.Image:
   if args.device_debug:
     debug_flag = True
@@ -26,6 +28,7 @@ def enhanced_screenshot(region=(0, 0, 1920, 1080), debug_flag=False) -> Image.Im
 
   return pil_img
 
+@profiler.timed("preprocessing")
 def enhance_image_for_ocr(image, resize_factor=3, binarize_threshold=250, debug_flag=False):
   if args.device_debug:
     debug_flag = True
@@ -91,35 +94,73 @@ def binarize_between_colors(img, min_color=[0,0,0], max_color=[255,255,255], ena
     debug(f"Binarize between colors: binary: {binary}")
   return binary
 
-def clean_noise(img, enable_debug=False):
+# stat gain text is drawn in a narrow yellow/orange range, components smaller than this are background specks
+SEGMENT_MIN_COMPONENT_AREA = 10
+# text never covers more of the region than this, above it the color box caught background and grabcut has to decide
+# there's no lower bound, the mask is a superset of what grabcut keeps so an empty mask means an empty region
+SEGMENT_MAX_FOREGROUND = 0.35
+
+@profiler.timed("preprocessing")
+def segment_between_colors(img, min_color, max_color, mask_area=2, min_area=SEGMENT_MIN_COMPONENT_AREA, enable_debug=False):
+  """Fast stand-in for custom_grabcut followed by binarize_between_colors on text of a known color.
+  Returns the text mask (white on black), or None if it doesn't look like text and grabcut should be used."""
   if args.device_debug:
     enable_debug = True
-  kernel = np.ones((2, 2), np.uint8)
-  img = cv2.erode(img, kernel, iterations=1, anchor=(1,1))
-  img = cv2.erode(img, kernel, iterations=1, anchor=(0,0))
-  if enable_debug:
-    debug_window(img, save_name="clean_noise_eroded_1")
-  img = cv2.dilate(img, kernel, iterations=1, anchor=(0,0))
-  img = cv2.dilate(img, kernel, iterations=1, anchor=(1,1))
-  if enable_debug:
-    debug_window(img, save_name="clean_noise_dilated_1")
-  reduced = cv2.erode(img, kernel, iterations=1, anchor=(0,0))
-  reduced = cv2.erode(img, kernel, iterations=1, anchor=(1,1))
+  mask = cv2.inRange(img, np.array(min_color), np.array(max_color))
+  # grabcut treats everything outside its rectangle as background
+  if mask_area > 0:
+    mask[:mask_area] = 0
+    mask[-mask_area:] = 0
+    mask[:, :mask_area] = 0
+    mask[:, -mask_area:] = 0
+  n, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+  keep = stats[:, cv2.CC_STAT_AREA] >= min_area
+  keep[0] = False
+  if n > 1 and not np.all(keep[1:]):
+    mask = np.where(keep[labels], 255, 0).astype(np.uint8)
+
+  inner_height = mask.shape[0] - mask_area * 2
+  foreground = np.count_nonzero(mask) / mask.size
+  too_tall = np.any(stats[keep, cv2.CC_STAT_HEIGHT] >= inner_height)
   if enable_debug:
-    debug_window(reduced, save_name="clean_noise_eroded_2")
-  restored = cv2.dilate(reduced, kernel, iterations=1, anchor=(1,1))
-  restored = cv2.dilate(reduced, kernel, iterations=1, anchor=(0,0))
+    debug(f"segment_between_colors: {np.count_nonzero(keep)} components, foreground {foreground:.3f}, too tall: {too_tall}")
+    debug_window(mask, save_name="segment_between_colors")
+  if foreground > SEGMENT_MAX_FOREGROUND or too_tall:
+    return None
+  return mask
+
+CLEAN_NOISE_KERNEL = np.ones((3, 3), np.uint8)
+@profiler.timed("preprocessing")
+def clean_noise(img, enable_debug=False):
+  # opening with a 3x3 square, the old chain of 2x2 erode/dilate calls with alternating anchors came down to the same thing
+  if args.device_debug:
+    enable_debug = True
+  opened = cv2.morphologyEx(img, cv2.MORPH_OPEN, CLEAN_NOISE_KERNEL)
   if enable_debug:
-    debug_window(restored, save_name="clean_noise_dilated_2")
-  binarized = cv2.threshold(restored, 245, 255, cv2.THRESH_BINARY)[1]
+    debug_window(opened, save_name="clean_noise_opened")
+  binarized = cv2.threshold(opened, 245, 255, cv2.THRESH_BINARY)[1]
   clean = cv2.GaussianBlur(binarized, (3,3), 0)
   if enable_debug:
     debug_window(clean, save_name="clean_noise_blurred")
   return clean
 
+def _solid_spans(filled, lines, starts, ends, offsets):
+  """For every component, whether any of lines + offsets is all white between starts and ends.
+  filled is the image == 255 with the lines along axis 0, checks outside of the image never pass."""
+  prefix = np.zeros((filled.shape[0], filled.shape[1] + 1), dtype=np.int32)
+  np.cumsum(filled, axis=1, out=prefix[:, 1:])
+  lines = lines[:, np.newaxis] + offsets[np.newaxis, :]
+  inside = (lines >= 0) & (lines < filled.shape[0])
+  lines = np.clip(lines, 0, filled.shape[0] - 1)
+  counts = prefix[lines, ends[:, np.newaxis]] - prefix[lines, starts[:, np.newaxis]]
+  solid = inside & (counts == (ends - starts)[:, np.newaxis])
+  return solid.any(axis=1)
+
 ZERO_IMAGE = np.zeros((5, 5), dtype=np.uint8)
+@profiler.timed("preprocessing")
 def crop_after_plus_component(img, pad_right=5, min_width=20, plus_length=14, bar_width=1, enable_debug=False):
-  global ZERO_IMAGE
+  """Crops the number right of the plus sign. The plus sign is the last component with a solid
+  horizontal and vertical bar of plus_length through its centroid."""
   if args.device_debug:
     enable_debug = True
   if enable_debug:
@@ -127,78 +168,41 @@ def crop_after_plus_component(img, pad_right=5, min_width=20, plus_length=14, ba
   n, labels, stats, centroids = cv2.connectedComponentsWithStats(img)
   if enable_debug:
     debug(f"crop_after_plus_component: Found {n} connected components")
-  extension_width = int(plus_length // 2)
-  if n > 1:
-    plus_sign = None
-    for i in range(1, n):
-      left, top, width, height, area = stats[i]
-      if enable_debug:
-        component_img = img[top:top+height, left:left+width]
-        debug_window(component_img, save_name=f"component_{i}")
-      midpoint_x = int(centroids[i][0])
-      midpoint_y = int(centroids[i][1])
-
-      # Check 15 pixels centered on midpoint (7 left, 7 right), across 3 rows (above, at, below midpoint)
-      # Check for white pixels in a 3x14 area around the midpoint
-      start_x = max(0, midpoint_x - extension_width)
-      end_x = min(img.shape[1], midpoint_x + extension_width)
-
-      has_horizontal_bar = False
-      for y_offset in range(-bar_width, bar_width + 1):
-        check_y = midpoint_y + y_offset
-        if 0 <= check_y < img.shape[0]:
-          row = img[check_y, start_x:end_x]
-          if np.all(row == 255):
-            has_horizontal_bar = True
-            break
-
-      # Check for white pixels in a 14x3 area around the midpoint
-      start_y = max(0, midpoint_y - extension_width)
-      end_y = min(img.shape[0], midpoint_y + extension_width)
-
-      has_vertical_bar = False
-      for x_offset in range(-bar_width, bar_width + 1):
-        check_x = midpoint_x + x_offset
-        if 0 <= check_x < img.shape[1]:
-          col = img[start_y:end_y, check_x]
-          if np.all(col == 255):
-            has_vertical_bar = True
-            break
-
-      # If component has both horizontal and vertical bars, it's a plus sign!
-      if has_horizontal_bar and has_vertical_bar:
-        plus_sign = i
-        left, top, width, height, area = stats[i]
-        if enable_debug:
-          debug(f"crop_after_plus_component: Found plus sign at component {i}, position ({left}, {top}), size {width}x{height}")
+  if n <= 1:
+    if enable_debug:
+      debug(f"crop_after_plus_component: No components found (n <= 1), returning zero image")
+    return ZERO_IMAGE
 
-    if plus_sign is not None:
-      left, top, width, height, area = stats[plus_sign]
-      crop_x_start = left + width + pad_right
-      # Find the rightmost component by sorting components by right edge (left + width)
-      component_right_edges = [(i, stats[i][0] + stats[i][2]) for i in range(1, n)]
-      component_right_edges.sort(key=lambda x: x[1])
-      rightmost_component_idx = component_right_edges[-1][0]
-      rightmost_left, rightmost_top, rightmost_width, rightmost_height, rightmost_area = stats[rightmost_component_idx]
-      crop_x_end = rightmost_left + rightmost_width + 2
-      if crop_x_end > img.shape[1]:
-        crop_x_end = img.shape[1]
-      cropped_image = img[:, crop_x_start:crop_x_end]
-      if enable_debug:
-        debug(f"crop_after_plus_component: Cropping from x={crop_x_start} to x={crop_x_end}, cropped shape {cropped_image.shape}")
-    else:
-      if enable_debug:
-        debug(f"crop_after_plus_component: No plus sign found, returning zero image")
-      return ZERO_IMAGE
+  height, width = img.shape[:2]
+  extension_width = int(plus_length // 2)
+  stats = stats[1:]
+  midpoints = centroids[1:].astype(np.int64)
+  midpoint_x, midpoint_y = midpoints[:, 0], midpoints[:, 1]
+  offsets = np.arange(-bar_width, bar_width + 1)
+  filled = img == 255
 
-    if cropped_image.shape[1] < 10:
-      if enable_debug:
-        debug(f"crop_after_plus_component: Cropped image width {cropped_image.shape[1]} < 10, returning zero image")
-      return ZERO_IMAGE
+  has_horizontal_bar = _solid_spans(filled, midpoint_y, np.maximum(0, midpoint_x - extension_width),
+                                    np.minimum(width, midpoint_x + extension_width), offsets)
+  has_vertical_bar = _solid_spans(filled.T, midpoint_x, np.maximum(0, midpoint_y - extension_width),
+                                  np.minimum(height, midpoint_y + extension_width), offsets)
+  plus_signs = np.flatnonzero(has_horizontal_bar & has_vertical_bar)
+  if len(plus_signs) == 0:
+    if enable_debug:
+      debug(f"crop_after_plus_component: No plus sign found, returning zero image")
+    return ZERO_IMAGE
 
-  else:
+  left, top, plus_width, plus_height, _ = stats[plus_signs[-1]]
+  if enable_debug:
+    debug(f"crop_after_plus_component: Found plus sign at component {plus_signs[-1] + 1}, position ({left}, {top}), size {plus_width}x{plus_height}")
+  crop_x_start = left + plus_width + pad_right
+  # right edge of the rightmost component
+  crop_x_end = min(int((stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH]).max()) + 2, width)
+  cropped_image = img[:, crop_x_start:crop_x_end]
+  if enable_debug:
+    debug(f"crop_after_plus_component: Cropping from x={crop_x_start} to x={crop_x_end}, cropped shape {cropped_image.shape}")
+  if cropped_image.shape[1] < 10:
     if enable_debug:
-      debug(f"crop_after_plus_component: No components found (n <= 1), returning zero image")
+      debug(f"crop_after_plus_component: Cropped image width {cropped_image.shape[1]} < 10, returning zero image")
     return ZERO_IMAGE
 
   if enable_debug:
@@ -212,6 +216,7 @@ def are_screenshots_same(screenshot1: np.ndarray, screenshot2: np.ndarray, diff_
     return False
   return True
 
+@profiler.timed("preprocessing")
 def custom_grabcut(image, mask_area=2, enable_debug=False):
   if args.device_debug:
     enable_debug = True
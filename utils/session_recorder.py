@@ -0,0 +1,192 @@
+# records every distinct full frame plus the inputs around it, replay_actions can load the result
+# layout of a session directory:
+#   frames.bin  raw frame bytes appended back to back, open with np.memmap
+#   index.json  frame offsets/shapes, every capture with its call site and every input event
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import atexit
+
+import numpy as np
+
+from utils.log import info, warning, error
+
+INDEX_NAME = "index.json"
+FRAMES_NAME = "frames.bin"
+INDEX_VERSION = 1
+# rewrite the index every this many new frames, so a crash only loses the tail
+INDEX_FLUSH_EVERY = 50
+# the bot never waits on the recorder, if the writer falls this far behind we drop items instead
+MAX_PENDING = 256
+# frames are full RGB screens, the queue is also capped by the pixels it holds
+MAX_PENDING_BYTES = 256 * 1024 * 1024
+
+class SessionRecorder:
+  def __init__(self, path, layout):
+    os.makedirs(path, exist_ok=True)
+    self.path = path
+    self.start = time.perf_counter()
+    self.index = {
+      "version": INDEX_VERSION,
+      "layout": layout,
+      "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+      "frames": [],
+      "captures": [],
+      "inputs": [],
+    }
+    self._hashes = {}
+    self._frames_file = open(os.path.join(path, FRAMES_NAME), "wb")
+    self._offset = 0
+    self._queue = queue.Queue(maxsize=MAX_PENDING)
+    self._last_frame_id = None
+    self._pending_bytes = 0
+    self._pending_lock = threading.Lock()
+    self._dropped = 0
+    self._since_flush = 0
+    self._thread = threading.Thread(target=self._writer, name="session-recorder", daemon=True)
+    self._thread.start()
+    info(f"Recording session to {path}")
+
+  def now(self):
+    return round(time.perf_counter() - self.start, 4)
+
+  def _put(self, item, size=0):
+    """Enqueues without blocking, False if the item was dropped."""
+    with self._pending_lock:
+      if size and self._pending_bytes + size > MAX_PENDING_BYTES:
+        full = True
+      else:
+        try:
+          self._queue.put_nowait(item)
+          self._pending_bytes += size
+          full = False
+        except queue.Full:
+          full = True
+    if full:
+      self._dropped += 1
+      if self._dropped == 1 or self._dropped % 100 == 0:
+        warning(f"Session recorder is behind, dropped {self._dropped} items so far.")
+    return not full
+
+  def record_frame(self, frame, caller):
+    """Called from the bot thread, only enqueues. The same frame id is recorded once per capture."""
+    if frame.frame_id == self._last_frame_id:
+      self._put(("capture", self.now(), None, caller))
+      return
+    # a dropped frame has to be offered again by the next capture of it
+    if self._put(("capture", self.now(), frame.image, caller), frame.image.nbytes):
+      self._last_frame_id = frame.frame_id
+
+  def record_input(self, event, **details):
+    self._put(("input", self.now(), event, details))
+
+  def _store_frame(self, image):
+    data = image.tobytes() if image.flags.c_contiguous else image.copy().tobytes()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    slot = self._hashes.get(digest)
+    if slot is not None:
+      return slot
+    slot = len(self.index["frames"])
+    self._frames_file.write(data)
+    self.index["frames"].append({
+      "offset": self._offset,
+      "shape": list(image.shape),
+      "dtype": str(image.dtype),
+      "hash": digest,
+    })
+    self._offset += len(data)
+    self._hashes[digest] = slot
+    self._since_flush += 1
+    return slot
+
+  def _writer(self):
+    last_slot = None
+    while True:
+      item = self._queue.get()
+      if item is None:
+        self._queue.task_done()
+        return
+      try:
+        kind, timestamp, payload, extra = item
+        if kind == "capture":
+          if payload is not None:
+            try:
+              last_slot = self._store_frame(payload)
+            finally:
+              with self._pending_lock:
+                self._pending_bytes -= payload.nbytes
+          self.index["captures"].append({"time": timestamp, "frame": last_slot, "caller": extra})
+        else:
+          self.index["inputs"].append({"time": timestamp, "event": payload, "after_capture": len(self.index["captures"]) - 1, **extra})
+        if self._since_flush >= INDEX_FLUSH_EVERY:
+          self.write_index()
+      except Exception as e:
+        error(f"Session recorder failed to write: {e}")
+      finally:
+        self._queue.task_done()
+
+  def write_index(self):
+    self._frames_file.flush()
+    self._since_flush = 0
+    self.index["dropped"] = self._dropped
+    tmp_path = os.path.join(self.path, INDEX_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+      json.dump(self.index, f, separators=(",", ":"))
+    os.replace(tmp_path, os.path.join(self.path, INDEX_NAME))
+
+  def close(self):
+    self._queue.put(None)
+    self._thread.join()
+    self.write_index()
+    self._frames_file.close()
+    info(f"Recorded session: {len(self.index['frames'])} distinct frames, {len(self.index['captures'])} captures, {len(self.index['inputs'])} inputs, {self._dropped} dropped.")
+
+recorder = None
+_lock = threading.Lock()
+
+def start(path, layout):
+  global recorder
+  with _lock:
+    if recorder is None:
+      recorder = SessionRecorder(path, layout)
+      atexit.register(stop)
+  return recorder
+
+def stop():
+  global recorder
+  with _lock:
+    if recorder is not None:
+      recorder.close()
+      recorder = None
+
+def default_session_path():
+  return os.path.join("logs", "sessions", time.strftime("%Y%m%d_%H%M%S"))
+
+def load_session(path):
+  """Returns (index, frames) with frames as read-only memmap views in index order."""
+  with open(os.path.join(path, INDEX_NAME), "r", encoding="utf-8") as f:
+    index = json.load(f)
+  frames_path = os.path.join(path, FRAMES_NAME)
+  frames = []
+  for entry in index["frames"]:
+    frames.append(np.memmap(frames_path, dtype=entry["dtype"], mode="r", offset=entry["offset"], shape=tuple(entry["shape"])))
+  return index, frames
+
+def replay_frames(index, frames):
+  """One frame per gap between inputs, the last one the bot looked at before acting."""
+  inputs = index["inputs"]
+  captures = index["captures"]
+  sequence = []
+  last = frames[0] if frames else None
+  capture_i = 0
+  for boundary in [entry["after_capture"] for entry in inputs] + [len(captures) - 1]:
+    while capture_i <= boundary:
+      slot = captures[capture_i]["frame"]
+      if slot is not None:
+        last = frames[slot]
+      capture_i += 1
+    sequence.append(last)
+  return sequence
@@ -196,6 +196,184 @@ class CleanDefaultDict(dict):
       return NotImplemented
     return not result
 
+class Record:
+  """
+  Fixed-field record for state the scoring code reads thousands of times a turn.
+  Fields are plain attributes, set to their zero default on creation, so reads never
+  allocate. record["field"], .get(), in, .items() and .update() keep the dict style
+  callers and logging working.
+  """
+  __slots__ = ()
+  # field -> zero default, mutable defaults are given as their type and created per record
+  DEFAULTS = {}
+
+  def __init__(self, **fields):
+    for key, default in self.DEFAULTS.items():
+      setattr(self, key, default() if isinstance(default, type) else default)
+    for key, value in fields.items():
+      self[key] = value
+
+  def __getitem__(self, key):
+    if key in self.DEFAULTS:
+      return getattr(self, key)
+    return self._missing(key)
+
+  def _missing(self, key):
+    raise KeyError(key)
+
+  def __setitem__(self, key, value):
+    if key not in self.DEFAULTS:
+      raise KeyError(f"{type(self).__name__} has no field {key!r}")
+    setattr(self, key, value)
+
+  def __contains__(self, key):
+    return key in self.DEFAULTS
+
+  def get(self, key, default=None):
+    return self[key] if key in self else default
+
+  def update(self, *args, **kwargs):
+    for mapping in args:
+      for key, value in (mapping.items() if hasattr(mapping, "items") else mapping):
+        self[key] = value
+    for key, value in kwargs.items():
+      self[key] = value
+
+  def keys(self):
+    return self.DEFAULTS.keys()
+
+  def items(self):
+    return [(key, getattr(self, key)) for key in self.DEFAULTS]
+
+  def __iter__(self):
+    return iter(self.DEFAULTS)
+
+  def __eq__(self, other):
+    if isinstance(other, Record):
+      return type(self) is type(other) and self.items() == other.items()
+    if isinstance(other, dict):
+      return dict(self.items()) == other
+    return NotImplemented
+
+  __hash__ = None
+
+  def __bool__(self):
+    # an all zero record is falsy like the empty dict it replaces
+    return any(getattr(self, key) for key in self.DEFAULTS)
+
+  def __repr__(self):
+    # zero fields are left out like the keys a dict never got
+    return repr({key: value for key, value in self.items() if value})
+
+class FriendshipLevels(Record):
+  """Support counts per friendship bar color."""
+  __slots__ = ("gray", "blue", "green", "yellow", "max")
+  DEFAULTS = {"gray": 0, "blue": 0, "green": 0, "yellow": 0, "max": 0}
+
+class SupportCounts(Record):
+  """Supports of one card type on a training."""
+  __slots__ = ("supports", "hints", "friendship_levels")
+  DEFAULTS = {"supports": 0, "hints": 0, "friendship_levels": FriendshipLevels}
+
+# read only stand in for card types that aren't on a training
+NO_SUPPORTS = SupportCounts()
+
+class TrainingResult(Record):
+  """
+  Everything read off one training: failure and stat gains, support and friendship
+  counts, plus what the filters and scores note on it. Card types are keys too,
+  result["spd"] is the SupportCounts of the speed cards on it.
+  """
+  __slots__ = ("failure", "stat_gains", "total_supports", "total_hints", "total_friendship_levels", "hints_per_friend_level",
+               "unity_trainings", "unity_gauge_fills", "unity_spirit_explosions", "supports",
+               "is_capped", "fail_rate_too_high", "max_allowed_failure", "rainbow_points", "total_rainbow_friends")
+  DEFAULTS = {
+    "failure": 0,
+    "stat_gains": dict,
+    "total_supports": 0,
+    "total_hints": 0,
+    "total_friendship_levels": FriendshipLevels,
+    "hints_per_friend_level": FriendshipLevels,
+    "unity_trainings": 0,
+    "unity_gauge_fills": 0,
+    "unity_spirit_explosions": 0,
+    # card type -> SupportCounts, only the types that are on the training
+    "supports": dict,
+    "is_capped": False,
+    "fail_rate_too_high": False,
+    "max_allowed_failure": 0,
+    "rainbow_points": 0,
+    "total_rainbow_friends": 0,
+  }
+
+  def support_counts(self, support_type):
+    """Counts of one card type, NO_SUPPORTS when there is none. Not for writing into."""
+    return self.supports.get(support_type, NO_SUPPORTS)
+
+  def add_support(self, support_type):
+    counts = self.supports.get(support_type)
+    if counts is None:
+      counts = self.supports[support_type] = SupportCounts()
+    return counts
+
+  @property
+  def total_friendship_increases(self):
+    levels = self.total_friendship_levels
+    return levels.gray + levels.blue + levels.green
+
+  def _missing(self, key):
+    if key == "total_friendship_increases":
+      return self.total_friendship_increases
+    if key not in constants.SUPPORT_ICONS:
+      raise KeyError(key)
+    # a card type, a fresh zero record so writing into it can't leak anywhere
+    counts = self.supports.get(key)
+    return counts if counts is not None else SupportCounts()
+
+  def __setitem__(self, key, value):
+    if key in self.DEFAULTS:
+      setattr(self, key, value)
+    elif key in constants.SUPPORT_ICONS and isinstance(value, SupportCounts):
+      self.supports[key] = value
+    else:
+      raise KeyError(f"TrainingResult has no field {key!r}")
+
+  def __contains__(self, key):
+    return key in self.DEFAULTS or key in self.supports or key == "total_friendship_increases"
+
+  def __repr__(self):
+    # card types sit next to the totals, the shape the logged state had as a dict
+    fields = {}
+    for key, value in self.items():
+      if key == "supports":
+        fields.update(value)
+      elif value:
+        fields[key] = value
+    return repr(fields)
+
+class TurnState(Record):
+  """What collect_main_state and collect_training_state read this turn."""
+  __slots__ = ("current_mood", "mood_difference", "mood_difference_junior_year", "turn", "year", "criteria", "current_stats",
+               "energy_level", "max_energy", "date_event_available", "race_mission_available", "aptitudes",
+               "training_results", "status_effect_names")
+  DEFAULTS = {
+    "current_mood": "",
+    "mood_difference": 0,
+    "mood_difference_junior_year": 0,
+    "turn": 0,
+    "year": "",
+    "criteria": "",
+    "current_stats": dict,
+    "energy_level": 0,
+    "max_energy": 0,
+    "date_event_available": False,
+    "race_mission_available": False,
+    "aptitudes": dict,
+    # training name -> TrainingResult
+    "training_results": dict,
+    "status_effect_names": list,
+  }
+
 def get_race_type():
   race_info_screen = enhanced_screenshot(constants.RACE_INFO_TEXT_REGION)
   race_info_text = extract_text(race_info_screen)
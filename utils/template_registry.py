@@ -0,0 +1,82 @@
+# process-wide cache of decoded template images
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from utils.log import debug, warning
+
+# enough for every png under assets/ in all three variants, raise if assets grow a lot
+MAX_TEMPLATES = 1024
+
+_templates = OrderedDict()
+_lock = threading.Lock()
+
+# per turn counters are reset by log_template_stats, totals live for the whole process
+turn_stats = {"hits": 0, "misses": 0}
+total_stats = {"hits": 0, "misses": 0}
+
+def _load(template_path, grayscale, template_scaling):
+  if grayscale:
+    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+    if template is None:
+      return None
+  else:
+    template = cv2.imread(template_path, cv2.IMREAD_COLOR)  # safe default
+    if template is None:
+      return None
+    if template.shape[2] == 4:
+      template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
+    # screenshots are RGB, templates are decoded as BGR
+    template = cv2.cvtColor(template, cv2.COLOR_RGB2BGR)
+  if template_scaling != 1.0:
+    template = cv2.resize(template, (int(template.shape[1] * template_scaling), int(template.shape[0] * template_scaling)))
+  # shared between every caller, nobody is allowed to write into it
+  template.flags.writeable = False
+  return template
+
+def get_template(template_path: str, grayscale=False, template_scaling=1.0):
+  """Returns the decoded template, reading it from disk only on the first request."""
+  key = (template_path, grayscale, template_scaling)
+  with _lock:
+    template = _templates.get(key)
+    if template is not None:
+      _templates.move_to_end(key)
+      turn_stats["hits"] += 1
+      total_stats["hits"] += 1
+      return template
+    turn_stats["misses"] += 1
+    total_stats["misses"] += 1
+
+  template = _load(template_path, grayscale, template_scaling)
+  if template is None:
+    warning(f"Template image doesn't exist or couldn't be decoded: {template_path}")
+    return None
+
+  with _lock:
+    _templates[key] = template
+    _templates.move_to_end(key)
+    while len(_templates) > MAX_TEMPLATES:
+      evicted_key, _ = _templates.popitem(last=False)
+      debug(f"Evicted template from registry: {evicted_key}")
+  return template
+
+def preload_templates(template_paths, grayscale=False, template_scaling=1.0):
+  """Decodes a batch of templates up front so the first turn doesn't pay for it."""
+  if isinstance(template_paths, dict):
+    template_paths = template_paths.values()
+  for template_path in template_paths:
+    get_template(template_path, grayscale=grayscale, template_scaling=template_scaling)
+
+def clear_templates():
+  with _lock:
+    _templates.clear()
+
+def log_template_stats():
+  with _lock:
+    hits, misses = turn_stats["hits"], turn_stats["misses"]
+    turn_stats["hits"] = 0
+    turn_stats["misses"] = 0
+    cached = len(_templates)
+  debug(f"Template registry: {hits} hits, {misses} misses this turn ({total_stats['hits']} hits, {total_stats['misses']} misses total, {cached} cached).")
+  return hits, misses
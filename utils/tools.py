@@ -3,18 +3,29 @@ import cv2
 import pyautogui
 import time
 import json
-import inspect
 
 import core.config as config
 import core.bot as bot
 import utils.constants as constants
 import utils.device_action_wrapper as device_action
 from .log import error
-from utils.log import info, warning, error, debug
+from utils.log import info, warning, error, debug, call_site, DEBUG_ENABLED
+import utils.profiler as profiler
 
 def sleep(seconds=1):
-  debug(f"sleep called from {inspect.stack()[1].function} for {seconds} seconds")
-  time.sleep(seconds * config.SLEEP_TIME_MULTIPLIER)
+  site = call_site()
+  if DEBUG_ENABLED:
+    debug(f"sleep called from {site} for {seconds} seconds")
+  seconds *= config.SLEEP_TIME_MULTIPLIER
+  device_action.sleep(seconds)
+  profiler.record_sleep(site, seconds)
+
+def settle(seconds=1, region_ltrb=None):
+  # sleep that ends early once the screen stopped changing, with --adaptive-delays
+  site = call_site()
+  if DEBUG_ENABLED:
+    debug(f"settle called from {site} for up to {seconds} seconds")
+  profiler.record_sleep(site, device_action.settle(seconds * config.SLEEP_TIME_MULTIPLIER, region_ltrb))
 
 def get_secs(seconds=1):
   return seconds * config.SLEEP_TIME_MULTIPLIER